@@ -0,0 +1,70 @@
+"""
+Measures WalutomatOrder construction throughput against the previous implementation which resolved dataclass fields
+and parsed timestamps with dateutil on every order.
+
+    $ python benchmarks/bench_models.py
+"""
+import json
+import os
+import timeit
+from dataclasses import dataclass, fields
+from datetime import datetime
+from decimal import Decimal
+
+from dateutil.parser import isoparse
+
+from walutomatpy import WalutomatOrder
+from walutomatpy.models.enums import OrderTypeEnum, OrderCurrencyPair, OrderCurrencyEnum, OrderStatusEnum
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures', 'order_result.json')
+
+
+@dataclass(repr=True)
+class LegacyWalutomatOrder:
+    orderId: str
+    submitId: str
+    submitTs: datetime
+    updateTs: datetime
+    status: OrderStatusEnum
+    completion: Decimal
+    currencyPair: OrderCurrencyPair
+    buySell: OrderTypeEnum
+    volume: Decimal
+    volumeCurrency: OrderCurrencyEnum
+    limitPrice: Decimal
+    soldAmount: Decimal
+    soldCurrency: OrderCurrencyEnum
+    boughtAmount: Decimal
+    boughtCurrency: OrderCurrencyEnum
+    commissionAmount: Decimal
+    commissionCurrency: OrderCurrencyEnum
+    commissionRate: Decimal
+
+    def __init__(self, **kwargs):
+        submit_ts = kwargs.get('submitTs')
+        if submit_ts:
+            self.submitTs = isoparse(submit_ts)
+        update_ts = kwargs.get('updateTs')
+        if update_ts:
+            self.updateTs = isoparse(update_ts)
+        obj_field_types = {field.name: field.type for field in fields(self)}
+        for arg_name, arg_value in kwargs.items():
+            field_type = obj_field_types.get(arg_name)
+            field_value = getattr(self, arg_name, None)
+            if field_value is None and field_type:
+                setattr(self, arg_name, field_type(arg_value))
+
+
+def main(number=20000):
+    with open(FIXTURE) as fp:
+        raw_order = json.load(fp)
+    raw_order['updateTs'] = '2022-08-03T09:50:16.692380437Z'
+    legacy = timeit.timeit(lambda: LegacyWalutomatOrder(**raw_order), number=number)
+    current = timeit.timeit(lambda: WalutomatOrder(**raw_order), number=number)
+    print(f'legacy:  {number / legacy:10.0f} orders/s')
+    print(f'current: {number / current:10.0f} orders/s')
+    print(f'speedup: {legacy / current:10.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Compares request signing cost of the legacy pyOpenSSL path (urlsplit, f-string, crypto.sign and strftime on every
+request) with the cached CryptographySigner path used by WalutomatClient.request. The RSA private key operation
+dominates both, so framing overhead (everything except the RSA operation) is reported separately.
+
+    $ python benchmarks/bench_signing.py
+"""
+import base64
+import timeit
+from datetime import datetime
+from urllib.parse import urlsplit
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from OpenSSL import crypto
+
+from walutomatpy.signing import CryptographySigner, SignatureTimestamp
+
+URL = 'https://api.walutomat.pl/api/v2.0.0/market_fx/best_offers/detailed?currencyPair=EURPLN&itemLimit=10'
+PATH_URL = URL[len('https://api.walutomat.pl'):]
+
+
+class NullSigner(CryptographySigner):
+    def __init__(self):
+        pass
+
+    def sign(self, data: bytes) -> bytes:
+        return data
+
+
+def legacy_sign(private_key, uri, body=None, sign=crypto.sign):
+    timestamp = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+    parsed_url = urlsplit(uri)
+    if body is not None:
+        data_to_sign = f'{timestamp}{parsed_url.path}{body}'
+    else:
+        data_to_sign = f'{timestamp}{parsed_url.path}'
+        if parsed_url.query:
+            data_to_sign += f'?{parsed_url.query}'
+    return base64.b64encode(sign(private_key, data_to_sign, 'sha256'))
+
+
+def main(number=2000):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption())
+    openssl_key = crypto.load_privatekey(crypto.FILETYPE_PEM, pem)
+    signer = CryptographySigner(pem)
+    timestamp = SignatureTimestamp()
+
+    legacy = timeit.timeit(lambda: legacy_sign(openssl_key, URL), number=number) / number
+    cached = timeit.timeit(lambda: signer.sign_request(timestamp(), PATH_URL), number=number) / number
+    print(f'legacy pyOpenSSL: {legacy * 1e6:9.1f} us/request')
+    print(f'cryptography:     {cached * 1e6:9.1f} us/request')
+    print(f'speedup:          {legacy / cached:9.2f}x')
+
+    null_signer = NullSigner()
+    legacy = timeit.timeit(lambda: legacy_sign(None, URL, sign=lambda k, d, a: d.encode()), number=number) / number
+    cached = timeit.timeit(lambda: null_signer.sign_request(timestamp(), PATH_URL), number=number) / number
+    print(f'framing legacy:   {legacy * 1e6:9.1f} us/request')
+    print(f'framing cached:   {cached * 1e6:9.1f} us/request')
+    print(f'framing speedup:  {legacy / cached:9.2f}x')
+
+
+if __name__ == '__main__':
+    main()
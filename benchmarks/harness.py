@@ -0,0 +1,76 @@
+"""
+Minimal stdlib benchmark harness: cases register with @benchmark, each is timed with timeit in a few repeats and
+results are written as JSON so runs of different versions can be compared.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+BENCHMARKS = []
+
+
+def benchmark(name, **params):
+    """
+    Registers a setup function returning the callable to time, params are passed to the setup and recorded with
+    the results.
+    """
+    def register(setup):
+        BENCHMARKS.append((name, params, setup))
+        return setup
+
+    return register
+
+
+def run_benchmark(name, params, setup, repeat=5, min_time=0.2):
+    func = setup(**params)
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    # autorange stops at 0.2s, scale up so every repeat takes about min_time
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    timings = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    return dict(name=name, params=params, number=number, repeat=repeat, min=min(timings),
+                mean=statistics.mean(timings), stdev=statistics.stdev(timings) if repeat > 1 else 0.0,
+                ops=1 / min(timings))
+
+
+def compare(results, baseline):
+    baseline = {(item['name'], json.dumps(item['params'], sort_keys=True)): item for item in baseline['results']}
+    for item in results['results']:
+        previous = baseline.get((item['name'], json.dumps(item['params'], sort_keys=True)))
+        if previous is not None:
+            item['baseline_min'] = previous['min']
+            item['change'] = item['min'] / previous['min'] - 1
+
+
+def main(argv=None):
+    from walutomatpy import __version__
+
+    parser = argparse.ArgumentParser(description='Runs registered benchmarks and prints JSON results.')
+    parser.add_argument('-k', dest='filter', help='run only benchmarks whose name contains this string')
+    parser.add_argument('-o', '--output', help='write results to this file instead of stdout')
+    parser.add_argument('--compare', help='results file of a previous run to compare with')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per repeat')
+    args = parser.parse_args(argv)
+
+    results = dict(version=__version__, python=platform.python_version(), platform=platform.platform(),
+                   timestamp=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), results=[])
+    for name, params, setup in BENCHMARKS:
+        if args.filter and args.filter not in name:
+            continue
+        result = run_benchmark(name, params, setup, args.repeat, args.min_time)
+        results['results'].append(result)
+        print(f'{name:40} {json.dumps(params):30} {result["min"] * 1e6:12.2f} us', file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(results, json.load(fp))
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as fp:
+            fp.write(output)
+    else:
+        print(output)
@@ -0,0 +1,160 @@
+"""
+Benchmarks of the client hot paths: request signing, model parsing, pricing over order books of different depths,
+sorting of detailed offers and paginated listings served by a stubbed requests transport. Paginated loops use a
+constant signer so they measure request preparation, decoding and parsing only, signing is measured separately.
+
+    $ python benchmarks/suite.py -o results.json
+    $ python benchmarks/suite.py --compare results.json -k pagination
+"""
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from walutomatpy import WalutomatClient, WrappedWalutomatClient, WalutomatOrder, AccountBalances, Offer
+from walutomatpy.signing import Signer
+from walutomatpy.trader import get_price_by_volume
+from walutomatpy.wrapped import OUTPUT_MODEL, OUTPUT_TUPLE
+
+from harness import benchmark, main
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures')
+
+
+def read_fixture(filename):
+    with open(os.path.join(FIXTURES, filename)) as fp:
+        return json.load(fp)
+
+
+def generate_private_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                             serialization.NoEncryption()).decode()
+
+
+def make_offers(depth, reverse=False):
+    prices = [Decimal('4.5') + Decimal(level) / 10000 * (-1 if reverse else 1) for level in range(depth)]
+    return [dict(price=str(price), volume=f'{100 + level}.00', valueInOppositeCurrency=str(price * 100))
+            for level, price in enumerate(prices)]
+
+
+class ConstantSigner(Signer):
+    def sign(self, data: bytes) -> bytes:
+        return b'signature'
+
+
+class StubAdapter(requests.adapters.BaseAdapter):
+    """
+    Serves pre-encoded pages of active orders and account history keyed by their pagination cursor.
+    """
+
+    def __init__(self, orders=1000, history=1000):
+        super().__init__()
+        raw_order = read_fixture('order_result.json')
+        start = datetime(2022, 1, 1, tzinfo=timezone.utc)
+        self.orders = [dict(raw_order, orderId=str(index),
+                            submitTs=f'{start - timedelta(seconds=index):%Y-%m-%dT%H:%M:%S}.{index % 1000:03d}Z')
+                       for index in range(orders)]
+        self.history = [dict(historyItemId=index + 1, ts='2022-01-01T00:00:00.000Z', operationAmount='-10.00',
+                             balanceAfter='100.00', currency='EUR', operationType='MARKET_FX')
+                        for index in range(history)]
+        self._order_positions = {order['submitTs']: index + 1 for index, order in enumerate(self.orders)}
+
+    def _page(self, items, start, limit):
+        return json.dumps(dict(success=True, result=items[start:start + limit])).encode()
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        limit = int(params['itemLimit'])
+        if url.path.endswith('/orders/active'):
+            content = self._page(self.orders, self._order_positions.get(params.get('olderThan'), 0), limit)
+        else:
+            content = self._page(self.history, int(params.get('continueFrom', 0)), limit)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = content
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+
+def stub_client(**items):
+    client = WrappedWalutomatClient('API_KEY', None, signer=ConstantSigner())
+    client.session.mount('https://', StubAdapter(**items))
+    return client
+
+
+@benchmark('get_signature', body=False)
+@benchmark('get_signature', body=True)
+def bench_signature(body):
+    client = WalutomatClient('API_KEY', generate_private_key())
+    url = 'https://api.walutomat.pl/api/v2.0.0/market_fx/best_offers/detailed?currencyPair=EURPLN&itemLimit=10'
+    data = 'currencyPair=EURPLN&buySell=BUY&volume=100&volumeCurrency=EUR&limitPrice=4.5' if body else None
+    return lambda: client.get_signature(url, '2022-01-01T00:00:00Z', data)
+
+
+@benchmark('WalutomatOrder')
+def bench_order():
+    raw_order = read_fixture('order_result.json')
+    return lambda: WalutomatOrder(**raw_order)
+
+
+@benchmark('AccountBalances')
+def bench_balances():
+    raw_balances = read_fixture('account_balances.json')
+    return lambda: AccountBalances(raw_balances)
+
+
+@benchmark('get_price_by_volume', depth=10)
+@benchmark('get_price_by_volume', depth=100)
+@benchmark('get_price_by_volume', depth=1000)
+def bench_price_by_volume(depth):
+    offers = [Offer(offer['price'], offer['volume']) for offer in make_offers(depth)]
+    volume = sum(offer.volume for offer in offers) / 2
+    return lambda: get_price_by_volume(offers, volume)
+
+
+class _StaticOffersClient(WalutomatClient):
+    result = None
+
+    def get_p2p_best_offers_detailed(self, currency_pair, item_limit=10):
+        return self.result
+
+
+class _SortingClient(WrappedWalutomatClient, _StaticOffersClient):
+    pass
+
+
+@benchmark('get_p2p_best_offers_detailed', depth=10, output=OUTPUT_MODEL)
+@benchmark('get_p2p_best_offers_detailed', depth=200, output=OUTPUT_MODEL)
+@benchmark('get_p2p_best_offers_detailed', depth=200, output=OUTPUT_TUPLE)
+def bench_offers_sorting(depth, output):
+    client = _SortingClient('API_KEY', None)
+    # API order reversed so sorting has work to do
+    client.result = dict(bids=make_offers(depth)[::-1], asks=make_offers(depth, reverse=True))
+    return lambda: client.get_p2p_best_offers_detailed('EURPLN', depth, output=output)
+
+
+@benchmark('pagination.get_p2p_active_orders', items=1000, item_limit=50)
+def bench_active_orders(items, item_limit):
+    client = stub_client(orders=items)
+    return lambda: sum(1 for _ in client.get_p2p_active_orders(item_limit))
+
+
+@benchmark('pagination.get_account_history', items=1000, item_limit=200)
+def bench_history(items, item_limit):
+    client = stub_client(history=items)
+    return lambda: sum(1 for _ in client.get_account_history(item_limit=item_limit))
+
+
+if __name__ == '__main__':
+    main()
@@ -18,10 +18,17 @@ def read(f):
 
 install_requires = [
     'pyOpenSSL >=20.0.1, <24',
+    'cryptography >=3.3',
     'requests >=2.25.1, <3',
     'python-dateutil >=2.8.2, <3'
 ]
 
+extras_require = {
+    'async': ['aiohttp >=3.8, <4'],
+    'numpy': ['numpy >=1.20'],
+    'orjson': ['orjson >=3'],
+}
+
 
 setup(name='walutomatpy',
       version=version,
@@ -42,6 +49,7 @@ setup(name='walutomatpy',
       packages=find_packages(where="src"),
       test_suite='nose.collector',
       tests_require=['nose', 'flake8', 'coverage'],
-      python_requires='>=3.6',
+      python_requires='>=3.8',
       install_requires=install_requires,
+      extras_require=extras_require,
       include_package_data=True)
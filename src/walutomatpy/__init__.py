@@ -1,7 +1,52 @@
 __version__ = '1.1.1'
 
-from .client import WalutomatClient
-from .wrapped import WrappedWalutomatClient
-from .trader import WalutomatTrader
+import importlib
 
-from .models import *
+# public names are imported on first access, so importing the package alone doesn't load requests, OpenSSL,
+# dateutil or aiohttp
+_LAZY_ATTRIBUTES = {
+    'WalutomatClient': 'client',
+    'WrappedWalutomatClient': 'wrapped',
+    'CachedWalutomatClient': 'cache',
+    'WalutomatTrader': 'trader',
+    'OrderRequest': 'trader',
+    'OrderResult': 'trader',
+    'MarketDataPoller': 'poller',
+    'OrderWatcher': 'watcher',
+    'BalanceLedger': 'ledger',
+    'OrderBook': 'orderbook',
+    'WalutomatClientPool': 'pool',
+    'AsyncWalutomatClient': 'async_client',
+    'AsyncWrappedWalutomatClient': 'async_wrapped',
+    'WalutomatOrder': 'models',
+    'LazyWalutomatOrder': 'models',
+    'AccountBalances': 'models',
+    'AccountCurrencyBalance': 'models',
+    'OrderStatusEnum': 'models',
+    'OrderTypeEnum': 'models',
+    'OrderCurrencyEnum': 'models',
+    'OrderCurrencyPair': 'models',
+    'Offer': 'models',
+}
+
+__all__ = ['__version__', *_LAZY_ATTRIBUTES]
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        if name.startswith('_'):
+            raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+        # anything else models used to export with a star import
+        module_name = 'models'
+    module = importlib.import_module(f'.{module_name}', __name__)
+    try:
+        value = getattr(module, name)
+    except AttributeError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
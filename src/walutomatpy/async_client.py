@@ -0,0 +1,291 @@
+from time import perf_counter
+from urllib.parse import urljoin, urlencode, urlsplit
+
+from .client import BaseWalutomatClient, WalutomatApiException, _is_outcome_unknown, _submitted_since
+from .instrumentation import PHASE_SIGN, PHASE_TOTAL
+from .logger import logger
+
+
+def _retry_exceptions():
+    import asyncio
+    import aiohttp
+
+    # network errors of aiohttp, retried on top of the ones of requests known to RetryPolicy
+    return aiohttp.ClientConnectionError, asyncio.TimeoutError
+
+
+def encode_params(params):
+    """
+    Form-encodes params the same way requests does: None values are dropped and sequences are expanded, so the
+    signed query string or body matches the one sent over the wire byte for byte.
+    """
+    if not params:
+        return None
+    if isinstance(params, (str, bytes)):
+        return params
+    return urlencode([(key, value) for key, value in params.items() if value is not None], doseq=True)
+
+
+class AsyncRequest:
+    """
+    Minimal request description kept for WalutomatApiException which expects requests.PreparedRequest like object
+    """
+
+    def __init__(self, method, url, headers, body):
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+
+    def __repr__(self):
+        return f'<AsyncRequest [{self.method}]>'
+
+
+class AsyncWalutomatClient(BaseWalutomatClient):
+    """
+    asyncio counterpart of WalutomatClient. All requests go through a single aiohttp.ClientSession whose connector
+    keeps a pool of keep-alive connections, so many requests can be in flight concurrently from one event loop.
+
+    Paginated endpoints are exposed as async generators. A RetryPolicy is applied the same way as by
+    WalutomatClient, the thread based RateLimiter is not supported.
+
+    Usage:
+
+        async with AsyncWalutomatClient(api_key, private_key) as client:
+            balances = await client.get_account_balances()
+            async for order in client.get_p2p_active_orders():
+                ...
+    """
+
+    def __init__(self, api_key, private_key, *, max_retry=0, base_url='api.walutomat.pl', dryRun=False, signer=None,
+                 json_decoder='auto', connection_limit=100, connection_limit_per_host=0, keepalive_timeout=15,
+                 timeout=(3.05, 10), instrumentation=None, retry_policy=None):
+        super().__init__(api_key, private_key, max_retry=max_retry, base_url=base_url, dryRun=dryRun, signer=signer,
+                         json_decoder=json_decoder, instrumentation=instrumentation, retry_policy=retry_policy)
+        self._connection_limit = connection_limit
+        self._connection_limit_per_host = connection_limit_per_host
+        self._keepalive_timeout = keepalive_timeout
+        self._timeout = timeout
+        logger.debug(f'Connection limit: {self._connection_limit} (per host: {self._connection_limit_per_host})')
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+
+            connect_timeout, read_timeout = self._timeout
+            connector = aiohttp.TCPConnector(limit=self._connection_limit,
+                                             limit_per_host=self._connection_limit_per_host,
+                                             keepalive_timeout=self._keepalive_timeout)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+                headers={
+                    'X-API-Key': self._api_key,
+                    'Content-Type': 'application/x-www-form-urlencoded'
+                })
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def _send(self, method, url, headers, body):
+        """
+        :return: tuple of HTTP status and decoded response
+        """
+        import aiohttp
+        from yarl import URL
+
+        attempt = 0
+        while True:
+            try:
+                async with self.session.request(method, URL(url, encoded=True), data=body, headers=headers) as resp:
+                    return resp.status, self._decode(await resp.read())
+            except aiohttp.ClientConnectorError:
+                if attempt >= self._max_retry:
+                    self._count(method, urlsplit(url).path, 'error:ClientConnectorError')
+                    raise
+                attempt += 1
+                self._count(method, urlsplit(url).path, 'retries')
+                logger.debug(f'Connection failed, retry {attempt}/{self._max_retry}: {method} {url}')
+
+    async def request(self, method, endpoint_uri, headers=None, data=None, params=None, *, idempotent=None):
+        """
+        :param idempotent: whether the request may be retried by the retry policy, GET requests are by default
+        """
+        policy = self._retry_policy
+        if policy is None or not (method == 'GET' if idempotent is None else idempotent):
+            return await self._request(method, endpoint_uri, headers, data, params)
+
+        async def attempt(_):
+            return await self._request(method, endpoint_uri, headers, data, params)
+
+        return await policy.call_async(attempt, on_retry=lambda _, error: self._on_retry(method, endpoint_uri, error),
+                                       retry_exceptions=_retry_exceptions())
+
+    async def _request(self, method, endpoint_uri, headers=None, data=None, params=None):
+        url = urljoin(self._url_prefix, endpoint_uri)
+        query = encode_params(params)
+        if query:
+            url = f'{url}?{query}'
+        body = encode_params(data)
+        started = perf_counter()
+        timestamp = self._timestamp()
+        signature_base64 = self.get_signature(url, timestamp, body)
+        _headers = {
+            'X-API-Signature': signature_base64.decode(),
+            'X-API-Timestamp': timestamp,
+        }
+        headers = headers or {}
+        headers.update(_headers)
+        signed = perf_counter()
+        status, json = await self._send(method, url, headers, body)
+        if self._instrumentation is not None:
+            self._count(method, endpoint_uri, 'requests')
+            self._observe(method, endpoint_uri, PHASE_SIGN, signed - started)
+            self._observe(method, endpoint_uri, PHASE_TOTAL, perf_counter() - started)
+        if json['success']:
+            return json
+        if json.get('errors'):
+            self._count_errors(method, endpoint_uri, json['errors'])
+            raise WalutomatApiException(AsyncRequest(method, url, headers, body), json, status)
+
+    async def get_account_balances(self):
+        data = await self.request('GET', '/api/v2.0.0/account/balances')
+        return data.get('result')
+
+    async def get_account_history(self, date_from=None, date_to=None, currencies=None, operation_type=None,
+                                  item_limit=200, continue_from=None, sort_order='DESC'):
+        params = dict(
+            dateFrom=date_from,
+            dateTo=date_to,
+            currencies=currencies,
+            operationType=operation_type,
+            itemLimit=item_limit,
+            continueFrom=continue_from,
+            sortOrder=sort_order
+        )
+        while True:
+            data = await self.request('GET', '/api/v2.0.0/account/history', params=params)
+            items = data.get('result', [])
+            self._count_page('GET', '/api/v2.0.0/account/history', items)
+            for item in items:
+                yield item
+            if len(items) != item_limit:
+                break
+            last_history_item_id = items[-1].get('historyItemId')
+            params.update(dict(continueFrom=last_history_item_id))
+
+    async def get_p2p_best_offers(self, currency_pair):
+        params = dict(
+            currencyPair=currency_pair
+        )
+        data = await self.request('GET', '/api/v2.0.0/market_fx/best_offers', params=params)
+        return data.get('result')
+
+    async def get_p2p_best_offers_detailed(self, currency_pair, item_limit=10):
+        params = dict(
+            currencyPair=currency_pair,
+            itemLimit=item_limit
+        )
+        data = await self.request('GET', '/api/v2.0.0/market_fx/best_offers/detailed', params=params)
+        return data.get('result')
+
+    async def get_p2p_active_orders(self, item_limit=10):
+        params = dict(
+            itemLimit=item_limit
+        )
+        while True:
+            data = await self.request('GET', '/api/v2.0.0/market_fx/orders/active', params=params)
+            items = data.get('result', [])
+            self._count_page('GET', '/api/v2.0.0/market_fx/orders/active', items)
+            for item in items:
+                yield item
+            if len(items) != item_limit:
+                break
+            last_item_pos = items[-1].get('submitTs')
+            params.update(dict(olderThan=last_item_pos))
+
+    async def get_p2p_order_by_id(self, order_id):
+        params = dict(
+            orderId=order_id,
+        )
+        data = await self.request('GET', '/api/v2.0.0/market_fx/orders', params=params)
+        return data.get('result')
+
+    async def submit_p2p_order(self, order_id, currency_pair, buy_sell, volume, volume_currency, limit_price,
+                               dry=False):
+        """
+        :param order_id: Unique exchange identifier assigned by sender (GUID or UUID), required when not dry run mode,
+                        must not be used when dryRun=true
+        """
+        is_dry_run = self._dryRun or dry
+        params = dict(
+            currencyPair=currency_pair,
+            buySell=str(buy_sell),
+            volume=volume,
+            volumeCurrency=volume_currency,
+            limitPrice=limit_price,
+            dryRun=is_dry_run
+        )
+        if not is_dry_run:
+            params.update(dict(submitId=order_id))
+        if is_dry_run or self._retry_policy is None:
+            data = await self.request('POST', '/api/v2.0.0/market_fx/orders', data=params)
+            return data.get('result')
+
+        submitted_since = _submitted_since()
+        last_error = None
+
+        async def submit(attempt):
+            nonlocal last_error
+            # previous attempt may have placed the order when only its response got lost
+            if attempt and _is_outcome_unknown(last_error):
+                order = await self._find_submitted_order(order_id, submitted_since)
+                if order is not None:
+                    logger.debug(f'Order {order_id} was placed by a failed attempt')
+                    return order
+            try:
+                return (await self._request('POST', '/api/v2.0.0/market_fx/orders', data=params)).get('result')
+            except Exception as e:
+                last_error = e
+                raise
+
+        return await self._retry_policy.call_async(
+            submit, on_retry=lambda _, error: self._on_retry('POST', '/api/v2.0.0/market_fx/orders', error),
+            retry_exceptions=_retry_exceptions())
+
+    async def _find_submitted_order(self, submit_id, submitted_since, item_limit=50):
+        """
+        Looks the submitId up like WalutomatClient._find_submitted_order.
+        :return: dict with orderId and submitId or None when no order was placed
+        """
+        seen = 0
+        async for order in AsyncWalutomatClient.get_p2p_active_orders(self, item_limit):
+            if order.get('submitId') == submit_id:
+                return dict(orderId=order['orderId'], submitId=submit_id)
+            seen += 1
+            if seen >= item_limit:
+                break
+        async for item in AsyncWalutomatClient.get_account_history(self, date_from=submitted_since,
+                                                                   operation_type='MARKET_FX',
+                                                                   item_limit=item_limit):
+            if item.get('submitId') == submit_id:
+                return dict(orderId=item.get('orderId'), submitId=submit_id)
+        return None
+
+    async def cancel_p2p_order(self, order_id):
+        params = dict(
+            order_id=order_id
+        )
+        # retried close can only hit the same order
+        data = await self.request('POST', '/api/v2.0.0/market_fx/orders/close', data=params, idempotent=True)
+        return data.get('result')
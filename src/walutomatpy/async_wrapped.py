@@ -0,0 +1,74 @@
+import asyncio
+import time
+from typing import Dict, List, Tuple
+
+from .models.order import WalutomatOrder
+from .models.account import AccountBalances
+from .orderbook import OrderBook
+from .async_client import AsyncWalutomatClient
+from .conversion import ModelConversion, order_converter, history_converter, OUTPUT_MODEL, OUTPUT_RAW
+
+
+class AsyncWrappedWalutomatClient(ModelConversion, AsyncWalutomatClient):
+    """
+    asyncio counterpart of WrappedWalutomatClient sharing its model conversion and output modes.
+    """
+
+    async def get_account_balances(self) -> AccountBalances:
+        return self._to_balances(await super().get_account_balances())
+
+    async def get_account_history(self, date_from=None, date_to=None, currencies=None, operation_type=None,
+                                  item_limit=200, continue_from=None, sort_order='DESC', *, output=OUTPUT_RAW):
+        """
+        :param output: raw (or model) for API dicts, tuple for values in HISTORY_FIELDS order
+        """
+        convert = history_converter(output)
+        async for item in super().get_account_history(date_from, date_to, currencies, operation_type, item_limit,
+                                                      continue_from, sort_order):
+            yield item if convert is None else convert(item)
+
+    async def get_p2p_best_offers_detailed(self, currency_pair, item_limit=10, *,
+                                           output=OUTPUT_MODEL) -> Tuple[List, List]:
+        """
+        :param output: model for sorted Offer lists, tuple for sorted (price, volume) lists, raw for the API dict
+        """
+        return self._to_offers(await super().get_p2p_best_offers_detailed(currency_pair, item_limit), output)
+
+    async def get_order_book(self, currency_pair, item_limit=10) -> OrderBook:
+        # time the request was sent, not when the book got built
+        fetched_at = time.time()
+        bids, asks = await self.get_p2p_best_offers_detailed(currency_pair, item_limit)
+        return OrderBook(bids, asks, timestamp=fetched_at)
+
+    async def get_market_snapshot(self, currency_pairs, item_limit=10, *, max_concurrency=8) -> Dict[str, OrderBook]:
+        """
+        Fetches order books of all pairs concurrently, at most max_concurrency requests at a time.
+
+        :return: dict of order books keyed by currency pair string, each with its fetch timestamp
+        """
+        currency_pairs = list(currency_pairs)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(pair):
+            async with semaphore:
+                return await self.get_order_book(pair, item_limit)
+
+        books = await asyncio.gather(*(fetch(pair) for pair in currency_pairs))
+        return {str(pair): book for pair, book in zip(currency_pairs, books)}
+
+    async def get_p2p_active_orders(self, item_limit=10, *, output=OUTPUT_MODEL):
+        """
+        :param output: model for WalutomatOrder, raw for API dicts, tuple for values in ORDER_FIELDS order
+        """
+        convert = order_converter(output)
+        async for item in super().get_p2p_active_orders(item_limit):
+            yield item if convert is None else convert(item)
+
+    async def get_p2p_order_by_id(self, order_id) -> List[WalutomatOrder]:
+        return self._to_orders(await super().get_p2p_order_by_id(order_id))
+
+    async def submit_p2p_order(self, order_id, currency_pair, buy_sell, volume, volume_currency, limit_price,
+                               dry=False):
+        result = await super().submit_p2p_order(order_id, currency_pair, buy_sell, volume, volume_currency,
+                                                limit_price, dry)
+        return result['orderId']
@@ -0,0 +1,147 @@
+import threading
+import time
+from typing import List, Tuple
+
+from .wrapped import WrappedWalutomatClient, OUTPUT_MODEL
+
+
+class _Flight:
+    def __init__(self, depth):
+        self.depth = depth
+        self.value = None
+        self.error = None
+        self._done = threading.Event()
+
+    def resolve(self, value=None, error=None):
+        self.value = value
+        self.error = error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class _Entry:
+    def __init__(self, depth, value, fetched_at, exhausted):
+        self.depth = depth
+        self.value = value
+        self.fetched_at = fetched_at
+        # book had fewer levels than requested so any deeper request would return the same snapshot
+        self.exhausted = exhausted
+
+    def covers(self, depth):
+        return depth is None or self.exhausted or (self.depth is not None and self.depth >= depth)
+
+
+class OffersCache:
+    """
+    TTL cache of market data keyed by endpoint, currency pair and depth. A deeper snapshot answers shallower
+    requests and concurrent misses for the same key share a single in-flight fetch (single-flight).
+    """
+
+    def __init__(self, ttl=1.0, *, clock=time.monotonic):
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._flights = {}
+
+    def get(self, endpoint, currency_pair, depth, fetch, is_exhausted=None):
+        """
+        :param fetch: callable(depth) fetching fresh value on cache miss
+        :param is_exhausted: callable(value, depth) telling whether value holds the whole book
+        :return: cached or fetched value, may be deeper than requested
+        """
+        key = (endpoint, str(currency_pair))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() - entry.fetched_at < self._ttl and entry.covers(depth):
+                return entry.value
+            flights = self._flights.setdefault(key, [])
+            for flight in flights:
+                if depth is None or flight.depth >= depth:
+                    break
+            else:
+                flight = None
+            if flight is not None:
+                leader = False
+            else:
+                leader = True
+                flight = _Flight(depth)
+                flights.append(flight)
+        if not leader:
+            return flight.wait()
+
+        try:
+            value = fetch(depth)
+        except Exception as e:
+            with self._lock:
+                self._remove_flight(key, flight)
+            flight.resolve(error=e)
+            raise
+        exhausted = bool(is_exhausted and is_exhausted(value, depth))
+        with self._lock:
+            now = self._clock()
+            current = self._entries.get(key)
+            if current is None or now - current.fetched_at >= self._ttl or not current.covers(depth) or \
+                    current.depth == depth:
+                self._entries[key] = _Entry(depth, value, now, exhausted)
+            self._remove_flight(key, flight)
+        flight.resolve(value)
+        return value
+
+    def _remove_flight(self, key, flight):
+        flights = self._flights.get(key, [])
+        flights.remove(flight)
+        if not flights:
+            del self._flights[key]
+
+    def invalidate(self, currency_pair=None):
+        with self._lock:
+            if currency_pair is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[1] == str(currency_pair)]:
+                    del self._entries[key]
+
+
+def _is_book_exhausted(book, depth):
+    bids, asks, _ = book
+    return len(bids) < depth and len(asks) < depth
+
+
+class CachedWalutomatClient(WrappedWalutomatClient):
+    """
+    WrappedWalutomatClient which caches best_offers and best_offers/detailed responses for offers_ttl seconds.
+    Offer objects are shared between callers of the same snapshot and must not be modified. Order books built from
+    a cached snapshot carry the time it was fetched.
+    """
+
+    def __init__(self, *args, offers_ttl=1.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.offers_cache = OffersCache(offers_ttl)
+
+    def get_p2p_best_offers(self, currency_pair):
+        def fetch(_):
+            return super(CachedWalutomatClient, self).get_p2p_best_offers(currency_pair)
+
+        return self.offers_cache.get('best_offers', currency_pair, None, fetch)
+
+    def get_p2p_best_offers_detailed(self, currency_pair, item_limit=10, *, output=OUTPUT_MODEL) -> Tuple[List, List]:
+        if output != OUTPUT_MODEL:
+            return super().get_p2p_best_offers_detailed(currency_pair, item_limit, output=output)
+        bids, asks, _ = self._get_timestamped_offers(currency_pair, item_limit)
+        return bids, asks
+
+    def _get_timestamped_offers(self, currency_pair, item_limit):
+        def fetch(depth):
+            fetched_at = time.time()
+            bids, asks = super(CachedWalutomatClient, self).get_p2p_best_offers_detailed(currency_pair, depth)
+            return bids, asks, fetched_at
+
+        bids, asks, fetched_at = self.offers_cache.get('best_offers/detailed', currency_pair, item_limit, fetch,
+                                                       _is_book_exhausted)
+        return bids[:item_limit], asks[:item_limit], fetched_at
@@ -1,115 +1,263 @@
-from datetime import datetime
-import base64
+import threading
 import urllib.parse
+import weakref
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from urllib.parse import urljoin, urlsplit
 from pprint import pformat
+from time import perf_counter
 
 import requests
-from OpenSSL import crypto
 
 from .logger import logger
+from .exceptions import WalutomatApiException
+from .signing import SignatureTimestamp, CryptographySigner
+from .decoding import get_json_decoder
+from .instrumentation import PHASE_QUEUE, PHASE_SIGN, PHASE_TTFB, PHASE_TRANSFER, PHASE_DECODE, PHASE_TOTAL
 
 
-class WalutomatApiException(Exception):
-    def __init__(self, request, error_response):
-        self._request = request
-        self._errors = error_response.get('errors')
+def _submitted_since() -> str:
+    """
+    :return: dateFrom of history items which may belong to an order submitted now, with a margin for the clock skew
+             between this host and the API
+    """
+    return f'{datetime.now(timezone.utc) - timedelta(minutes=1):%Y-%m-%dT%H:%M:%SZ}'
 
-    def _parse_errors(self, error):
-        key, desc, data = error.get('key'), error.get('description'), error.get('errorData')
-        return key, desc, data
 
-    @property
-    def short_str(self):
-        s = ''
-        for error in self._errors:
-            key, desc, data = self._parse_errors(error)
-            s = f'{key}: {desc}'
-        return s
-
-    def __str__(self):
-        s = f'{self._request.method} {self._request.url}\n{self._request.body}'
-        s += '--- HEADERS ---'
-        for header, value in self._request.headers.items():
-            s += f'{header}: {value}\n'
-        s += '--- ERRORS ---'
-        for error in self._errors:
-            key, desc, data = self._parse_errors(error)
-            s += f'{key}: {desc}'
-            if data:
-                s += f'\n{data}'
-        return s
-
-    def __repr__(self):
-        return f'<WalutomatApiException: {self.short_str} @ {self._request.url}>\n\nRequest: {self._request}'
-
-
-class WalutomatClient:
-
-    def __init__(self, api_key, private_key, *, max_retry=0, base_url='api.walutomat.pl', dryRun=False):
+def _is_outcome_unknown(error) -> bool:
+    # API errors below 500 are rejections, anything else may have been raised after the order got placed
+    return not (isinstance(error, WalutomatApiException) and error.status_code is not None
+                and error.status_code < 500)
+
+
+class BaseWalutomatClient:
+    """
+    Transport-agnostic part of the client: credentials, configuration and request signing. Shared by the blocking
+    WalutomatClient and the asyncio based AsyncWalutomatClient.
+    """
+
+    def __init__(self, api_key, private_key, *, max_retry=0, base_url='api.walutomat.pl', dryRun=False, signer=None,
+                 rate_limiter=None, json_decoder='auto', instrumentation=None, retry_policy=None):
+        """
+        :param signer: walutomatpy.signing.Signer instance, CryptographySigner over private_key is used by default
+        :param rate_limiter: walutomatpy.ratelimit.RateLimiter shared by all requests, blocking client only
+        :param json_decoder: orjson, msgspec, stdlib or auto to use the fastest installed one
+        :param instrumentation: walutomatpy.instrumentation.Instrumentation receiving per endpoint latencies by phase,
+                                page, retry and error counts
+        :param retry_policy: walutomatpy.retry.RetryPolicy for GET requests, order submission and cancellation
+        """
         self._api_key = api_key
         self._raw_private_key = private_key
         self._base_url = base_url
+        # base_url may carry its own scheme, e.g. http://127.0.0.1:8080 of a local simulator
+        self._url_prefix = base_url.rstrip('/') if '://' in base_url else f'https://{base_url}'
         self._private_key = None
+        self._signer = signer
+        self._timestamp = SignatureTimestamp()
+        self._rate_limiter = rate_limiter
+        self._decode = get_json_decoder(json_decoder)
+        self._instrumentation = instrumentation
+        self._retry_policy = retry_policy
         self._session = None
+        # guards lazy initialization of the key, signer and sessions shared between threads
+        self._init_lock = threading.RLock()
         self._dryRun = dryRun
         self._max_retry = max_retry
         logger.debug(f'Dry run mode: {self._dryRun}')
         logger.debug(f'Max retries: {self._max_retry}')
 
-    @property
-    def session(self):
-        if self._session is None:
-            self._session = requests.Session()
-            if self._max_retry > 0:
-                adapter = requests.adapters.HTTPAdapter(max_retries=self._max_retry)
-                self._session.mount('http://', adapter)
-                self._session.mount('https://', adapter)
-            self._session.headers.update({
-                'X-API-Key': self._api_key,
-                'Content-Type': 'application/x-www-form-urlencoded'
-            })
-        return self._session
-
     @property
     def private_key(self):
         if self._private_key is None:
-            self._private_key = crypto.load_privatekey(crypto.FILETYPE_PEM, self._raw_private_key)
+            from OpenSSL import crypto
+
+            with self._init_lock:
+                if self._private_key is None:
+                    self._private_key = crypto.load_privatekey(crypto.FILETYPE_PEM, self._raw_private_key)
         return self._private_key
 
+    @property
+    def signer(self):
+        if self._signer is None:
+            with self._init_lock:
+                if self._signer is None:
+                    self._signer = CryptographySigner(self._raw_private_key)
+        return self._signer
+
+    def path_url(self, url):
+        """
+        Path with query string of a request URL, fast path for URLs built from base_url
+        """
+        if url.startswith(self._url_prefix):
+            return url[len(self._url_prefix):] or '/'
+        parsed_url = urlsplit(url)
+        if parsed_url.query:
+            return f'{parsed_url.path}?{parsed_url.query}'
+        return parsed_url.path
+
     def get_signature(self, uri, timestamp, body=None):
-        parsed_url = urlsplit(uri)
-        if body is not None:
-            data_to_sign = f'{timestamp}{parsed_url.path}{body}'
-        else:
-            data_to_sign = f'{timestamp}{parsed_url.path}'
-            if parsed_url.query:
-                data_to_sign += f'?{parsed_url.query}'
-        signature = crypto.sign(self.private_key, data_to_sign, 'sha256')
-        signature_base64 = base64.b64encode(signature)
-        return signature_base64
+        return self.signer.sign_request(timestamp, self.path_url(uri), body)
+
+    def _observe(self, method, endpoint_uri, phase, seconds):
+        if self._instrumentation is not None:
+            self._instrumentation.observe(method, endpoint_uri.partition('?')[0], phase, seconds)
+
+    def _count(self, method, endpoint_uri, name, value=1):
+        if self._instrumentation is not None:
+            self._instrumentation.count(method, endpoint_uri.partition('?')[0], name, value)
+
+    def _count_page(self, method, endpoint_uri, items):
+        if self._instrumentation is not None:
+            self._count(method, endpoint_uri, 'pages')
+            self._count(method, endpoint_uri, 'items', len(items))
+
+    def _count_errors(self, method, endpoint_uri, errors):
+        if self._instrumentation is not None:
+            for error in errors or ():
+                self._count(method, endpoint_uri, f'error:{error.get("key")}')
+
+    def _on_retry(self, method, endpoint_uri, error):
+        logger.debug(f'Retrying {method} {endpoint_uri} after {error!r}')
+        self._count(method, endpoint_uri, 'retries')
+
+
+class WalutomatClient(BaseWalutomatClient):
+    """
+    Blocking client over requests. It is safe to share between threads: the key, signer and session are created
+    once under a lock. Threads share one session whose connection pool keeps up to pool_maxsize connections per host,
+    size it to the number of worker threads. With session_per_thread each thread gets its own session and pool while
+    the signer stays shared.
+
+        client = WalutomatClient(api_key, private_key, pool_maxsize=32, session_per_thread=True)
+    """
+
+    def __init__(self, api_key, private_key, *, pool_connections=10, pool_maxsize=10, session_per_thread=False,
+                 session=None, **kwargs):
+        """
+        :param pool_connections: number of hosts to keep connection pools for
+        :param pool_maxsize: connections kept per host, requests over the limit open throwaway connections
+        :param session_per_thread: give every thread its own requests.Session
+        :param session: requests.Session shared with other clients, API key is then sent with every request
+        """
+        super().__init__(api_key, private_key, **kwargs)
+        self._session = session
+        self._shared_session = session is not None
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._session_per_thread = session_per_thread
+        self._local = threading.local()
+        # held weakly, sessions of finished threads must not pile up in long running processes
+        self._sessions = weakref.WeakSet()
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self._pool_connections,
+                                                pool_maxsize=self._pool_maxsize, max_retries=self._max_retry)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({
+            'X-API-Key': self._api_key,
+            'Content-Type': 'application/x-www-form-urlencoded'
+        })
+        with self._init_lock:
+            self._sessions.add(session)
+        return session
+
+    @property
+    def session(self):
+        if self._session_per_thread and not self._shared_session:
+            session = getattr(self._local, 'session', None)
+            if session is None:
+                session = self._local.session = self._create_session()
+                # closes pooled connections once the thread is gone
+                weakref.finalize(threading.current_thread(), session.close)
+            return session
+        if self._session is None:
+            with self._init_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def close(self):
+        """
+        Closes sessions created by the client, a shared session is left to its owner.
+        """
+        with self._init_lock:
+            sessions, self._sessions = list(self._sessions), weakref.WeakSet()
+            if not self._shared_session:
+                self._session = None
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
 
     def request(self, method, endpoint_uri, headers=None, files=None, data=None,
-                params=None, auth=None, cookies=None, hooks=None, json=None, **kwargs):
+                params=None, auth=None, cookies=None, hooks=None, json=None, *, idempotent=None, **kwargs):
+        """
+        :param idempotent: whether the request may be retried by the retry policy, GET requests are by default
+        """
+        policy = self._retry_policy
+        if policy is None or not (method == 'GET' if idempotent is None else idempotent):
+            return self._request(method, endpoint_uri, headers, files, data, params, auth, cookies, hooks, json,
+                                 **kwargs)
+
+        def attempt(_):
+            return self._request(method, endpoint_uri, headers, files, data, params, auth, cookies, hooks, json,
+                                 **kwargs)
+
+        return policy.call(attempt, on_retry=lambda _, error: self._on_retry(method, endpoint_uri, error))
+
+    def _request(self, method, endpoint_uri, headers=None, files=None, data=None,
+                 params=None, auth=None, cookies=None, hooks=None, json=None, **kwargs):
         kwargs.setdefault('timeout', (3.05, 10))
-        url = urljoin(f'https://{self._base_url}', endpoint_uri)
+        started = perf_counter()
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(method, endpoint_uri)
+        queued = perf_counter()
+        url = urljoin(self._url_prefix, endpoint_uri)
         req = requests.Request(method, url, headers, files, data, params, auth, cookies, hooks, json)
         prepped = self.session.prepare_request(req)
-        timestamp = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+        timestamp = self._timestamp()
         signature_base64 = self.get_signature(prepped.url, timestamp, prepped.body)
         _headers = {
             'X-API-Signature': signature_base64,
             'X-API-Timestamp': timestamp,
         }
+        if self._shared_session:
+            _headers['X-API-Key'] = self._api_key
         headers = headers or {}
         headers.update(_headers)
         prepped.headers.update(headers)
-        resp = self.session.send(prepped, **kwargs)
-        json = resp.json()
+        signed = perf_counter()
+        try:
+            resp = self.session.send(prepped, **kwargs)
+        except requests.RequestException as e:
+            self._count(method, endpoint_uri, f'error:{type(e).__name__}')
+            raise
+        received = perf_counter()
+        json = self._decode(resp.content)
+        if self._instrumentation is not None:
+            self._record_request(method, endpoint_uri, resp, started, queued, signed, received)
         if json['success']:
             return json
         if json.get('errors'):
-            raise WalutomatApiException(resp.request, json)
+            self._count_errors(method, endpoint_uri, json['errors'])
+            raise WalutomatApiException(resp.request, json, resp.status_code)
+
+    def _record_request(self, method, endpoint_uri, resp, started, queued, signed, received):
+        decoded = perf_counter()
+        self._count(method, endpoint_uri, 'requests')
+        if self._rate_limiter is not None:
+            self._observe(method, endpoint_uri, PHASE_QUEUE, queued - started)
+        self._observe(method, endpoint_uri, PHASE_SIGN, signed - queued)
+        if resp.elapsed:
+            # requests measures elapsed until response headers are parsed
+            self._observe(method, endpoint_uri, PHASE_TTFB, resp.elapsed.total_seconds())
+        self._observe(method, endpoint_uri, PHASE_TRANSFER, received - signed)
+        self._observe(method, endpoint_uri, PHASE_DECODE, decoded - received)
+        self._observe(method, endpoint_uri, PHASE_TOTAL, decoded - started)
+        retries = getattr(getattr(resp, 'raw', None), 'retries', None)
+        if retries is not None and retries.history:
+            self._count(method, endpoint_uri, 'retries', len(retries.history))
 
     def get_account_balances(self):
         data = self.request('GET', '/api/v2.0.0/account/balances')
@@ -124,12 +272,12 @@ class WalutomatClient:
             operationType=operation_type,
             itemLimit=item_limit,
             continueFrom=continue_from,
-            sort_order=sort_order
+            sortOrder=sort_order
         )
         while True:
-            resp = self.request('GET', '/api/v2.0.0/account/history', params=params)
-            json = resp.json()
-            items = json.get('result', [])
+            data = self.request('GET', '/api/v2.0.0/account/history', params=params)
+            items = data.get('result', [])
+            self._count_page('GET', '/api/v2.0.0/account/history', items)
             for item in items:
                 yield item
             if len(items) != item_limit:
@@ -160,6 +308,7 @@ class WalutomatClient:
         while True:
             data = self.request('GET', '/api/v2.0.0/market_fx/orders/active', params=params)
             items = data.get('result', [])
+            self._count_page('GET', '/api/v2.0.0/market_fx/orders/active', items)
             for item in items:
                 yield item
             if len(items) != item_limit:
@@ -190,13 +339,50 @@ class WalutomatClient:
         )
         if not is_dry_run:
             params.update(dict(submitId=order_id))
+        if is_dry_run or self._retry_policy is None:
+            data = self.request('POST', '/api/v2.0.0/market_fx/orders', data=params)
+            return data.get('result')
 
-        data = self.request('POST', '/api/v2.0.0/market_fx/orders', data=params)
-        return data.get('result')
+        submitted_since = _submitted_since()
+        last_error = None
+
+        def submit(attempt):
+            nonlocal last_error
+            # previous attempt may have placed the order when only its response got lost
+            if attempt and _is_outcome_unknown(last_error):
+                order = self._find_submitted_order(order_id, submitted_since)
+                if order is not None:
+                    logger.debug(f'Order {order_id} was placed by a failed attempt')
+                    return order
+            try:
+                return self._request('POST', '/api/v2.0.0/market_fx/orders', data=params).get('result')
+            except Exception as e:
+                last_error = e
+                raise
+
+        return self._retry_policy.call(
+            submit, on_retry=lambda _, error: self._on_retry('POST', '/api/v2.0.0/market_fx/orders', error))
+
+    def _find_submitted_order(self, submit_id, submitted_since, item_limit=50):
+        """
+        Looks the submitId up among the newest active orders and, for orders which already left the active list,
+        among MARKET_FX history items since submitted_since (dateFrom string).
+        :return: dict with orderId and submitId or None when no order was placed
+        """
+        for order in islice(WalutomatClient.get_p2p_active_orders(self, item_limit), item_limit):
+            if order.get('submitId') == submit_id:
+                return dict(orderId=order['orderId'], submitId=submit_id)
+        history = WalutomatClient.get_account_history(self, date_from=submitted_since, operation_type='MARKET_FX',
+                                                      item_limit=item_limit)
+        for item in history:
+            if item.get('submitId') == submit_id:
+                return dict(orderId=item.get('orderId'), submitId=submit_id)
+        return None
 
     def cancel_p2p_order(self, order_id):
         params = dict(
             order_id=order_id
         )
-        data = self.request('POST', '/api/v2.0.0/market_fx/orders/close', data=params)
+        # retried close can only hit the same order
+        data = self.request('POST', '/api/v2.0.0/market_fx/orders/close', data=params, idempotent=True)
         return data.get('result')
@@ -0,0 +1,85 @@
+import time
+from typing import List
+
+from .models.enums import Offer
+from .models.order import WalutomatOrder, ORDER_FIELDS
+from .models.account import AccountBalances
+from .instrumentation import PHASE_PARSE
+
+# output modes of bulk endpoints: models, raw API dicts or plain tuples of raw values in *_FIELDS order
+OUTPUT_MODEL = 'model'
+OUTPUT_RAW = 'raw'
+OUTPUT_TUPLE = 'tuple'
+
+HISTORY_FIELDS = ('historyItemId', 'transactionId', 'ts', 'operationAmount', 'balanceAfter', 'currency',
+                  'operationType', 'operationDetailedType')
+
+
+def _offer_tuples(offers, reverse):
+    return sorted(((float(offer['price']), float(offer['volume'])) for offer in offers), reverse=reverse)
+
+
+def _tuple_converter(field_names):
+    def convert(item):
+        return tuple(item.get(field_name) for field_name in field_names)
+
+    return convert
+
+
+def _order_model(item):
+    return WalutomatOrder(**item)
+
+
+def order_converter(output=OUTPUT_MODEL):
+    """
+    :return: callable converting a raw order for the output mode, None for raw output
+    """
+    if output == OUTPUT_RAW:
+        return None
+    if output == OUTPUT_TUPLE:
+        return _tuple_converter(ORDER_FIELDS)
+    return _order_model
+
+
+def history_converter(output=OUTPUT_RAW):
+    """
+    :return: callable converting a raw history item for the output mode, None for raw (or model) output
+    """
+    if output == OUTPUT_TUPLE:
+        return _tuple_converter(HISTORY_FIELDS)
+    return None
+
+
+class ModelConversion:
+    """
+    Conversion of API results to models shared by WrappedWalutomatClient and AsyncWrappedWalutomatClient, model
+    construction is reported to instrumentation as the parse phase.
+    """
+
+    def _to_balances(self, result) -> AccountBalances:
+        started = time.perf_counter()
+        balances = AccountBalances(result)
+        self._observe('GET', '/api/v2.0.0/account/balances', PHASE_PARSE, time.perf_counter() - started)
+        return balances
+
+    def _to_offers(self, result, output=OUTPUT_MODEL):
+        """
+        :param output: model for sorted Offer lists, tuple for sorted (price, volume) lists, raw for the API dict
+        """
+        if output == OUTPUT_RAW:
+            return result
+        if output == OUTPUT_TUPLE:
+            return _offer_tuples(result.get('bids', []), True), _offer_tuples(result.get('asks', []), False)
+        started = time.perf_counter()
+        bids = (Offer(offer['price'], offer['volume']) for offer in result.get('bids', []))
+        sorted_bids = sorted(bids, key=lambda o: o.price_units, reverse=True)
+        asks = (Offer(offer['price'], offer['volume']) for offer in result.get('asks', []))
+        sorted_asks = sorted(asks, key=lambda o: o.price_units)
+        self._observe('GET', '/api/v2.0.0/market_fx/best_offers/detailed', PHASE_PARSE, time.perf_counter() - started)
+        return sorted_bids, sorted_asks
+
+    def _to_orders(self, result) -> List[WalutomatOrder]:
+        started = time.perf_counter()
+        orders = list(WalutomatOrder(**raw_order) for raw_order in result)
+        self._observe('GET', '/api/v2.0.0/market_fx/orders', PHASE_PARSE, time.perf_counter() - started)
+        return orders
@@ -0,0 +1,36 @@
+import json
+
+
+def _orjson_decoder():
+    import orjson
+    return orjson.loads
+
+
+def _msgspec_decoder():
+    import msgspec
+    return msgspec.json.Decoder().decode
+
+
+def _stdlib_decoder():
+    return json.loads
+
+
+JSON_DECODERS = {
+    'orjson': _orjson_decoder,
+    'msgspec': _msgspec_decoder,
+    'stdlib': _stdlib_decoder,
+}
+
+
+def get_json_decoder(name='auto'):
+    """
+    :param name: orjson, msgspec, stdlib or auto which picks the first installed one in that order
+    :return: callable decoding JSON document from bytes
+    """
+    if name != 'auto':
+        return JSON_DECODERS[name]()
+    for factory in JSON_DECODERS.values():
+        try:
+            return factory()
+        except ImportError:
+            continue
@@ -15,3 +15,42 @@ class MissingVolume(WalutomatException):
 
     def __float__(self):
         return float(self.missing)
+
+
+class WalutomatApiException(WalutomatException):
+    def __init__(self, request, error_response, status_code=None):
+        self._request = request
+        self._errors = error_response.get('errors')
+        self.status_code = status_code
+
+    @property
+    def keys(self):
+        return [error.get('key') for error in self._errors or ()]
+
+    def _parse_errors(self, error):
+        key, desc, data = error.get('key'), error.get('description'), error.get('errorData')
+        return key, desc, data
+
+    @property
+    def short_str(self):
+        s = ''
+        for error in self._errors:
+            key, desc, data = self._parse_errors(error)
+            s = f'{key}: {desc}'
+        return s
+
+    def __str__(self):
+        s = f'{self._request.method} {self._request.url}\n{self._request.body}'
+        s += '--- HEADERS ---'
+        for header, value in self._request.headers.items():
+            s += f'{header}: {value}\n'
+        s += '--- ERRORS ---'
+        for error in self._errors:
+            key, desc, data = self._parse_errors(error)
+            s += f'{key}: {desc}'
+            if data:
+                s += f'\n{data}'
+        return s
+
+    def __repr__(self):
+        return f'<WalutomatApiException: {self.short_str} @ {self._request.url}>\n\nRequest: {self._request}'
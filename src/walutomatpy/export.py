@@ -0,0 +1,97 @@
+import json
+import os
+
+from .logger import logger
+
+
+class HistoryExporter:
+    """
+    Streams account history into an append-only NDJSON file, one history item per line, in ascending order.
+
+    Items are written in batches and after every batch a checkpoint with the last historyItemId and the file size is
+    saved next to the export. A restarted export truncates anything written after the last checkpoint and continues
+    from its cursor, re-running a finished export fetches only new items. Memory use doesn't depend on the history
+    length.
+
+        exporter = HistoryExporter(client, 'history.ndjson', currencies='EUR')
+        exporter.export()
+    """
+
+    def __init__(self, client, path, *, checkpoint_path=None, batch_size=500, item_limit=200, **history_filters):
+        """
+        :param client: WalutomatClient
+        :param history_filters: date_from, date_to, currencies and operation_type passed to get_account_history
+        """
+        self._client = client
+        self._path = path
+        self._checkpoint_path = checkpoint_path or f'{path}.checkpoint'
+        self._batch_size = batch_size
+        self._item_limit = item_limit
+        self._history_filters = history_filters
+
+    def load_checkpoint(self):
+        try:
+            with open(self._checkpoint_path, 'r') as fp:
+                return json.load(fp)
+        except FileNotFoundError:
+            return dict(continueFrom=None, offset=0, count=0)
+
+    def _save_checkpoint(self, checkpoint):
+        tmp_path = f'{self._checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as fp:
+            json.dump(checkpoint, fp)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, self._checkpoint_path)
+
+    def export(self) -> int:
+        """
+        :return: number of items written by this run
+        :raises FileExistsError: when the export file is not empty and has no checkpoint
+        """
+        has_checkpoint = os.path.exists(self._checkpoint_path)
+        if not has_checkpoint and os.path.exists(self._path) and os.path.getsize(self._path):
+            raise FileExistsError(f'{self._path} is not empty and has no checkpoint {self._checkpoint_path}, '
+                                  f'refusing to overwrite it')
+        checkpoint = self.load_checkpoint()
+        written = 0
+        mode = 'r+b' if os.path.exists(self._path) else 'wb'
+        with open(self._path, mode) as fp:
+            if not has_checkpoint:
+                # a file written before its first checkpoint is ours to truncate on resume
+                self._save_checkpoint(checkpoint)
+            # drop items written after the last checkpoint, they will be fetched again
+            fp.truncate(checkpoint['offset'])
+            fp.seek(checkpoint['offset'])
+            if checkpoint['continueFrom'] is not None:
+                logger.debug(f'Resuming history export from {checkpoint["continueFrom"]}')
+            items = self._client.get_account_history(item_limit=self._item_limit,
+                                                     continue_from=checkpoint['continueFrom'], sort_order='ASC',
+                                                     **self._history_filters)
+            batch = []
+            for item in items:
+                batch.append(item)
+                if len(batch) >= self._batch_size:
+                    written += self._write_batch(fp, batch, checkpoint)
+                    batch = []
+            if batch:
+                written += self._write_batch(fp, batch, checkpoint)
+        return written
+
+    def _write_batch(self, fp, batch, checkpoint):
+        fp.write(b''.join(json.dumps(item, separators=(',', ':')).encode() + b'\n' for item in batch))
+        fp.flush()
+        os.fsync(fp.fileno())
+        checkpoint.update(continueFrom=batch[-1]['historyItemId'], offset=fp.tell(),
+                          count=checkpoint['count'] + len(batch))
+        self._save_checkpoint(checkpoint)
+        return len(batch)
+
+
+def read_history(path):
+    """
+    Iterates over history items of an NDJSON export.
+    """
+    with open(path, 'rb') as fp:
+        for line in fp:
+            yield json.loads(line)
@@ -0,0 +1,118 @@
+import bisect
+import threading
+from typing import Dict, Tuple
+
+# request phases reported by the clients, in seconds
+PHASE_QUEUE = 'queue'  # waiting for the rate limiter
+PHASE_SIGN = 'sign'
+PHASE_TTFB = 'ttfb'  # from sending the request until response headers were parsed
+PHASE_TRANSFER = 'transfer'  # send and read of the whole response
+PHASE_DECODE = 'decode'
+PHASE_PARSE = 'parse'  # model construction in wrapped clients
+PHASE_TOTAL = 'total'
+
+# upper bounds in seconds, the last bucket is unbounded
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Instrumentation:
+    """
+    Metrics sink called by the clients, this base class ignores everything. Subclasses may forward to statsd,
+    Prometheus and the like, callbacks run on the request path so they should not block.
+
+    Latencies are observed per (method, endpoint path, phase), counters per (method, endpoint path, name) with
+    names: requests, pages, items, retries and error:<API error key>.
+    """
+
+    def observe(self, method, endpoint, phase, seconds):
+        pass
+
+    def count(self, method, endpoint, name, value=1):
+        pass
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def percentile(self, q) -> float:
+        """
+        :return: upper bound of the bucket holding q-th percentile, max for the unbounded bucket
+        """
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return self.max
+
+    def to_dict(self):
+        return dict(count=self.count, sum=self.sum, mean=self.mean, max=self.max, p50=self.percentile(50),
+                    p99=self.percentile(99), buckets=dict(zip(self.buckets + ('inf',), self.counts)))
+
+    def __repr__(self):
+        return f'<Histogram count={self.count} mean={self.mean * 1000:.3f}ms max={self.max * 1000:.3f}ms>'
+
+
+class MetricsRecorder(Instrumentation):
+    """
+    Instrumentation keeping latency histograms and counters in memory, cheap enough to leave on in production.
+
+        metrics = MetricsRecorder()
+        client = WrappedWalutomatClient(api_key, private_key, instrumentation=metrics)
+        ...
+        print(metrics.snapshot())
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, str, str], Histogram] = {}
+        self.counters: Dict[Tuple[str, str, str], int] = {}
+
+    def observe(self, method, endpoint, phase, seconds):
+        key = (method, endpoint, phase)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self._buckets)
+            histogram.add(seconds)
+
+    def count(self, method, endpoint, name, value=1):
+        key = (method, endpoint, name)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self) -> Dict[str, dict]:
+        """
+        :return: metrics keyed by 'METHOD endpoint' with latencies by phase and counters
+        """
+        with self._lock:
+            result = {}
+            for (method, endpoint, phase), histogram in self.histograms.items():
+                result.setdefault(f'{method} {endpoint}', dict(latency={}, counters={}))['latency'][phase] = \
+                    histogram.to_dict()
+            for (method, endpoint, name), value in self.counters.items():
+                result.setdefault(f'{method} {endpoint}', dict(latency={}, counters={}))['counters'][name] = value
+            return result
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
@@ -0,0 +1,193 @@
+import copy
+import threading
+import time
+from decimal import Decimal
+
+from .logger import logger
+from .models.account import AccountBalances, AccountCurrencyBalance
+from .models.enums import OrderTypeEnum, OrderStatusEnum, OrderCurrencyPair, OrderCurrencyEnum
+from .models.order import WalutomatOrder
+
+
+def get_sold_amount(buy_sell: OrderTypeEnum, currency_pair: OrderCurrencyPair, volume, volume_currency,
+                    limit_price):
+    """
+    :return: tuple of currency and amount which the order may sell at most
+    """
+    volume = Decimal(volume)
+    limit_price = Decimal(limit_price)
+    volume_currency = OrderCurrencyEnum(str(volume_currency))
+    if buy_sell == OrderTypeEnum.SELL:
+        sold_currency = currency_pair.base
+        amount = volume if volume_currency == sold_currency else volume / limit_price
+    else:
+        sold_currency = currency_pair.counter
+        amount = volume if volume_currency == sold_currency else volume * limit_price
+    return sold_currency, amount
+
+
+class _Reservation:
+    def __init__(self, currency, amount):
+        self.currency = currency
+        self.amount = amount
+        self.remaining = amount
+        self.sold = Decimal(0)
+        self.bought = Decimal(0)
+        self.commission = Decimal(0)
+
+    def rebase(self, order: WalutomatOrder):
+        """
+        Takes fills seen by the order so far as already applied, e.g. after balances were synced.
+        """
+        self.sold = Decimal(getattr(order, 'soldAmount', None) or 0)
+        self.bought = Decimal(getattr(order, 'boughtAmount', None) or 0)
+        self.commission = Decimal(getattr(order, 'commissionAmount', None) or 0)
+        self.remaining = max(self.amount - self.sold, Decimal(0))
+
+
+class BalanceLedger:
+    """
+    Account balances synced from the API and then maintained locally: submitted orders reserve the amount they may
+    sell, fills seen on order updates move reserved funds out and credit bought currency (boughtAmount less
+    commission charged in the same currency), closing an order releases what's left of its reservation.
+
+    Balances are synced again every resync_interval seconds, after invalidate() or when local state becomes
+    inconsistent (negative available balance).
+
+        ledger = BalanceLedger(client)
+        trader = WalutomatTrader(client, ledger=ledger)
+    """
+
+    def __init__(self, client, *, resync_interval=60.0, clock=time.monotonic):
+        """
+        :param client: WrappedWalutomatClient
+        """
+        self._client = client
+        self._resync_interval = resync_interval
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._balances = None
+        self._synced_at = None
+        self._reservations = {}
+
+    def sync(self) -> AccountBalances:
+        """
+        Replaces balances with an API snapshot. Fills already included in it must not be applied again, so every
+        reservation is rebased on the current state of its order, reservations of orders no longer active are
+        dropped as the snapshot already reflects them. Reservations made while the snapshot was fetched may be
+        missing from it and are applied to it again.
+        :return: copy of the synced balances
+        """
+        with self._lock:
+            known = set(self._reservations)
+        balances = self._client.get_account_balances()
+        active = {}
+        if known:
+            # listed after the balances: a fill in between is missed rather than counted twice, which understates
+            # available balance instead of inflating it
+            active = {order.orderId: order for order in self._client.get_p2p_active_orders(item_limit=50)}
+        with self._lock:
+            self._balances = balances
+            for order_id, reservation in list(self._reservations.items()):
+                if order_id not in known:
+                    # reserved on the previous balances which the snapshot replaced
+                    balance = self._balance(reservation.currency)
+                    balance.available -= reservation.remaining
+                    balance.reserved += reservation.remaining
+                    continue
+                order = active.get(order_id)
+                if order is None:
+                    del self._reservations[order_id]
+                else:
+                    reservation.rebase(order)
+            self._synced_at = self._clock()
+            return copy.deepcopy(balances)
+
+    def invalidate(self):
+        with self._lock:
+            self._synced_at = None
+
+    @property
+    def is_stale(self):
+        return self._synced_at is None or self._clock() - self._synced_at >= self._resync_interval
+
+    def get_balances(self) -> AccountBalances:
+        """
+        :return: copy of the local balances, synced first when stale
+        """
+        with self._lock:
+            if not self.is_stale:
+                return copy.deepcopy(self._balances)
+        return self.sync()
+
+    def __getitem__(self, currency) -> AccountCurrencyBalance:
+        return self.get_balances()[currency]
+
+    def _balance(self, currency) -> AccountCurrencyBalance:
+        if currency not in self._balances:
+            self._balances[currency] = AccountCurrencyBalance(currency, 0, 0, 0)
+        return self._balances[currency]
+
+    def reserve(self, order_id, currency, amount):
+        """
+        Moves amount of currency from available to reserved for a submitted order. Before the first sync only the
+        reservation is recorded, the first snapshot already includes the order.
+        """
+        with self._lock:
+            if self._balances is None:
+                self._reservations[str(order_id)] = _Reservation(currency, amount)
+                return
+            balance = self._balance(currency)
+            balance.available -= amount
+            balance.reserved += amount
+            self._reservations[str(order_id)] = _Reservation(currency, amount)
+            self._check(balance)
+
+    def apply_order(self, order: WalutomatOrder):
+        """
+        Applies fills since the previous update of a reserved order, can be registered as OrderWatcher listener.
+        """
+        with self._lock:
+            reservation = self._reservations.get(order.orderId)
+            if reservation is None or self._balances is None:
+                return
+            sold = Decimal(getattr(order, 'soldAmount', None) or 0)
+            bought = Decimal(getattr(order, 'boughtAmount', None) or 0)
+            commission = Decimal(getattr(order, 'commissionAmount', None) or 0)
+            sold_delta = sold - reservation.sold
+            if sold_delta:
+                balance = self._balance(reservation.currency)
+                balance.total -= sold_delta
+                balance.reserved -= min(sold_delta, reservation.remaining)
+                reservation.remaining = max(reservation.remaining - sold_delta, Decimal(0))
+                self._check(balance)
+            bought_delta = bought - reservation.bought
+            commission_delta = commission - reservation.commission
+            bought_currency = getattr(order, 'boughtCurrency', None)
+            if bought_currency is not None and (bought_delta or commission_delta):
+                credited = bought_delta
+                if getattr(order, 'commissionCurrency', None) == bought_currency:
+                    credited -= commission_delta
+                balance = self._balance(bought_currency)
+                balance.total += credited
+                balance.available += credited
+            reservation.sold, reservation.bought, reservation.commission = sold, bought, commission
+            if order.status == OrderStatusEnum.CLOSED or order.is_executed():
+                self.release(order.orderId)
+
+    def release(self, order_id):
+        """
+        Returns what's left of the order reservation to available balance, e.g. on cancel.
+        """
+        with self._lock:
+            reservation = self._reservations.pop(str(order_id), None)
+            if reservation is None or self._balances is None:
+                return
+            balance = self._balance(reservation.currency)
+            balance.reserved -= reservation.remaining
+            balance.available += reservation.remaining
+
+    def _check(self, balance: AccountCurrencyBalance):
+        if balance.available < 0 or balance.reserved < 0:
+            logger.warning(f'Local balance mismatch, resyncing: {balance}')
+            self.invalidate()
@@ -38,3 +38,12 @@ class AccountBalances:
 
     def __getitem__(self, item):
         return self._balances[item]
+
+    def __setitem__(self, key, value: AccountCurrencyBalance):
+        self._balances[key] = value
+
+    def __contains__(self, item):
+        return item in self._balances
+
+    def __iter__(self):
+        return iter(self._balances.values())
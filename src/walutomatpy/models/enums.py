@@ -1,5 +1,6 @@
 from enum import Enum, auto
 from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_EVEN
 
 
 class AutoName(Enum):
@@ -47,14 +48,51 @@ class OrderCurrencyPair:
         return f'{str(self.base)}{str(self.counter)}'
 
 
+# offers are kept as scaled integers: price in 1e-4 and volume in 1e-2 units, exact and cheap to sum
+PRICE_SCALE = 10 ** 4
+VOLUME_SCALE = 10 ** 2
+PRICE_EXPONENT = -4
+VOLUME_EXPONENT = -2
+
+
+def to_units(value, scale) -> int:
+    """
+    converts price or volume to scaled integer units, rounding half to even below the unit
+    """
+    if isinstance(value, int):
+        return value * scale
+    if isinstance(value, float):
+        value = repr(value)
+    return int((Decimal(value) * scale).to_integral_value(ROUND_HALF_EVEN))
+
+
+def from_units(units: int, exponent) -> Decimal:
+    return Decimal(units).scaleb(exponent)
+
+
 @dataclass
 class Offer:
-    price: float
-    volume: float
+    price_units: int
+    volume_units: int
 
     def __init__(self, price, volume):
-        self.price = float(price)
-        self.volume = float(volume)
+        self.price_units = to_units(price, PRICE_SCALE)
+        self.volume_units = to_units(volume, VOLUME_SCALE)
+
+    @classmethod
+    def from_units(cls, price_units: int, volume_units: int):
+        offer = cls.__new__(cls)
+        offer.price_units = price_units
+        offer.volume_units = volume_units
+        return offer
+
+    @property
+    def price(self) -> Decimal:
+        return from_units(self.price_units, PRICE_EXPONENT)
+
+    @property
+    def volume(self) -> Decimal:
+        return from_units(self.volume_units, VOLUME_EXPONENT)
 
     def __str__(self):
         return f'{self.price:10.5}@{self.volume:10.6}'
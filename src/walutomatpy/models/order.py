@@ -1,8 +1,8 @@
 from dataclasses import dataclass, fields, asdict
 from decimal import Decimal
-from datetime import datetime
-
-from dateutil.parser import isoparse
+from datetime import datetime, timezone
+from enum import Enum
+import threading
 
 from .enums import OrderTypeEnum, OrderCurrencyPair, OrderCurrencyEnum, OrderStatusEnum
 
@@ -11,8 +11,38 @@ from .enums import OrderTypeEnum, OrderCurrencyPair, OrderCurrencyEnum, OrderSta
 DATE_FMT = '%Y-%m-%dT%H:%M:%S.%fZ'
 
 
+def parse_timestamp(value: str) -> datetime:
+    """
+    parses API timestamps like 2022-08-03T09:50:16.692380437Z, fraction is truncated to microseconds as isoparse does;
+    other ISO 8601 formats fall back to dateutil isoparse
+    """
+    if len(value) >= 20 and value[-1] == 'Z' and value[10] == 'T' and (len(value) == 20 or value[19] == '.'):
+        try:
+            microsecond = int(value[20:-1][:6].ljust(6, '0')) if len(value) > 21 else 0
+            return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]), int(value[11:13]),
+                            int(value[14:16]), int(value[17:19]), microsecond, timezone.utc)
+        except ValueError:
+            pass
+    from dateutil.parser import isoparse
+
+    return isoparse(value)
+
+
+def _enum_converter(enum):
+    members = {member.value: member for member in enum}
+
+    def convert(value):
+        member = members.get(value)
+        return member if member is not None else enum(value)
+
+    return convert
+
+
 @dataclass(repr=True)
 class WalutomatOrder:
+    __slots__ = ('orderId', 'submitId', 'submitTs', 'updateTs', 'status', 'completion', 'currencyPair', 'buySell',
+                 'volume', 'volumeCurrency', 'limitPrice', 'soldAmount', 'soldCurrency', 'boughtAmount',
+                 'boughtCurrency', 'commissionAmount', 'commissionCurrency', 'commissionRate')
     # required
     orderId: str
     submitId: str
@@ -35,18 +65,11 @@ class WalutomatOrder:
     commissionRate: Decimal
 
     def __init__(self, **kwargs):
-        submit_ts = kwargs.get('submitTs')
-        if submit_ts:
-            self.submitTs = isoparse(submit_ts)
-        update_ts = kwargs.get('updateTs')
-        if update_ts:
-            self.updateTs = isoparse(update_ts)
-        obj_field_types = {field.name: field.type for field in fields(self)}
+        converters = _CONVERTERS
         for arg_name, arg_value in kwargs.items():
-            field_type = obj_field_types.get(arg_name)
-            field_value = getattr(self, arg_name, None)
-            if field_value is None and field_type:
-                setattr(self, arg_name, field_type(arg_value))
+            converter = converters.get(arg_name)
+            if converter is not None and arg_value is not None:
+                setattr(self, arg_name, converter(arg_value))
 
     def is_executed(self):
         return self.completion == 100
@@ -55,9 +78,8 @@ class WalutomatOrder:
         return self.buySell == OrderTypeEnum.BUY
 
     def __str__(self):
-        obj_field_types = {field.name: field.type for field in fields(self)}
         _asdict = {}
-        for field_name in obj_field_types.keys():
+        for field_name in ORDER_FIELDS:
             value = getattr(self, field_name, None)
             if value:
                 _asdict[field_name] = value
@@ -65,3 +87,85 @@ class WalutomatOrder:
 
     def __repr__(self):
         return self.__str__()
+
+
+ORDER_FIELDS = tuple(field.name for field in fields(WalutomatOrder))
+_FIELD_TYPES = {field.name: field.type for field in fields(WalutomatOrder)}
+# converters are resolved once instead of on every order
+_CONVERTERS = dict(_FIELD_TYPES)
+_CONVERTERS.update(submitTs=parse_timestamp, updateTs=parse_timestamp)
+_CONVERTERS.update({field.name: _enum_converter(field.type) for field in fields(WalutomatOrder)
+                    if isinstance(field.type, type) and issubclass(field.type, Enum)})
+
+
+def _convert_submit_param(name, value):
+    # submit parameters get the types of the loaded order, whatever the caller passed
+    if value is None or isinstance(value, _FIELD_TYPES[name]):
+        return value
+    if _FIELD_TYPES[name] is Decimal:
+        return Decimal(str(value))
+    return _CONVERTERS[name](value)
+
+
+class LazyWalutomatOrder:
+    """
+    Handle of a submitted order known only by its ids and submit parameters. The full WalutomatOrder is fetched on
+    first access of any other field, unless it was filled in before, e.g. by an OrderWatcher listener.
+    """
+
+    def __init__(self, orderId, submitId, fetch, *, currencyPair=None, buySell=None, volume=None,
+                 volumeCurrency=None, limitPrice=None):
+        """
+        :param fetch: callable(orderId) returning WalutomatOrder
+        """
+        self.orderId = orderId
+        self.submitId = submitId
+        self.currencyPair = _convert_submit_param('currencyPair', currencyPair)
+        self.buySell = _convert_submit_param('buySell', buySell)
+        self.volume = _convert_submit_param('volume', volume)
+        self.volumeCurrency = _convert_submit_param('volumeCurrency', volumeCurrency)
+        self.limitPrice = _convert_submit_param('limitPrice', limitPrice)
+        self._fetch = fetch
+        self._order = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self):
+        return self._order is not None
+
+    def set_order(self, order: WalutomatOrder):
+        self._order = order
+
+    def load(self) -> WalutomatOrder:
+        """
+        :return: full order, fetched when not loaded yet
+        """
+        if self._order is None:
+            with self._lock:
+                if self._order is None:
+                    self._order = self._fetch(self.orderId)
+        return self._order
+
+    def refresh(self) -> WalutomatOrder:
+        self._order = None
+        return self.load()
+
+    def __getattr__(self, name):
+        # called only for fields not known from submit parameters
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def is_executed(self):
+        return self.load().is_executed()
+
+    def is_sell(self):
+        return self.buySell == OrderTypeEnum.SELL
+
+    def __str__(self):
+        if self._order is not None:
+            return str(self._order)
+        return str(dict(orderId=self.orderId, submitId=self.submitId))
+
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,154 @@
+import math
+from array import array
+from decimal import Decimal
+from bisect import bisect_left, bisect_right
+from typing import List
+
+from .models.enums import Offer, to_units, from_units
+from .models.enums import PRICE_SCALE, VOLUME_SCALE, PRICE_EXPONENT, VOLUME_EXPONENT
+from .exceptions import MissingVolume
+
+
+class OrderBookSide:
+    """
+    One side of the order book kept in compact int64 arrays of scaled units (see Offer) sorted from the best price.
+    Cumulative volume and notional (price * volume) sums are precomputed exactly, so VWAP for any volume is a bisect
+    plus one partial level. Results are converted to Decimal only when returned.
+    """
+
+    def __init__(self, offers: List[Offer], *, descending: bool):
+        self.descending = descending
+        self.price_units = array('q')
+        self.volume_units = array('q')
+        self.cum_volume_units = array('q')
+        # in PRICE_SCALE * VOLUME_SCALE units
+        self.cum_notional_units = array('q')
+        # prices as ascending keys for bisect, bids are stored negated
+        self._keys = array('q')
+        cum_volume = 0
+        cum_notional = 0
+        for offer in offers:
+            cum_volume += offer.volume_units
+            cum_notional += offer.volume_units * offer.price_units
+            self.price_units.append(offer.price_units)
+            self.volume_units.append(offer.volume_units)
+            self.cum_volume_units.append(cum_volume)
+            self.cum_notional_units.append(cum_notional)
+            self._keys.append(-offer.price_units if descending else offer.price_units)
+
+    def __len__(self):
+        return len(self.price_units)
+
+    def __iter__(self):
+        for price_units, volume_units in zip(self.price_units, self.volume_units):
+            yield Offer.from_units(price_units, volume_units)
+
+    @property
+    def total_volume_units(self) -> int:
+        return self.cum_volume_units[-1] if self.cum_volume_units else 0
+
+    @property
+    def total_volume(self) -> Decimal:
+        return from_units(self.total_volume_units, VOLUME_EXPONENT)
+
+    @property
+    def best_price(self) -> Decimal:
+        return from_units(self.price_units[0], PRICE_EXPONENT) if self.price_units else None
+
+    def average_price(self, volume) -> Decimal:
+        """
+        gets average price of filling given volume starting from the best price
+        :raises MissingVolume: when the book is too shallow
+        """
+        volume_units = to_units(volume, VOLUME_SCALE)
+        level = bisect_left(self.cum_volume_units, volume_units)
+        if level == len(self.cum_volume_units):
+            raise MissingVolume(from_units(volume_units - self.total_volume_units, VOLUME_EXPONENT))
+        notional_units = volume_units * self.price_units[level]
+        if level > 0:
+            previous_volume_units = self.cum_volume_units[level - 1]
+            notional_units = self.cum_notional_units[level - 1] + \
+                (volume_units - previous_volume_units) * self.price_units[level]
+        return Decimal(notional_units) / (volume_units * PRICE_SCALE)
+
+    def levels_for_volume(self, volume):
+        """
+        gets number of levels needed to fill volume, beyond fetched levels it's estimated from the average level size
+        :return: number of levels or None for an empty side
+        """
+        volume_units = to_units(volume, VOLUME_SCALE)
+        level = bisect_left(self.cum_volume_units, volume_units)
+        if level < len(self.cum_volume_units):
+            return level + 1
+        if not self.price_units:
+            return None
+        missing_units = volume_units - self.total_volume_units
+        return len(self) + math.ceil(missing_units * len(self) / self.total_volume_units)
+
+    def average_prices(self, volumes):
+        """
+        Vectorized average_price() for many volumes at once, requires numpy. Sums are exact int64, only the final
+        division is done in float64.
+
+        :param volumes: array like of volumes
+        :return: numpy array of average prices, NaN where the book is too shallow to fill the volume
+        """
+        import numpy as np
+
+        volumes = np.asarray(volumes, dtype=np.float64)
+        result = np.full(volumes.shape, np.nan)
+        if not self.price_units:
+            return result
+        volume_units = np.rint(volumes * VOLUME_SCALE).astype(np.int64)
+        prices = np.frombuffer(self.price_units, dtype=np.int64)
+        cum_volumes = np.frombuffer(self.cum_volume_units, dtype=np.int64)
+        cum_notionals = np.frombuffer(self.cum_notional_units, dtype=np.int64)
+        levels = np.searchsorted(cum_volumes, volume_units, side='left')
+        fillable = levels < len(cum_volumes)
+        levels = levels[fillable]
+        filled = volume_units[fillable]
+        previous = levels - 1
+        has_previous = previous >= 0
+        previous_volumes = np.where(has_previous, cum_volumes[previous], 0)
+        previous_notionals = np.where(has_previous, cum_notionals[previous], 0)
+        notionals = previous_notionals + (filled - previous_volumes) * prices[levels]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[fillable] = notionals / (filled * float(PRICE_SCALE))
+        return result
+
+    def max_volume(self, price_limit) -> Decimal:
+        """
+        gets volume available at price equal or better than price_limit
+        """
+        price_units = to_units(price_limit, PRICE_SCALE)
+        key = -price_units if self.descending else price_units
+        levels = bisect_right(self._keys, key)
+        return from_units(self.cum_volume_units[levels - 1] if levels else 0, VOLUME_EXPONENT)
+
+
+class OrderBook:
+    def __init__(self, bids: List[Offer], asks: List[Offer], *, timestamp=None):
+        """
+        :param bids: offers sorted by price descending
+        :param asks: offers sorted by price ascending
+        :param timestamp: time.time() when the snapshot was fetched
+        """
+        self.bids = OrderBookSide(bids, descending=True)
+        self.asks = OrderBookSide(asks, descending=False)
+        self.timestamp = timestamp
+
+    def get_price_by_volume(self, volume):
+        """
+        :return: tuple of average bid and ask price for given volume
+        """
+        return self.bids.average_price(volume), self.asks.average_price(volume)
+
+    def get_prices_by_volumes(self, volumes):
+        """
+        :return: tuple of numpy arrays with average bid and ask prices, NaN where volume can't be filled
+        """
+        return self.bids.average_prices(volumes), self.asks.average_prices(volumes)
+
+    def __str__(self):
+        return f'bids: {len(self.bids)} levels @ {self.bids.best_price}, asks: {len(self.asks)} levels @ ' \
+               f'{self.asks.best_price}'
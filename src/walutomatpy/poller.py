@@ -0,0 +1,146 @@
+import heapq
+import queue
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, List, Tuple
+
+from .logger import logger
+from .models.enums import from_units, PRICE_EXPONENT, VOLUME_EXPONENT
+from .orderbook import OrderBook, OrderBookSide
+
+
+def _diff_side(previous: OrderBookSide, current: OrderBookSide) -> List[Tuple[Decimal, Decimal]]:
+    """
+    :return: list of (price, volume) for changed levels, volume 0 means the level is gone
+    """
+    before = dict(zip(previous.price_units, previous.volume_units)) if previous is not None else {}
+    changes = []
+    for price_units, volume_units in zip(current.price_units, current.volume_units):
+        if before.pop(price_units, None) != volume_units:
+            changes.append((price_units, volume_units))
+    changes.extend((price_units, 0) for price_units in before)
+    return [(from_units(price_units, PRICE_EXPONENT), from_units(volume_units, VOLUME_EXPONENT))
+            for price_units, volume_units in changes]
+
+
+class BookDiff:
+    """
+    Changes between two consecutive snapshots of a pair. Levels that moved beyond the polled depth are reported
+    as removed.
+    """
+
+    def __init__(self, currency_pair: str, previous: OrderBook, book: OrderBook):
+        self.currency_pair = currency_pair
+        self.book = book
+        self.bids = _diff_side(previous and previous.bids, book.bids)
+        self.asks = _diff_side(previous and previous.asks, book.asks)
+        self.best_bid_changed = previous is None or previous.bids.best_price != book.bids.best_price
+        self.best_ask_changed = previous is None or previous.asks.best_price != book.asks.best_price
+
+    def __bool__(self):
+        return bool(self.bids or self.asks)
+
+    def __str__(self):
+        return f'{self.currency_pair}: {len(self.bids)} bid and {len(self.asks)} ask levels changed'
+
+
+class MarketDataPoller:
+    """
+    Background thread polling order books with per pair interval and publishing only BookDiff of changed levels to
+    subscribers. A single poller can serve all consumers in the process.
+
+        poller = MarketDataPoller(client, {'EURPLN': 1.0, 'USDPLN': 5.0})
+        poller.subscribe(lambda diff: print(diff))
+        poller.start()
+    """
+
+    def __init__(self, client, intervals: Dict[str, float], *, depth=10, clock=time.monotonic):
+        """
+        :param client: WrappedWalutomatClient
+        :param intervals: polling interval in seconds keyed by currency pair
+        """
+        self._client = client
+        self._intervals = {str(pair): interval for pair, interval in intervals.items()}
+        self._depth = depth
+        self._clock = clock
+        self._books = {}
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback: Callable[[BookDiff], None]):
+        with self._lock:
+            self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.remove(callback)
+
+    def updates(self, timeout=None):
+        """
+        Blocking iterator over diffs published after this call, stops when the poller is stopped or no diff
+        arrives within timeout.
+        """
+        diffs = queue.Queue()
+        self.subscribe(diffs.put)
+        try:
+            while not self._stopped.is_set():
+                try:
+                    yield diffs.get(timeout=timeout)
+                except queue.Empty:
+                    return
+        finally:
+            self.unsubscribe(diffs.put)
+
+    def get_book(self, currency_pair) -> OrderBook:
+        return self._books.get(str(currency_pair))
+
+    def poll_once(self, currency_pair) -> BookDiff:
+        """
+        Fetches order book of currency_pair and publishes diff when anything changed.
+        """
+        currency_pair = str(currency_pair)
+        book = self._client.get_order_book(currency_pair, self._depth)
+        diff = BookDiff(currency_pair, self._books.get(currency_pair), book)
+        self._books[currency_pair] = book
+        if diff:
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for callback in subscribers:
+                try:
+                    callback(diff)
+                except Exception:
+                    logger.exception(f'Subscriber {callback} failed on {diff}')
+        return diff
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='walutomat-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        now = self._clock()
+        schedule = [(now, pair) for pair in self._intervals]
+        heapq.heapify(schedule)
+        while schedule and not self._stopped.is_set():
+            due, pair = schedule[0]
+            delay = due - self._clock()
+            if delay > 0 and self._stopped.wait(delay):
+                break
+            heapq.heappop(schedule)
+            try:
+                self.poll_once(pair)
+            except Exception:
+                logger.exception(f'Polling {pair} failed')
+            heapq.heappush(schedule, (max(due + self._intervals[pair], self._clock()), pair))
@@ -0,0 +1,127 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Tuple
+
+import requests
+
+from .logger import logger
+from .signing import Signer, CryptographySigner
+from .wrapped import WrappedWalutomatClient
+
+# signers of the accounts loaded in a signing worker process
+_worker_signers: Dict[str, Signer] = {}
+
+
+def _load_worker_keys(private_keys: Dict[str, str]):
+    for api_key, private_key in private_keys.items():
+        _worker_signers[api_key] = CryptographySigner(private_key)
+
+
+def _sign_in_worker(api_key, data: bytes) -> bytes:
+    return _worker_signers[api_key].sign(data)
+
+
+class ProcessPoolSigner(Signer):
+    """
+    Signs with a key loaded in every worker of a shared process pool, so RSA operations of many threads are not
+    serialized by the GIL.
+    """
+
+    def __init__(self, executor: ProcessPoolExecutor, api_key):
+        self._executor = executor
+        self._api_key = api_key
+
+    def sign(self, data: bytes) -> bytes:
+        return self._executor.submit(_sign_in_worker, self._api_key, data).result()
+
+
+class WalutomatClientPool:
+    """
+    Clients of many accounts sharing one requests.Session and connection pool, the API key is sent with every
+    request. Private keys are loaded up front, in the calling process or with signing_processes in every worker of
+    a process pool which then does all RSA signing. Workers are spawned, not forked from a process running threads,
+    and every worker receives the PEM keys of all accounts through its initializer arguments. Calls are fanned out
+    over accounts on a thread pool and results are gathered per account.
+
+        with WalutomatClientPool({'main': (api_key, private_key), 'sub': (sub_api_key, sub_private_key)}) as pool:
+            balances = pool.get_account_balances()
+            balances['sub']
+    """
+
+    def __init__(self, credentials: Dict[str, Tuple[str, str]], *, max_workers=32, signing_processes=0,
+                 client_class=WrappedWalutomatClient, **client_kwargs):
+        """
+        :param credentials: (api_key, private_key) keyed by account name
+        :param max_workers: concurrent requests, also the connection pool size
+        :param signing_processes: number of spawned signing worker processes, each gets all private keys, 0 signs in
+                                  the calling threads
+        :param client_kwargs: passed to every client, e.g. base_url or retry_policy
+        """
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='walutomat-pool')
+        self._signing_executor = None
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=max_workers,
+                                                max_retries=client_kwargs.get('max_retry', 0))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Content-Type': 'application/x-www-form-urlencoded'})
+        if signing_processes:
+            # forking while other threads hold requests or logging locks could leave the locks held in the workers
+            self._signing_executor = ProcessPoolExecutor(
+                signing_processes, mp_context=multiprocessing.get_context('spawn'), initializer=_load_worker_keys,
+                initargs=({api_key: private_key for api_key, private_key in credentials.values()},))
+        self.clients: Dict[str, WrappedWalutomatClient] = {}
+        for name, (api_key, private_key) in credentials.items():
+            if self._signing_executor is not None:
+                signer = ProcessPoolSigner(self._signing_executor, api_key)
+            else:
+                signer = CryptographySigner(private_key)
+            self.clients[name] = client_class(api_key, private_key, session=self.session, signer=signer,
+                                              **client_kwargs)
+        logger.debug(f'Client pool of {len(self.clients)} accounts, {max_workers} workers')
+
+    def __getitem__(self, name) -> WrappedWalutomatClient:
+        return self.clients[name]
+
+    def __iter__(self):
+        return iter(self.clients)
+
+    def __len__(self):
+        return len(self.clients)
+
+    def gather(self, func: Callable, accounts: Iterable[str] = None) -> Dict[str, object]:
+        """
+        Calls func(client) for every account concurrently.
+        :param accounts: names of accounts to call, all by default
+        :return: results keyed by account name, exception raised by func is returned in place of its result
+        """
+        names = list(self.clients if accounts is None else accounts)
+        futures = {name: self._executor.submit(func, self.clients[name]) for name in names}
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = e
+        return results
+
+    def get_account_balances(self, accounts=None):
+        return self.gather(lambda client: client.get_account_balances(), accounts)
+
+    def get_p2p_active_orders(self, item_limit=50, accounts=None):
+        return self.gather(lambda client: list(client.get_p2p_active_orders(item_limit)), accounts)
+
+    def get_account_history(self, accounts=None, **history_filters):
+        return self.gather(lambda client: list(client.get_account_history(**history_filters)), accounts)
+
+    def close(self):
+        self._executor.shutdown()
+        if self._signing_executor is not None:
+            self._signing_executor.shutdown()
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,155 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Dict, Tuple
+
+from .logger import logger
+
+# (method, endpoint path) -> endpoint group
+ENDPOINT_GROUPS = {
+    ('POST', '/api/v2.0.0/market_fx/orders'): 'orders_write',
+    ('POST', '/api/v2.0.0/market_fx/orders/close'): 'orders_write',
+    ('GET', '/api/v2.0.0/market_fx/orders'): 'orders_read',
+    ('GET', '/api/v2.0.0/market_fx/orders/active'): 'orders_read',
+    ('GET', '/api/v2.0.0/account/balances'): 'account',
+    ('GET', '/api/v2.0.0/market_fx/best_offers'): 'market_data',
+    ('GET', '/api/v2.0.0/market_fx/best_offers/detailed'): 'market_data',
+    ('GET', '/api/v2.0.0/account/history'): 'history',
+}
+
+# lower value is served first
+DEFAULT_PRIORITIES = {
+    'orders_write': 0,
+    'orders_read': 1,
+    'account': 1,
+    'market_data': 2,
+    'default': 2,
+    'history': 3,
+}
+
+
+def get_endpoint_group(method, endpoint_uri):
+    path = endpoint_uri.partition('?')[0]
+    return ENDPOINT_GROUPS.get((method.upper(), path), 'default')
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None, *, clock=time.monotonic):
+        """
+        :param rate: tokens added per second
+        :param capacity: max burst, defaults to rate
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self.waiters = []
+
+    def try_take(self) -> float:
+        """
+        :return: 0 when token was taken or seconds until the next token is available
+        """
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+
+class WaitStats:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, waited):
+        self.count += 1
+        self.total += waited
+        self.max = max(self.max, waited)
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+    def __repr__(self):
+        return f'<WaitStats count={self.count} total={self.total:.3f}s max={self.max:.3f}s>'
+
+
+class RateLimiter:
+    """
+    Client side token bucket rate limiter with a priority queue. All requests share one bucket, waiting requests
+    get tokens in priority order of their endpoint group, so order submission and cancellation overtake queued
+    market data and history reads. Groups may additionally be limited by their own bucket.
+
+        limiter = RateLimiter(10, group_limits={'history': (1, 2)})
+        client = WalutomatClient(api_key, private_key, rate_limiter=limiter)
+    """
+
+    def __init__(self, rate, burst=None, *, group_limits: Dict[str, Tuple[float, float]] = None,
+                 priorities: Dict[str, int] = None, clock=time.monotonic):
+        """
+        :param rate: requests per second shared by all endpoint groups
+        :param burst: shared bucket capacity
+        :param group_limits: (rate, burst) keyed by endpoint group
+        :param priorities: overrides DEFAULT_PRIORITIES
+        """
+        self._clock = clock
+        self._bucket = TokenBucket(rate, burst, clock=clock)
+        self._group_buckets = {group: TokenBucket(group_rate, group_burst, clock=clock)
+                               for group, (group_rate, group_burst) in (group_limits or {}).items()}
+        self._priorities = dict(DEFAULT_PRIORITIES, **(priorities or {}))
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        self._stats: Dict[str, WaitStats] = {}
+
+    def acquire(self, method, endpoint_uri) -> float:
+        """
+        Blocks until the request may be sent.
+        :return: seconds spent waiting in the queue
+        """
+        group = get_endpoint_group(method, endpoint_uri)
+        priority = self._priorities.get(group, self._priorities['default'])
+        started = self._clock()
+        with self._condition:
+            group_bucket = self._group_buckets.get(group)
+            if group_bucket is not None:
+                self._take(group_bucket, (priority, next(self._sequence)))
+            self._take(self._bucket, (priority, next(self._sequence)))
+            waited = self._clock() - started
+            self._stats.setdefault(group, WaitStats()).add(waited)
+        if waited > 0:
+            logger.debug(f'Rate limiter held {method} {endpoint_uri} for {waited:.3f}s')
+        return waited
+
+    def _take(self, bucket, entry):
+        heapq.heappush(bucket.waiters, entry)
+        try:
+            while True:
+                delay = None
+                if bucket.waiters[0] is entry:
+                    delay = bucket.try_take()
+                    if delay == 0:
+                        break
+                self._condition.wait(delay)
+        finally:
+            bucket.waiters.remove(entry)
+            heapq.heapify(bucket.waiters)
+            self._condition.notify_all()
+
+    def queued(self) -> int:
+        """
+        :return: number of requests waiting for a token
+        """
+        with self._condition:
+            return len(self._bucket.waiters) + sum(len(bucket.waiters) for bucket in self._group_buckets.values())
+
+    def stats(self) -> Dict[str, WaitStats]:
+        """
+        :return: time spent waiting in the queue keyed by endpoint group
+        """
+        with self._condition:
+            return dict(self._stats)
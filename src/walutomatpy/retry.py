@@ -0,0 +1,108 @@
+import random
+import time
+
+import requests
+
+# HTTP statuses and API error keys of failures which are worth another attempt
+RETRYABLE_STATUSES = frozenset((429, 500, 502, 503, 504))
+RETRYABLE_ERROR_KEYS = frozenset(('TOO_MANY_REQUESTS', 'SERVICE_UNAVAILABLE', 'INTERNAL_ERROR'))
+RETRYABLE_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+
+class RetryPolicy:
+    """
+    Retries failed calls with exponential backoff and full jitter: the n-th retry waits a random time up to
+    min(max_delay, base_delay * multiplier ** n). Network errors, retryable HTTP statuses and API error keys are
+    retried until max_attempts is reached or the next attempt would start after deadline seconds since the first one.
+
+    WalutomatClient and AsyncWalutomatClient retry GET requests with the policy. Order submission is retried with
+    the same submitId, and when a failed attempt might have placed the order, active orders and recent MARKET_FX
+    history are checked for that submitId before resubmitting.
+
+        client = WalutomatClient(api_key, private_key, retry_policy=RetryPolicy(max_attempts=4, deadline=5))
+    """
+
+    def __init__(self, max_attempts=3, *, base_delay=0.1, max_delay=5.0, multiplier=2.0, deadline=None,
+                 retry_statuses=RETRYABLE_STATUSES, retry_error_keys=RETRYABLE_ERROR_KEYS, sleep=time.sleep,
+                 clock=time.monotonic, random_uniform=random.uniform):
+        """
+        :param max_attempts: attempts including the first one
+        :param deadline: seconds budget for all attempts of a single call
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.deadline = deadline
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_error_keys = frozenset(retry_error_keys)
+        self._sleep = sleep
+        self._clock = clock
+        self._uniform = random_uniform
+
+    def is_retryable(self, error: Exception) -> bool:
+        if isinstance(error, RETRYABLE_EXCEPTIONS):
+            return True
+        status_code = getattr(error, 'status_code', None)
+        keys = getattr(error, 'keys', None)
+        if status_code is None and keys is None:
+            return False
+        return status_code in self.retry_statuses or bool(self.retry_error_keys.intersection(keys or ()))
+
+    def backoff(self, retry) -> float:
+        """
+        :param retry: number of the retry starting from 0
+        """
+        return self._uniform(0, min(self.max_delay, self.base_delay * self.multiplier ** retry))
+
+    def _retry_delay(self, attempt, started, error, retry_exceptions=()):
+        """
+        :return: seconds to sleep before the next attempt or None when error should be raised
+        """
+        if attempt + 1 >= self.max_attempts or not (self.is_retryable(error) or isinstance(error, retry_exceptions)):
+            return None
+        delay = self.backoff(attempt)
+        if self.deadline is not None and self._clock() - started + delay > self.deadline:
+            return None
+        return delay
+
+    def call(self, func, *, on_retry=None):
+        """
+        :param func: callable(attempt) with attempt counted from 0
+        :param on_retry: callable(attempt, error) called before sleeping ahead of every retry
+        """
+        started = self._clock()
+        attempt = 0
+        while True:
+            try:
+                return func(attempt)
+            except Exception as e:
+                delay = self._retry_delay(attempt, started, e)
+                if delay is None:
+                    raise
+                attempt += 1
+                if on_retry is not None:
+                    on_retry(attempt, e)
+                self._sleep(delay)
+
+    async def call_async(self, func, *, on_retry=None, retry_exceptions=()):
+        """
+        asyncio counterpart of call(), backoff is awaited with asyncio.sleep.
+        :param func: coroutine function(attempt) with attempt counted from 0
+        :param retry_exceptions: exception types retried on top of the network errors of requests, e.g. aiohttp ones
+        """
+        import asyncio
+
+        started = self._clock()
+        attempt = 0
+        while True:
+            try:
+                return await func(attempt)
+            except Exception as e:
+                delay = self._retry_delay(attempt, started, e, retry_exceptions)
+                if delay is None:
+                    raise
+                attempt += 1
+                if on_retry is not None:
+                    on_retry(attempt, e)
+                await asyncio.sleep(delay)
@@ -0,0 +1,74 @@
+import base64
+import time
+
+
+class SignatureTimestamp:
+    """
+    Callable returning X-API-Timestamp value for the current second. Formatting is done once per second and the
+    result is cached as (second, value) tuple which is replaced atomically, so it's safe to share between threads.
+    """
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._cached = (None, None)
+
+    def __call__(self):
+        now = int(self._clock())
+        second, value = self._cached
+        if second != now:
+            value = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now))
+            self._cached = (now, value)
+        return value
+
+
+class Signer:
+    """
+    Signs requests with RSA SHA256 as required by Walutomat API. Subclasses implement sign() on raw bytes, key is
+    loaded once and kept for the lifetime of the signer.
+    """
+
+    def sign(self, data: bytes) -> bytes:
+        raise NotImplementedError()
+
+    def sign_request(self, timestamp, path_url, body=None) -> bytes:
+        """
+        :param timestamp: X-API-Timestamp value
+        :param path_url: path with query string as sent e.g. /api/v2.0.0/market_fx/orders?orderId=123
+        :param body: form encoded body, query string is not signed when body is present
+        :return: base64 encoded signature
+        """
+        if body is None:
+            data = f'{timestamp}{path_url}'.encode()
+        else:
+            path, _, _ = path_url.partition('?')
+            if isinstance(body, bytes):
+                data = f'{timestamp}{path}'.encode() + body
+            else:
+                data = f'{timestamp}{path}{body}'.encode()
+        return base64.b64encode(self.sign(data))
+
+
+class CryptographySigner(Signer):
+    def __init__(self, private_key):
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        if isinstance(private_key, str):
+            private_key = private_key.encode()
+        self._key = serialization.load_pem_private_key(private_key, password=None)
+        self._padding = padding.PKCS1v15()
+        self._algorithm = hashes.SHA256()
+
+    def sign(self, data: bytes) -> bytes:
+        return self._key.sign(data, self._padding, self._algorithm)
+
+
+class OpenSSLSigner(Signer):
+    def __init__(self, private_key):
+        from OpenSSL import crypto
+
+        self._crypto = crypto
+        self._key = crypto.load_privatekey(crypto.FILETYPE_PEM, private_key)
+
+    def sign(self, data: bytes) -> bytes:
+        return self._crypto.sign(self._key, data, 'sha256')
@@ -0,0 +1,2 @@
+from .engine import MatchingEngine, SimulatorError
+from .server import SimulatorServer, generate_key_pair
@@ -0,0 +1,393 @@
+import bisect
+import itertools
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal, ROUND_DOWN, ROUND_UP
+from typing import Dict, List
+
+from ..models.enums import OrderCurrencyPair, OrderCurrencyEnum, OrderStatusEnum, OrderTypeEnum
+from ..models.order import parse_timestamp
+
+AMOUNT_QUANTUM = Decimal('0.01')
+PRICE_QUANTUM = Decimal('0.0001')
+MARKET_MAKER = '__market_maker__'
+CURRENCY_PAIRS = ('EURPLN', 'USDPLN', 'CHFPLN', 'GBPPLN', 'EURUSD', 'EURGBP', 'EURCHF', 'GBPUSD', 'USDCHF',
+                  'GBPCHF')
+
+
+class SimulatorError(Exception):
+    def __init__(self, key, description, status=400):
+        super().__init__(f'{key}: {description}')
+        self.key = key
+        self.description = description
+        self.status = status
+
+    def to_response(self):
+        return dict(success=False, errors=[dict(key=self.key, description=self.description)])
+
+
+def format_ts(ts_ns) -> str:
+    seconds, nanoseconds = divmod(ts_ns, 1_000_000_000)
+    return f'{datetime.fromtimestamp(seconds, timezone.utc):%Y-%m-%dT%H:%M:%S}.{nanoseconds:09d}Z'
+
+
+def _to_ns(value) -> int:
+    moment = parse_timestamp(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp()) * 1_000_000_000 + moment.microsecond * 1000
+
+
+def _decimal(value, name) -> Decimal:
+    try:
+        value = Decimal(str(value))
+    except ArithmeticError:
+        raise SimulatorError('INVALID_PARAMETER', f'{name} is not a number')
+    if not value.is_finite() or value <= 0:
+        raise SimulatorError('INVALID_PARAMETER', f'{name} must be positive')
+    return value
+
+
+class _Balance:
+    def __init__(self, total=Decimal(0)):
+        self.total = Decimal(total)
+        self.reserved = Decimal(0)
+
+    @property
+    def available(self):
+        return self.total - self.reserved
+
+
+class _Account:
+    def __init__(self, balances):
+        self.balances: Dict[OrderCurrencyEnum, _Balance] = {
+            OrderCurrencyEnum(str(currency)): _Balance(amount) for currency, amount in balances.items()}
+        self.orders: Dict[str, '_Order'] = {}
+        self.submit_ids: Dict[str, '_Order'] = {}
+        self.history: List[dict] = []
+
+    def balance(self, currency) -> _Balance:
+        return self.balances.setdefault(currency, _Balance())
+
+
+class _Order:
+    def __init__(self, account, api_key, submit_id, pair, buy_sell, volume, volume_currency, limit_price, ts, seq):
+        self.account = account
+        self.api_key = api_key
+        self.order_id = str(uuid.uuid4())
+        self.submit_id = submit_id
+        self.pair = pair
+        self.buy_sell = buy_sell
+        self.volume = volume
+        self.volume_currency = volume_currency
+        self.limit_price = limit_price
+        self.submit_ts = self.update_ts = ts
+        self.seq = seq
+        self.status = OrderStatusEnum.ACTIVE
+        self.filled_base = Decimal(0)
+        self.filled_counter = Decimal(0)
+        self.commission = Decimal(0)
+        if buy_sell == OrderTypeEnum.BUY:
+            self.sold_currency, self.bought_currency = pair.counter, pair.base
+        else:
+            self.sold_currency, self.bought_currency = pair.base, pair.counter
+        self.reserved = self._max_sold_amount()
+
+    def _max_sold_amount(self):
+        if self.sold_currency == self.volume_currency:
+            return self.volume
+        if self.buy_sell == OrderTypeEnum.BUY:
+            return (self.volume * self.limit_price).quantize(AMOUNT_QUANTUM, ROUND_UP)
+        return (self.volume / self.limit_price).quantize(AMOUNT_QUANTUM, ROUND_UP)
+
+    @property
+    def filled(self):
+        return self.filled_base if self.volume_currency == self.pair.base else self.filled_counter
+
+    def remaining_base(self, price) -> Decimal:
+        """
+        :return: base currency volume still to be traded at price
+        """
+        remaining = self.volume - self.filled
+        if self.volume_currency == self.pair.base:
+            return remaining
+        return (remaining / price).quantize(AMOUNT_QUANTUM, ROUND_DOWN)
+
+    @property
+    def sold_amount(self):
+        return self.filled_counter if self.buy_sell == OrderTypeEnum.BUY else self.filled_base
+
+    @property
+    def bought_amount(self):
+        return self.filled_base if self.buy_sell == OrderTypeEnum.BUY else self.filled_counter
+
+    def to_dict(self, commission_rate):
+        return dict(orderId=self.order_id, submitId=self.submit_id, submitTs=format_ts(self.submit_ts),
+                    updateTs=format_ts(self.update_ts), status=str(self.status),
+                    completion=int(self.filled * 100 / self.volume), currencyPair=str(self.pair),
+                    buySell=str(self.buy_sell), volume=str(self.volume), volumeCurrency=str(self.volume_currency),
+                    limitPrice=str(self.limit_price), soldAmount=str(self.sold_amount),
+                    soldCurrency=str(self.sold_currency), boughtAmount=str(self.bought_amount),
+                    boughtCurrency=str(self.bought_currency), commissionAmount=str(self.commission),
+                    commissionCurrency=str(self.bought_currency), commissionRate=str(commission_rate))
+
+
+class _Book:
+    def __init__(self):
+        # (sort key, seq) kept sorted by price-time priority, best first
+        self.bids = []
+        self.asks = []
+
+    def side(self, buy_sell):
+        return self.bids if buy_sell == OrderTypeEnum.BUY else self.asks
+
+    @staticmethod
+    def key(order):
+        price = -order.limit_price if order.buy_sell == OrderTypeEnum.BUY else order.limit_price
+        return price, order.seq
+
+    def add(self, order):
+        bisect.insort(self.side(order.buy_sell), (self.key(order), order))
+
+    def remove(self, order):
+        side = self.side(order.buy_sell)
+        index = bisect.bisect_left(side, (self.key(order),))
+        if index < len(side) and side[index][1] is order:
+            del side[index]
+
+
+class MatchingEngine:
+    """
+    In-memory P2P exchange: accounts with balances, one order book per currency pair and price-time priority
+    matching. Trades execute at the resting order price, commission is charged in the bought currency. All methods
+    return API-shaped results and raise SimulatorError for API errors.
+
+        engine = MatchingEngine()
+        engine.add_account('API_KEY', {'EUR': 1000, 'PLN': 5000})
+        engine.seed_book('EURPLN', Decimal('4.5'))
+    """
+
+    def __init__(self, *, commission_rate=Decimal('0.002'), currency_pairs=CURRENCY_PAIRS, clock=time.time_ns):
+        self.commission_rate = Decimal(commission_rate)
+        self._currency_pairs = set(currency_pairs)
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._accounts: Dict[str, _Account] = {}
+        self._books: Dict[str, _Book] = {}
+        self._orders: Dict[str, _Order] = {}
+        self._seq = itertools.count()
+        self._history_ids = itertools.count(1)
+        self._last_ts = 0
+
+    def _now(self):
+        # strictly increasing in microseconds, the resolution clients parse timestamps with, so submitTs based
+        # pagination never skips orders
+        self._last_ts = max(self._clock() // 1000 * 1000, self._last_ts + 1000)
+        return self._last_ts
+
+    def add_account(self, api_key, balances=None):
+        with self._lock:
+            self._accounts[api_key] = _Account(balances or {})
+
+    def _account(self, api_key) -> _Account:
+        account = self._accounts.get(api_key)
+        if account is None:
+            raise SimulatorError('INVALID_API_KEY', 'Unknown API key', 401)
+        return account
+
+    def _pair(self, currency_pair) -> OrderCurrencyPair:
+        if currency_pair not in self._currency_pairs:
+            raise SimulatorError('INVALID_PARAMETER', f'Unsupported currency pair {currency_pair}')
+        return OrderCurrencyPair(currency_pair)
+
+    def seed_book(self, currency_pair, mid_price, *, levels=10, step=Decimal('0.0010'), volume=Decimal(1000)):
+        """
+        Places levels of bids and asks around mid_price on behalf of a market maker with unlimited funds.
+        """
+        pair = self._pair(currency_pair)
+        mid_price, step, volume = Decimal(mid_price), Decimal(step), Decimal(volume)
+        with self._lock:
+            if MARKET_MAKER not in self._accounts:
+                self.add_account(MARKET_MAKER)
+            market_maker = self._accounts[MARKET_MAKER]
+            for level in range(1, levels + 1):
+                for buy_sell, price in ((OrderTypeEnum.BUY, mid_price - step * level),
+                                        (OrderTypeEnum.SELL, mid_price + step * level)):
+                    price = price.quantize(PRICE_QUANTUM)
+                    for currency, amount in ((pair.base, volume), (pair.counter, volume * price)):
+                        market_maker.balance(currency).total += amount
+                    self.submit_order(MARKET_MAKER, None, str(pair), str(buy_sell), volume, str(pair.base), price)
+
+    def get_balances(self, api_key) -> List[dict]:
+        with self._lock:
+            account = self._account(api_key)
+            return [dict(currency=str(currency), balanceTotal=str(balance.total),
+                         balanceAvailable=str(balance.available), balanceReserved=str(balance.reserved))
+                    for currency, balance in account.balances.items()]
+
+    def submit_order(self, api_key, submit_id, currency_pair, buy_sell, volume, volume_currency, limit_price,
+                     dry_run=False) -> dict:
+        pair = self._pair(currency_pair)
+        try:
+            buy_sell = OrderTypeEnum(buy_sell)
+            volume_currency = OrderCurrencyEnum(volume_currency)
+        except ValueError as e:
+            raise SimulatorError('INVALID_PARAMETER', str(e))
+        if volume_currency not in (pair.base, pair.counter):
+            raise SimulatorError('INVALID_PARAMETER', 'volumeCurrency must be one of the pair currencies')
+        volume = _decimal(volume, 'volume').quantize(AMOUNT_QUANTUM, ROUND_DOWN)
+        limit_price = _decimal(limit_price, 'limitPrice').quantize(PRICE_QUANTUM)
+        if not volume:
+            raise SimulatorError('INVALID_PARAMETER', 'volume is below the minimum')
+        with self._lock:
+            account = self._account(api_key)
+            if not dry_run and submit_id is not None:
+                if not submit_id:
+                    raise SimulatorError('MISSING_PARAMETER', 'submitId is required')
+                known = account.submit_ids.get(submit_id)
+                if known is not None:
+                    # same submitId never creates a second order
+                    return dict(orderId=known.order_id, submitId=known.submit_id)
+            order = _Order(account, api_key, submit_id, pair, buy_sell, volume, volume_currency, limit_price,
+                           self._now(), next(self._seq))
+            balance = account.balance(order.sold_currency)
+            if balance.available < order.reserved:
+                raise SimulatorError('INSUFFICIENT_FUNDS', f'Not enough {order.sold_currency} available')
+            if dry_run:
+                return dict(orderId=None, submitId=None)
+            balance.reserved += order.reserved
+            account.orders[order.order_id] = order
+            if submit_id is not None:
+                account.submit_ids[submit_id] = order
+            self._orders[order.order_id] = order
+            self._match(order)
+            return dict(orderId=order.order_id, submitId=order.submit_id)
+
+    def _match(self, taker: _Order):
+        book = self._books.setdefault(str(taker.pair), _Book())
+        opposite = book.side(OrderTypeEnum.SELL if taker.buy_sell == OrderTypeEnum.BUY else OrderTypeEnum.BUY)
+        while opposite:
+            maker = opposite[0][1]
+            price = maker.limit_price
+            if taker.buy_sell == OrderTypeEnum.BUY and price > taker.limit_price or \
+                    taker.buy_sell == OrderTypeEnum.SELL and price < taker.limit_price:
+                break
+            volume = min(maker.remaining_base(price), taker.remaining_base(price))
+            if volume <= 0:
+                break
+            ts = self._now()
+            if taker.buy_sell == OrderTypeEnum.BUY:
+                self._fill(taker, maker, volume, price, ts)
+            else:
+                self._fill(maker, taker, volume, price, ts)
+            if maker.remaining_base(maker.limit_price) <= 0:
+                del opposite[0]
+                self._close(maker, ts)
+        if taker.remaining_base(taker.limit_price) <= 0:
+            self._close(taker, taker.update_ts)
+        else:
+            book.add(taker)
+
+    def _fill(self, buyer: _Order, seller: _Order, volume, price, ts):
+        value = (volume * price).quantize(AMOUNT_QUANTUM)
+        for order, sold, bought in ((buyer, value, volume), (seller, volume, value)):
+            commission = (bought * self.commission_rate).quantize(AMOUNT_QUANTUM)
+            order.filled_base += volume
+            order.filled_counter += value
+            order.commission += commission
+            order.update_ts = ts
+            account = order.account
+            sold_balance = account.balance(order.sold_currency)
+            released = min(sold, order.reserved)
+            order.reserved -= released
+            sold_balance.reserved -= released
+            sold_balance.total -= sold
+            account.balance(order.bought_currency).total += bought - commission
+            for currency, amount in ((order.sold_currency, -sold), (order.bought_currency, bought - commission)):
+                account.history.append(dict(historyItemId=next(self._history_ids), ts=format_ts(ts),
+                                            operationAmount=str(amount),
+                                            balanceAfter=str(account.balance(currency).total),
+                                            currency=str(currency), operationType='MARKET_FX',
+                                            operationDetailedType='MARKET_FX', orderId=order.order_id,
+                                            submitId=order.submit_id))
+
+    def _close(self, order: _Order, ts):
+        order.status = OrderStatusEnum.CLOSED
+        order.update_ts = ts
+        order.account.balance(order.sold_currency).reserved -= order.reserved
+        order.reserved = Decimal(0)
+
+    def close_order(self, api_key, order_id) -> List[dict]:
+        with self._lock:
+            order = self._account(api_key).orders.get(order_id)
+            if order is None:
+                raise SimulatorError('ORDER_NOT_FOUND', f'Order {order_id} not found', 404)
+            if order.status == OrderStatusEnum.ACTIVE:
+                self._books[str(order.pair)].remove(order)
+                self._close(order, self._now())
+            return [order.to_dict(self.commission_rate)]
+
+    def get_order(self, api_key, order_id) -> List[dict]:
+        with self._lock:
+            order = self._account(api_key).orders.get(order_id)
+            return [order.to_dict(self.commission_rate)] if order is not None else []
+
+    def get_active_orders(self, api_key, item_limit=10, older_than=None) -> List[dict]:
+        """
+        :return: active orders newest first, submitted before older_than when given
+        """
+        older_than = _to_ns(older_than) if older_than else None
+        with self._lock:
+            orders = [order for order in self._account(api_key).orders.values() if
+                      order.status == OrderStatusEnum.ACTIVE and (older_than is None or order.submit_ts < older_than)]
+            orders.sort(key=lambda order: order.submit_ts, reverse=True)
+            return [order.to_dict(self.commission_rate) for order in orders[:item_limit]]
+
+    def get_best_offers(self, currency_pair, item_limit=10, *, detailed=False) -> dict:
+        pair = self._pair(currency_pair)
+        with self._lock:
+            book = self._books.get(str(pair)) or _Book()
+            result = dict(ts=format_ts(self._clock()), currencyPair=str(pair))
+            for name, side in (('bids', book.bids), ('asks', book.asks)):
+                levels = {}
+                for _, order in side:
+                    if order.limit_price not in levels and len(levels) == item_limit:
+                        break
+                    levels[order.limit_price] = levels.get(order.limit_price, 0) + \
+                        order.remaining_base(order.limit_price)
+                if detailed:
+                    result[name] = [dict(price=str(price), volume=str(volume),
+                                         valueInOppositeCurrency=str((price * volume).quantize(AMOUNT_QUANTUM)))
+                                    for price, volume in levels.items()]
+                else:
+                    result[name] = [dict(price=str(price)) for price in levels]
+            return result
+
+    def get_history(self, api_key, date_from=None, date_to=None, currencies=None, operation_type=None,
+                    item_limit=200, continue_from=None, sort_order='DESC') -> List[dict]:
+        date_from = _to_ns(date_from) if date_from else None
+        date_to = _to_ns(date_to) if date_to else None
+        currencies = set(currencies.split(',')) if currencies else None
+        continue_from = int(continue_from) if continue_from else None
+        ascending = sort_order == 'ASC'
+        with self._lock:
+            items = self._account(api_key).history
+            items = items if ascending else reversed(items)
+            result = []
+            for item in items:
+                if continue_from is not None and (item['historyItemId'] <= continue_from if ascending else
+                                                  item['historyItemId'] >= continue_from):
+                    continue
+                if currencies is not None and item['currency'] not in currencies or \
+                        operation_type is not None and item['operationType'] != operation_type:
+                    continue
+                if date_from is not None or date_to is not None:
+                    ts = _to_ns(item['ts'])
+                    if date_from is not None and ts < date_from or date_to is not None and ts >= date_to:
+                        continue
+                result.append(item)
+                if len(result) == item_limit:
+                    break
+            return result
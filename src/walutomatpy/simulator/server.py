@@ -0,0 +1,231 @@
+import base64
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from ..logger import logger
+from ..ratelimit import TokenBucket
+from .engine import MatchingEngine, SimulatorError
+
+
+def generate_key_pair():
+    """
+    :return: tuple of PEM encoded RSA private and public key for simulator accounts
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                    serialization.NoEncryption())
+    public_pem = key.public_key().public_bytes(serialization.Encoding.PEM,
+                                               serialization.PublicFormat.SubjectPublicKeyInfo)
+    return private_pem.decode(), public_pem.decode()
+
+
+class _SignatureVerifier:
+    def __init__(self, public_key):
+        from cryptography.exceptions import InvalidSignature
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding
+
+        if isinstance(public_key, str):
+            public_key = public_key.encode()
+        self._key = serialization.load_pem_public_key(public_key)
+        self._padding = padding.PKCS1v15()
+        self._algorithm = hashes.SHA256()
+        self._invalid_signature = InvalidSignature
+
+    def verify(self, signature, data) -> bool:
+        try:
+            self._key.verify(base64.b64decode(signature), data, self._padding, self._algorithm)
+        except (self._invalid_signature, ValueError):
+            return False
+        return True
+
+
+def _param(params, name, default=None):
+    values = params.get(name)
+    return values[0] if values else default
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: '_HTTPServer'
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def log_message(self, format, *args):
+        logger.debug(f'Simulator: {format % args}')
+
+    def _handle(self, method):
+        simulator = self.server.simulator
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+        try:
+            api_key = simulator.authenticate(method, self.path, self.headers, body)
+            simulator.throttle(api_key)
+            response = simulator.dispatch(api_key, method, self.path, body)
+            status = 200
+        except SimulatorError as e:
+            response, status = e.to_response(), e.status
+        except Exception as e:
+            logger.exception(f'Simulator failed on {method} {self.path}')
+            response, status = dict(success=False, errors=[dict(key='INTERNAL_ERROR', description=str(e))]), 500
+        content = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, simulator):
+        super().__init__(address, _Handler)
+        self.simulator = simulator
+
+
+class SimulatorServer:
+    """
+    Local stand-in for Walutomat API v2.0.0 served over plain HTTP, backed by MatchingEngine. Requests are
+    authenticated by API key and signature, and may be slowed down, failed at random or rate limited per API key to
+    mimic production under load.
+
+        with SimulatorServer(latency=0.02, rate_limit=(10, 20)) as server:
+            server.engine.seed_book('EURPLN', Decimal('4.5'))
+            api_key, private_key = server.create_account({'EUR': 1000, 'PLN': 5000})
+            client = WalutomatClient(api_key, private_key, base_url=server.base_url)
+    """
+
+    def __init__(self, engine: MatchingEngine = None, *, host='127.0.0.1', port=0, latency=0.0, latency_jitter=0.0,
+                 error_rate=0.0, rate_limit=None, verify_signatures=True, seed=None):
+        """
+        :param latency: seconds added to every response
+        :param latency_jitter: up to this many seconds added at random on top of latency
+        :param error_rate: probability of answering with a transient SERVICE_UNAVAILABLE error
+        :param rate_limit: (rate, burst) of requests per API key, exceeding requests get TOO_MANY_REQUESTS
+        """
+        self.engine = engine or MatchingEngine()
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.verify_signatures = verify_signatures
+        self._rate_limit = rate_limit
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._verifiers = {}
+        self._buckets = {}
+        self._httpd = _HTTPServer((host, port), self)
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def add_account(self, api_key, public_key, balances=None):
+        self._verifiers[api_key] = _SignatureVerifier(public_key)
+        self.engine.add_account(api_key, balances)
+
+    def create_account(self, balances=None):
+        """
+        Registers an account with a freshly generated key pair.
+        :return: tuple of API key and PEM encoded private key
+        """
+        api_key = str(uuid.uuid4())
+        private_key, public_key = generate_key_pair()
+        self.add_account(api_key, public_key, balances)
+        return api_key, private_key
+
+    def authenticate(self, method, path, headers, body) -> str:
+        api_key = headers.get('X-API-Key')
+        verifier = self._verifiers.get(api_key)
+        if verifier is None:
+            raise SimulatorError('INVALID_API_KEY', 'Unknown API key', 401)
+        if self.verify_signatures:
+            timestamp = headers.get('X-API-Timestamp', '')
+            if body:
+                data = f'{timestamp}{urlsplit(path).path}'.encode() + body
+            else:
+                data = f'{timestamp}{path}'.encode()
+            if not verifier.verify(headers.get('X-API-Signature', ''), data):
+                raise SimulatorError('INVALID_SIGNATURE', 'Signature verification failed', 401)
+        return api_key
+
+    def throttle(self, api_key):
+        delay = self.latency + (self._random.uniform(0, self.latency_jitter) if self.latency_jitter else 0)
+        if delay:
+            time.sleep(delay)
+        with self._lock:
+            if self._rate_limit is not None:
+                bucket = self._buckets.get(api_key)
+                if bucket is None:
+                    bucket = self._buckets[api_key] = TokenBucket(*self._rate_limit)
+                if bucket.try_take():
+                    raise SimulatorError('TOO_MANY_REQUESTS', 'Rate limit exceeded', 429)
+            failed = self.error_rate and self._random.random() < self.error_rate
+        if failed:
+            raise SimulatorError('SERVICE_UNAVAILABLE', 'Simulated transient error', 503)
+
+    def dispatch(self, api_key, method, path, body) -> dict:
+        parsed = urlsplit(path)
+        params = parse_qs(body.decode() if body else parsed.query)
+        engine = self.engine
+        endpoint = (method, parsed.path)
+        if endpoint == ('GET', '/api/v2.0.0/account/balances'):
+            result = engine.get_balances(api_key)
+        elif endpoint == ('GET', '/api/v2.0.0/account/history'):
+            result = engine.get_history(api_key, _param(params, 'dateFrom'), _param(params, 'dateTo'),
+                                        _param(params, 'currencies'), _param(params, 'operationType'),
+                                        int(_param(params, 'itemLimit', 200)), _param(params, 'continueFrom'),
+                                        _param(params, 'sortOrder', 'DESC'))
+        elif endpoint == ('GET', '/api/v2.0.0/market_fx/best_offers'):
+            result = engine.get_best_offers(_param(params, 'currencyPair'))
+        elif endpoint == ('GET', '/api/v2.0.0/market_fx/best_offers/detailed'):
+            result = engine.get_best_offers(_param(params, 'currencyPair'), int(_param(params, 'itemLimit', 10)),
+                                            detailed=True)
+        elif endpoint == ('GET', '/api/v2.0.0/market_fx/orders'):
+            result = engine.get_order(api_key, _param(params, 'orderId'))
+        elif endpoint == ('GET', '/api/v2.0.0/market_fx/orders/active'):
+            result = engine.get_active_orders(api_key, int(_param(params, 'itemLimit', 10)),
+                                              _param(params, 'olderThan'))
+        elif endpoint == ('POST', '/api/v2.0.0/market_fx/orders'):
+            result = engine.submit_order(api_key, _param(params, 'submitId', ''), _param(params, 'currencyPair'),
+                                         _param(params, 'buySell'), _param(params, 'volume'),
+                                         _param(params, 'volumeCurrency'), _param(params, 'limitPrice'),
+                                         _param(params, 'dryRun') == 'True')
+        elif endpoint == ('POST', '/api/v2.0.0/market_fx/orders/close'):
+            result = engine.close_order(api_key, _param(params, 'orderId') or _param(params, 'order_id'))
+        else:
+            raise SimulatorError('NOT_FOUND', f'Unknown endpoint {method} {parsed.path}', 404)
+        return dict(success=True, result=result)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name='walutomat-simulator', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,238 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from decimal import Decimal
+from enum import Enum
+from typing import List
+
+from .models.enums import OrderStatusEnum, OrderCurrencyPair
+from .models.order import WalutomatOrder, DATE_FMT, parse_timestamp
+from .wrapped import WrappedWalutomatClient
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS orders (
+    orderId TEXT PRIMARY KEY,
+    submitId TEXT,
+    submitTs INTEGER,
+    updateTs INTEGER,
+    status TEXT,
+    currencyPair TEXT,
+    buySell TEXT,
+    volumeCurrency TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS orders_submit_ts ON orders (submitTs);
+CREATE INDEX IF NOT EXISTS orders_update_ts ON orders (updateTs);
+CREATE INDEX IF NOT EXISTS orders_status ON orders (status);
+CREATE INDEX IF NOT EXISTS orders_currency_pair ON orders (currencyPair, submitTs);
+CREATE INDEX IF NOT EXISTS orders_volume_currency ON orders (volumeCurrency, submitTs);
+
+CREATE TABLE IF NOT EXISTS history (
+    historyItemId INTEGER PRIMARY KEY,
+    ts INTEGER,
+    currency TEXT,
+    operationType TEXT,
+    orderId TEXT,
+    raw TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_ts ON history (ts);
+CREATE INDEX IF NOT EXISTS history_currency ON history (currency, ts);
+CREATE INDEX IF NOT EXISTS history_operation_type ON history (operationType, ts);
+CREATE INDEX IF NOT EXISTS history_order_id ON history (orderId);
+'''
+
+
+def _to_micros(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = parse_timestamp(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1_000_000)
+
+
+def _serialize(value):
+    if isinstance(value, datetime):
+        # API format, parsed back by the fast path of parse_timestamp
+        return value.astimezone(timezone.utc).strftime(DATE_FMT)
+    if isinstance(value, (Decimal, Enum, OrderCurrencyPair)):
+        return str(value)
+    return value
+
+
+def _order_to_raw(order: WalutomatOrder) -> dict:
+    return {field: _serialize(getattr(order, field)) for field in WalutomatOrder.__dataclass_fields__
+            if getattr(order, field, None) is not None}
+
+
+class LocalStore:
+    """
+    SQLite mirror of orders and account history indexed by currency, pair, status and timestamps. Sync methods pull
+    only items newer than what's already stored.
+
+        store = LocalStore('walutomat.db')
+        store.sync_history(client)
+        store.find_history(currency='EUR', date_from=datetime(2022, 1, 1))
+    """
+
+    def __init__(self, path=':memory:'):
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def save_orders(self, orders):
+        rows = []
+        for order in orders:
+            if isinstance(order, dict):
+                order = WalutomatOrder(**order)
+            rows.append((order.orderId, getattr(order, 'submitId', None), _to_micros(getattr(order, 'submitTs', None)),
+                         _to_micros(getattr(order, 'updateTs', None)), str(getattr(order, 'status', '')),
+                         str(getattr(order, 'currencyPair', '')), str(getattr(order, 'buySell', '')),
+                         str(getattr(order, 'volumeCurrency', '')), json.dumps(_order_to_raw(order))))
+        with self._lock, self._db:
+            self._db.executemany('INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def save_order(self, order):
+        """
+        Stores a single order, can be registered as OrderWatcher listener.
+        """
+        self.save_orders([order])
+
+    def save_history(self, items):
+        rows = [(item['historyItemId'], _to_micros(item.get('ts')), item.get('currency'), item.get('operationType'),
+                 item.get('orderId'), json.dumps(item)) for item in items]
+        with self._lock, self._db:
+            self._db.executemany('INSERT OR REPLACE INTO history VALUES (?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def _scalar(self, query, args=()):
+        with self._lock:
+            return self._db.execute(query, args).fetchone()[0]
+
+    @property
+    def last_history_item_id(self):
+        return self._scalar('SELECT MAX(historyItemId) FROM history')
+
+    @property
+    def last_submit_ts(self):
+        return self._scalar('SELECT MAX(submitTs) FROM orders')
+
+    def sync_history(self, client, batch_size=500, **history_filters) -> int:
+        """
+        Fetches history items newer than the last stored historyItemId.
+        :return: number of new items
+        """
+        synced = 0
+        batch = []
+        items = client.get_account_history(continue_from=self.last_history_item_id, sort_order='ASC',
+                                           **history_filters)
+        for item in items:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                synced += self.save_history(batch)
+                batch = []
+        return synced + self.save_history(batch)
+
+    def sync_orders(self, client: WrappedWalutomatClient, *, refresh=True) -> int:
+        """
+        Fetches active orders submitted after the last stored submitTs, active orders are listed newest first so
+        listing stops at the first already known order. With refresh stored orders still marked active but no longer
+        listed are looked up one by one to record their final state, and so are orders referenced by stored history
+        items but never seen active, e.g. filled right on submission. Run sync_history() first to backfill those.
+        :return: number of stored orders
+        """
+        last_submit_ts = self.last_submit_ts
+        new_orders = []
+        listed = set()
+        for order in client.get_p2p_active_orders(item_limit=50):
+            listed.add(order.orderId)
+            if last_submit_ts is not None and _to_micros(order.submitTs) <= last_submit_ts:
+                if not refresh:
+                    break
+                continue
+            new_orders.append(order)
+        self.save_orders(new_orders)
+        if not refresh:
+            return len(new_orders)
+        with self._lock:
+            stale = [row[0] for row in self._db.execute('SELECT orderId FROM orders WHERE status = ?',
+                                                        (str(OrderStatusEnum.ACTIVE),))]
+            unseen = [row[0] for row in self._db.execute(
+                'SELECT DISTINCT orderId FROM history WHERE orderId IS NOT NULL '
+                'AND orderId NOT IN (SELECT orderId FROM orders)')]
+        updated = []
+        for order_id in stale + unseen:
+            if order_id not in listed:
+                updated.extend(client.get_p2p_order_by_id(order_id))
+        self.save_orders(updated)
+        return len(new_orders) + len(updated)
+
+    def get_order(self, order_id) -> WalutomatOrder:
+        with self._lock:
+            row = self._db.execute('SELECT raw FROM orders WHERE orderId = ?', (str(order_id),)).fetchone()
+        return WalutomatOrder(**json.loads(row[0])) if row else None
+
+    def find_orders(self, *, currency_pair=None, currency=None, status=None, submitted_from=None,
+                    submitted_to=None, updated_from=None) -> List[WalutomatOrder]:
+        """
+        :return: orders matching all given filters ordered by submitTs
+        """
+        conditions, args = [], []
+        for column, op, value in (('currencyPair', '=', currency_pair and str(currency_pair)),
+                                  ('volumeCurrency', '=', currency and str(currency)),
+                                  ('status', '=', status and str(status)),
+                                  ('submitTs', '>=', _to_micros(submitted_from)),
+                                  ('submitTs', '<', _to_micros(submitted_to)),
+                                  ('updateTs', '>=', _to_micros(updated_from))):
+            if value is not None:
+                conditions.append(f'{column} {op} ?')
+                args.append(value)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self._lock:
+            rows = self._db.execute(f'SELECT raw FROM orders {where} ORDER BY submitTs', args).fetchall()
+        return [WalutomatOrder(**json.loads(raw)) for raw, in rows]
+
+    def find_history(self, *, currency=None, operation_type=None, order_id=None, date_from=None,
+                     date_to=None) -> List[dict]:
+        """
+        :return: raw history items matching all given filters ordered by historyItemId
+        """
+        conditions, args = [], []
+        for column, op, value in (('currency', '=', currency and str(currency)),
+                                  ('operationType', '=', operation_type),
+                                  ('orderId', '=', order_id),
+                                  ('ts', '>=', _to_micros(date_from)),
+                                  ('ts', '<', _to_micros(date_to))):
+            if value is not None:
+                conditions.append(f'{column} {op} ?')
+                args.append(value)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self._lock:
+            rows = self._db.execute(f'SELECT raw FROM history {where} ORDER BY historyItemId', args).fetchall()
+        return [json.loads(raw) for raw, in rows]
+
+
+class StoredWalutomatClient(WrappedWalutomatClient):
+    """
+    WrappedWalutomatClient answering lookups of closed orders from LocalStore, closed orders never change so they
+    are fetched from the API only once.
+    """
+
+    def __init__(self, *args, store: LocalStore, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = store
+
+    def get_p2p_order_by_id(self, order_id) -> List[WalutomatOrder]:
+        order = self.store.get_order(order_id)
+        if order is not None and order.status == OrderStatusEnum.CLOSED:
+            return [order]
+        orders = super().get_p2p_order_by_id(order_id)
+        self.store.save_orders(orders)
+        return orders
@@ -1,45 +1,112 @@
-import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from decimal import Decimal
-from typing import List, Iterator
+from typing import List, Iterator, TYPE_CHECKING
 import math
+import time
+import weakref
 
 from .models.enums import OrderTypeEnum, OrderCurrencyPair, OrderCurrencyEnum
-from .models.enums import Offer
-from .models.order import WalutomatOrder
+from .models.enums import Offer, to_units, from_units, PRICE_SCALE, VOLUME_SCALE, VOLUME_EXPONENT
+from .models.order import WalutomatOrder, LazyWalutomatOrder
 from .models.account import AccountBalances
-from . import WrappedWalutomatClient
-from .exceptions import RetryError, MissingVolume
+from .logger import logger
+from .exceptions import RetryError, MissingVolume, WalutomatApiException
+from .watcher import OrderWatcher
+from .ledger import BalanceLedger, get_sold_amount
+from .orderbook import OrderBook
 
+if TYPE_CHECKING:
+    # requests is loaded with the client, not with the pricing helpers
+    from .wrapped import WrappedWalutomatClient
 
-def get_price_by_volume(offers: List[Offer], volume) -> float:
+
+def get_price_by_volume(offers: List[Offer], volume) -> Decimal:
     """
-    gets average price from list of offers
+    gets average price from list of offers, summed exactly in scaled integer units
     :param offers: sorted list of offers
     :param volume:
     :return:
     """
-    cum_volume = 0
-    cum_offers = []
+    volume_units = to_units(volume, VOLUME_SCALE)
+    cum_volume_units = 0
+    notional_units = 0
     for offer in offers:
-        missing_volume = volume - cum_volume
-        if offer.volume <= missing_volume:
-            cum_offers.append((offer.volume, offer.price))
-            cum_volume += offer.volume
-        else:
-            cum_offers.append((missing_volume, offer.price))
-            cum_volume += missing_volume
+        fill_units = min(offer.volume_units, volume_units - cum_volume_units)
+        notional_units += fill_units * offer.price_units
+        cum_volume_units += fill_units
+        if cum_volume_units == volume_units:
             break
-    missing_volume = volume - cum_volume
-    if missing_volume > 0:
-        raise MissingVolume(missing_volume)
-    avg_price = sum(map(lambda o: o[0] * o[1], cum_offers)) / cum_volume
-    return avg_price
+    missing_units = volume_units - cum_volume_units
+    if missing_units > 0:
+        raise MissingVolume(from_units(missing_units, VOLUME_EXPONENT))
+    return Decimal(notional_units) / (volume_units * PRICE_SCALE)
+
+
+@dataclass
+class OrderRequest:
+    order_type: OrderTypeEnum
+    currency_pair: OrderCurrencyPair
+    volume: Decimal
+    volume_currency: OrderCurrencyEnum
+    price_limit: Decimal
+    # sent as submitId, lets the client's RetryPolicy find an order placed by a failed attempt
+    submit_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+
+
+@dataclass
+class OrderResult:
+    request: OrderRequest = None
+    order_id: str = None
+    order: WalutomatOrder = None
+    error: Exception = None
+
+    @property
+    def ok(self):
+        return self.error is None
 
 
 class WalutomatTrader:
-    def __init__(self, client: WrappedWalutomatClient):
+    default_depth = 10
+    # fraction of levels fetched on top of the estimated number of levels needed to fill the volume
+    depth_headroom = 1.2
+
+    def __init__(self, client: 'WrappedWalutomatClient', *, order_watcher: OrderWatcher = None,
+                 ledger: BalanceLedger = None, order_book_ttl=1.0, clock=time.monotonic):
+        """
+        :param order_watcher: shared OrderWatcher used by watch_order() and wait_to_fill_order(), created on first use
+                              when not given
+        :param ledger: BalanceLedger used instead of fetching balances before every all-balance order, orders issued
+                       by the trader are then watched to keep it up to date
+        :param order_book_ttl: seconds the deepest order book fetched per pair answers pricing calls, 0 disables
+        """
         self._client = client
+        self._order_watcher = None
+        self._ledger = ledger
+        self._depth_hints = {}
+        self._order_book_ttl = order_book_ttl
+        self._clock = clock
+        # currency pair -> (order book, requested depth, fetched at)
+        self._order_books = {}
+        self._lazy_orders = weakref.WeakValueDictionary()
+        if order_watcher is not None:
+            self._set_order_watcher(order_watcher)
+
+    def _set_order_watcher(self, order_watcher: OrderWatcher):
+        self._order_watcher = order_watcher
+        order_watcher.add_listener(self._fill_lazy_order)
+        if self._ledger is not None:
+            order_watcher.add_listener(self._ledger.apply_order)
+
+    def _fill_lazy_order(self, order: WalutomatOrder):
+        lazy_order = self._lazy_orders.get(order.orderId)
+        if lazy_order is not None:
+            lazy_order.set_order(order)
+
+    def _get_known_order(self, order_id) -> WalutomatOrder:
+        order = self._order_watcher.get_order(order_id) if self._order_watcher is not None else None
+        return order if order is not None else self.get_order_by_id(order_id)
 
     def get_order_by_id(self, order_id):
         orders = self._client.get_p2p_order_by_id(order_id)
@@ -50,15 +117,131 @@ class WalutomatTrader:
                     currency_pair: OrderCurrencyPair,
                     volume,
                     volume_currency: OrderCurrencyEnum,
-                    price_limit) -> WalutomatOrder:
+                    price_limit,
+                    *,
+                    lazy=False) -> WalutomatOrder:
+        """
+        :param lazy: return LazyWalutomatOrder right after submission instead of fetching the order, it's fetched on
+                     first access of a field not known from submit parameters or filled in by the order watcher
+        """
         order_id = uuid.uuid4()
-        walutomat_order_id = self._client.submit_p2p_order(str(order_id), currency_pair, order_type, volume,
-                                                           volume_currency,
-                                                           price_limit)
+        try:
+            walutomat_order_id = self._client.submit_p2p_order(str(order_id), currency_pair, order_type, volume,
+                                                               volume_currency,
+                                                               price_limit)
+        except WalutomatApiException:
+            if self._ledger is not None:
+                # e.g. insufficient funds, local balances can't be trusted
+                self._ledger.invalidate()
+            raise
+        if self._ledger is not None:
+            sold_currency, amount = get_sold_amount(order_type, currency_pair, volume, volume_currency, price_limit)
+            self._ledger.reserve(walutomat_order_id, sold_currency, amount)
+        if lazy:
+            order = LazyWalutomatOrder(walutomat_order_id, str(order_id), self._get_known_order,
+                                       currencyPair=currency_pair, buySell=order_type, volume=volume,
+                                       volumeCurrency=volume_currency, limitPrice=price_limit)
+            self._lazy_orders[str(walutomat_order_id)] = order
+            if self._ledger is not None:
+                self.watch_order(walutomat_order_id)
+            return order
         order = self.get_order_by_id(walutomat_order_id)
+        if self._ledger is not None:
+            self._ledger.apply_order(order)
+            self.watch_order(walutomat_order_id)
         return order
 
+    def submit_many(self, orders: List[OrderRequest], *, max_workers=8, resolve=True) -> List[OrderResult]:
+        """
+        Submits orders concurrently, at most max_workers at a time. Failed submissions are retried only by the
+        client's RetryPolicy, which keeps the submitId of the request. With resolve, submitted orders are fetched in
+        one batched follow-up: a single active orders listing plus lookups of orders which are no longer active.
+        Orders which could not be looked up keep order set to None. With a ledger, submitted orders are reserved and
+        watched as in issue_order().
+
+        :return: result per order in the same order, errors are returned instead of raised
+        """
+        orders = list(orders)
+        if not orders:
+            return []
+        from requests import RequestException
+
+        def submit(request: OrderRequest) -> OrderResult:
+            try:
+                order_id = self._client.submit_p2p_order(request.submit_id, request.currency_pair,
+                                                         request.order_type, request.volume,
+                                                         request.volume_currency, request.price_limit)
+            except RequestException as e:
+                return OrderResult(request, error=e)
+            except WalutomatApiException as e:
+                if self._ledger is not None:
+                    self._ledger.invalidate()
+                return OrderResult(request, error=e)
+            if self._ledger is not None:
+                sold_currency, amount = get_sold_amount(request.order_type, request.currency_pair,
+                                                        request.volume, request.volume_currency,
+                                                        request.price_limit)
+                self._ledger.reserve(order_id, sold_currency, amount)
+                self.watch_order(order_id)
+            return OrderResult(request, order_id=order_id)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(orders))) as executor:
+            results = list(executor.map(submit, orders))
+            if resolve:
+                self._resolve_orders([result for result in results if result.ok], executor)
+        return results
+
+    def _resolve_orders(self, results: List[OrderResult], executor):
+        if not results:
+            return
+        # orders are already placed, failed lookups leave order unset instead of losing the results
+        try:
+            active = {order.orderId: order for order in self._client.get_p2p_active_orders(item_limit=50)}
+        except Exception:
+            logger.exception('Listing active orders of submitted orders failed')
+            active = {}
+        missing = [result for result in results if result.order_id not in active]
+        for result in results:
+            result.order = active.get(result.order_id)
+
+        def get_order(order_id):
+            try:
+                orders = self._client.get_p2p_order_by_id(order_id)
+            except Exception:
+                logger.exception(f'Looking up submitted order {order_id} failed')
+                return None
+            return orders[0] if orders else None
+
+        for result, order in zip(missing, executor.map(get_order, [result.order_id for result in missing])):
+            result.order = order
+        if self._ledger is not None:
+            for result in results:
+                if result.order is not None:
+                    self._ledger.apply_order(result.order)
+
+    def cancel_many(self, order_ids, *, max_workers=8) -> List[OrderResult]:
+        """
+        Cancels orders concurrently, at most max_workers at a time.
+        :return: result per order id in the same order, errors are returned instead of raised
+        """
+        order_ids = list(order_ids)
+        if not order_ids:
+            return []
+        from requests import RequestException
+
+        def cancel(order_id) -> OrderResult:
+            try:
+                self.cancel(order_id)
+            except (RequestException, WalutomatApiException) as e:
+                return OrderResult(order_id=order_id, error=e)
+            return OrderResult(order_id=order_id)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(order_ids))) as executor:
+            return list(executor.map(cancel, order_ids))
+
     def get_account_balances(self):
+        if self._ledger is not None:
+            return self._ledger.get_balances()
         return self._client.get_account_balances()
 
     def sell_all_balance(self, currency_pair: OrderCurrencyPair, currency: OrderCurrencyEnum, price_limit) -> \
@@ -71,7 +254,7 @@ class WalutomatTrader:
         :param price_limit: should be price as BASE_CURRENCY:COUNTER_CURRENCY e.g. EURPLN=4.5797 price
         :return:
         """
-        balances = self._client.get_account_balances()
+        balances = self.get_account_balances()
         return self.issue_order(OrderTypeEnum.SELL, currency_pair, balances[currency].available, currency, price_limit)
 
     def buy_all_balance(self, currency_pair: OrderCurrencyPair, currency: OrderCurrencyEnum, price_limit) -> \
@@ -82,36 +265,103 @@ class WalutomatTrader:
                             same as when selling!
         :return:
         """
-        balances = self._client.get_account_balances()
+        balances = self.get_account_balances()
         counter_currency = currency_pair.counter
         volume_to_buy = balances[counter_currency].available / Decimal(price_limit)
         return self.issue_order(OrderTypeEnum.BUY, currency_pair, volume_to_buy, currency, price_limit)
 
     def cancel(self, order_id):
         self._client.cancel_p2p_order(order_id)
+        if self._ledger is not None:
+            self._ledger.release(order_id)
+
+    @property
+    def order_watcher(self) -> OrderWatcher:
+        if self._order_watcher is None:
+            self._set_order_watcher(OrderWatcher(self._client))
+        return self._order_watcher
+
+    def watch_order(self, order_id) -> Future:
+        """
+        :return: future resolved with WalutomatOrder when the order is executed or closed
+        """
+        self.order_watcher.start()
+        return self.order_watcher.watch(order_id)
+
+    def wait_to_fill_order(self, order_id, update_delay=None, *, timeout=None):
+        """
+        Blocks until the order is executed or closed, all waiting orders share the order watcher sweeps.
+        :param update_delay: ignored, kept for compatibility; polling interval is configured on the OrderWatcher
+        :return: True when the order got executed
+        """
+        order = self.watch_order(order_id).result(timeout)
+        return order.is_executed()
 
-    def wait_to_fill_order(self, order_id, update_delay=10):
-        while True:
-            order = self.get_order_by_id(order_id)
-            if order.is_executed():
-                return True
-            time.sleep(update_delay)
+    def get_order_book(self, pair: OrderCurrencyPair, depth) -> OrderBook:
+        """
+        :return: the deepest order book of the pair fetched within order_book_ttl when it covers depth, a fresh one
+                 otherwise
+        """
+        key = str(pair)
+        now = self._clock()
+        entry = self._order_books.get(key)
+        if entry is not None and now - entry[2] < self._order_book_ttl:
+            book, book_depth, _ = entry
+            # a book with fewer levels than requested holds the whole market
+            if book_depth >= depth or len(book.bids) < book_depth and len(book.asks) < book_depth:
+                return book
+        book = self._client.get_order_book(pair, depth)
+        if entry is None or now - entry[2] >= self._order_book_ttl or entry[1] <= depth:
+            self._order_books[key] = (book, depth, now)
+        return book
 
-    def get_best_price_per_volume(self, pair: OrderCurrencyPair, volume: int, *, item_limit=10):
+    def get_best_price_per_volume(self, pair: OrderCurrencyPair, volume: int, *, item_limit=None):
+        """
+        Depth of the order book to fetch is learned per pair from previous calls unless item_limit is given. When the
+        fetched book is too shallow the next depth is estimated from the missing volume and the average level size
+        seen so far, instead of blindly fetching more levels. Books come from get_order_book(), so a recent deeper
+        book answers without a request.
+
+        :raises RetryError: when volume can't be filled after retries or the whole book is too shallow
+        """
+        key = str(pair)
+        depth = item_limit or self._depth_hints.get(key, self.default_depth)
         retry = 3
         while retry:
-            bids, asks = self._client.get_p2p_best_offers_detailed(pair, item_limit)
+            book = self.get_order_book(pair, depth)
+            sides = (book.bids, book.asks)
             try:
-                best_bid = get_price_by_volume(bids, volume)
-                best_ask = get_price_by_volume(asks, volume)
-                return best_bid, best_ask
-            except MissingVolume:
-                # fetch 20% more orders to get enough volume
-                item_limit = math.ceil(1.2 * item_limit)
+                best_bid, best_ask = book.get_price_by_volume(volume)
+            except MissingVolume as e:
+                volume_units = to_units(volume, VOLUME_SCALE)
+                if any(side.total_volume_units < volume_units and len(side) < depth for side in sides):
+                    # API returned fewer levels than requested, there's nothing more to fetch
+                    raise RetryError() from e
+                needed = max(side.levels_for_volume(volume) for side in sides)
+                depth = max(depth + 1, math.ceil(self.depth_headroom * needed))
                 retry -= 1
                 continue
+            needed = max(side.levels_for_volume(volume) for side in sides)
+            self._depth_hints[key] = max(self.default_depth, math.ceil(self.depth_headroom * needed))
+            return best_bid, best_ask
         raise RetryError()
 
+    def get_best_prices_per_volumes(self, pair: OrderCurrencyPair, volumes, *, item_limit=10):
+        """
+        Prices a whole ladder of volumes from a single order book snapshot, requires numpy.
+
+        :param volumes: array like of volumes
+        :return: tuple of numpy arrays with average bid and ask prices, NaN where the fetched book is too shallow
+        """
+        book = self.get_order_book(pair, item_limit)
+        return book.get_prices_by_volumes(volumes)
+
+    def get_market_snapshot(self, pairs, depth=10):
+        """
+        :return: dict of OrderBook keyed by currency pair string, fetched concurrently
+        """
+        return self._client.get_market_snapshot(pairs, depth)
+
     def get_active_orders(self) -> Iterator[WalutomatOrder]:
         for order in self._client.get_p2p_active_orders():
             yield order
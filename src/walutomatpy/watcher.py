@@ -0,0 +1,148 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+from .logger import logger
+from .models.enums import OrderStatusEnum
+from .models.order import WalutomatOrder
+
+
+class OrderWatcher:
+    """
+    Tracks many orders with a single background thread. Each sweep lists active orders once and looks up only the
+    tracked orders which dropped out of the active list. The interval between sweeps starts at min_interval, is
+    multiplied by backoff after every sweep without changes up to max_interval and resets when anything changes.
+
+        watcher = OrderWatcher(client)
+        watcher.start()
+        future = watcher.watch(order_id)
+        order = future.result()
+    """
+
+    def __init__(self, client, *, min_interval=1.0, max_interval=30.0, backoff=1.5, item_limit=50):
+        """
+        :param client: WrappedWalutomatClient
+        """
+        self._client = client
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._backoff = backoff
+        self._item_limit = item_limit
+        self._interval = min_interval
+        self._futures: Dict[str, Future] = {}
+        self._orders: Dict[str, WalutomatOrder] = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def watch(self, order_id) -> Future:
+        """
+        :return: future resolved with WalutomatOrder when the order is executed or closed
+        """
+        order_id = str(order_id)
+        with self._lock:
+            future = self._futures.get(order_id)
+            if future is None:
+                future = self._futures[order_id] = Future()
+            self._interval = self._min_interval
+        self._wakeup.set()
+        return future
+
+    def unwatch(self, order_id):
+        with self._lock:
+            future = self._futures.pop(str(order_id), None)
+            self._orders.pop(str(order_id), None)
+        if future is not None:
+            future.cancel()
+
+    def add_listener(self, callback: Callable[[WalutomatOrder], None]):
+        """
+        :param callback: called with every changed state of a tracked order
+        """
+        self._listeners.append(callback)
+        return callback
+
+    def get_order(self, order_id) -> WalutomatOrder:
+        """
+        :return: last seen state of a tracked order or None
+        """
+        return self._orders.get(str(order_id))
+
+    def sweep(self) -> bool:
+        """
+        Refreshes all tracked orders once, a failed lookup of one order doesn't hold up the others.
+        :return: True when any tracked order changed
+        """
+        with self._lock:
+            tracked = list(self._futures)
+        if not tracked:
+            return False
+        active = {order.orderId: order for order in self._client.get_p2p_active_orders(self._item_limit)}
+        changed = False
+        for order_id in tracked:
+            order = active.get(order_id)
+            if order is None:
+                try:
+                    orders = self._client.get_p2p_order_by_id(order_id)
+                except Exception:
+                    # the order stays tracked and is looked up again on the next sweep
+                    logger.exception(f'Looking up watched order {order_id} failed')
+                    continue
+                if not orders:
+                    continue
+                order = orders[0]
+            if self._update(order_id, order):
+                changed = True
+        return changed
+
+    def _update(self, order_id, order) -> bool:
+        with self._lock:
+            previous = self._orders.get(order_id)
+            is_changed = previous is None or previous.completion != order.completion or \
+                previous.status != order.status
+            is_done = order.is_executed() or order.status == OrderStatusEnum.CLOSED
+            self._orders[order_id] = order
+            future = self._futures.pop(order_id, None) if is_done else None
+            if is_done:
+                self._orders.pop(order_id, None)
+        if is_changed:
+            for callback in self._listeners:
+                try:
+                    callback(order)
+                except Exception:
+                    logger.exception(f'Order listener {callback} failed on {order_id}')
+        if future is not None and future.set_running_or_notify_cancel():
+            future.set_result(order)
+        return is_changed
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='walutomat-order-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                changed = self.sweep()
+            except Exception:
+                logger.exception('Orders sweep failed')
+                changed = False
+            with self._lock:
+                if changed:
+                    self._interval = self._min_interval
+                else:
+                    self._interval = min(self._interval * self._backoff, self._max_interval)
+                interval = self._interval if self._futures else None
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
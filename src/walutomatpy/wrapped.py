@@ -1,33 +1,77 @@
-import uuid
-from decimal import Decimal
-from typing import List, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
-from .models.enums import Offer
-from .models.order import WalutomatOrder
 from .models.account import AccountBalances
-from . import WalutomatClient
+from .models.order import WalutomatOrder
+from .orderbook import OrderBook
+from .client import WalutomatClient
+from .conversion import ModelConversion, order_converter, history_converter
+# output modes and HISTORY_FIELDS used to live here
+from .conversion import OUTPUT_MODEL, OUTPUT_RAW, OUTPUT_TUPLE, HISTORY_FIELDS  # noqa: F401
 
 
-class WrappedWalutomatClient(WalutomatClient):
+class WrappedWalutomatClient(ModelConversion, WalutomatClient):
+    """
+    Client returning models. Bulk endpoints accept output='raw' to return API dicts or output='tuple' to return
+    plain tuples, both skipping model construction.
+    """
+
     def get_account_balances(self) -> AccountBalances:
-        result = super().get_account_balances()
-        return AccountBalances(result)
+        return self._to_balances(super().get_account_balances())
+
+    def get_account_history(self, date_from=None, date_to=None, currencies=None, operation_type=None, item_limit=200,
+                            continue_from=None, sort_order='DESC', *, output=OUTPUT_RAW):
+        """
+        :param output: raw (or model) for API dicts, tuple for values in HISTORY_FIELDS order
+        """
+        items = super().get_account_history(date_from, date_to, currencies, operation_type, item_limit,
+                                            continue_from, sort_order)
+        convert = history_converter(output)
+        return items if convert is None else map(convert, items)
+
+    def get_p2p_best_offers_detailed(self, currency_pair, item_limit=10, *, output=OUTPUT_MODEL) -> Tuple[List, List]:
+        """
+        :param output: model for sorted Offer lists, tuple for sorted (price, volume) lists, raw for the API dict
+        """
+        return self._to_offers(super().get_p2p_best_offers_detailed(currency_pair, item_limit), output)
+
+    def get_order_book(self, currency_pair, item_limit=10) -> OrderBook:
+        bids, asks, fetched_at = self._get_timestamped_offers(currency_pair, item_limit)
+        return OrderBook(bids, asks, timestamp=fetched_at)
+
+    def _get_timestamped_offers(self, currency_pair, item_limit):
+        """
+        :return: sorted bids, asks and wall clock time their request was sent
+        """
+        fetched_at = time.time()
+        bids, asks = self.get_p2p_best_offers_detailed(currency_pair, item_limit)
+        return bids, asks, fetched_at
+
+    def get_market_snapshot(self, currency_pairs, item_limit=10, *, max_workers=8) -> Dict[str, OrderBook]:
+        """
+        Fetches order books of all pairs concurrently over a bounded thread pool.
 
-    def get_p2p_best_offers_detailed(self, currency_pair, item_limit=10) -> Tuple[List, List]:
-        result = super().get_p2p_best_offers_detailed(currency_pair, item_limit)
-        bids = (Offer(offer['price'], offer['volume']) for offer in result.get('bids', []))
-        sorted_bids = sorted(bids, key=lambda o: o.price, reverse=True)
-        asks = (Offer(offer['price'], offer['volume']) for offer in result.get('asks', []))
-        sorted_asks = sorted(asks, key=lambda o: o.price)
-        return sorted_bids, sorted_asks
+        :return: dict of order books keyed by currency pair string, each with its fetch timestamp
+        """
+        currency_pairs = list(currency_pairs)
+        if not currency_pairs:
+            return {}
+        workers = min(max_workers, len(currency_pairs))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='walutomat-snapshot') as executor:
+            books = executor.map(lambda pair: self.get_order_book(pair, item_limit), currency_pairs)
+            return {str(pair): book for pair, book in zip(currency_pairs, books)}
 
-    def get_p2p_active_orders(self, item_limit=10):
-        for result in super().get_p2p_active_orders(item_limit):
-            yield WalutomatOrder(**result)
+    def get_p2p_active_orders(self, item_limit=10, *, output=OUTPUT_MODEL):
+        """
+        :param output: model for WalutomatOrder, raw for API dicts, tuple for values in ORDER_FIELDS order
+        """
+        items = super().get_p2p_active_orders(item_limit)
+        convert = order_converter(output)
+        return items if convert is None else map(convert, items)
 
     def get_p2p_order_by_id(self, order_id) -> List[WalutomatOrder]:
-        result = super().get_p2p_order_by_id(order_id)
-        return list(WalutomatOrder(**raw_order) for raw_order in result)
+        return self._to_orders(super().get_p2p_order_by_id(order_id))
 
     def submit_p2p_order(self, order_id, currency_pair, buy_sell, volume, volume_currency, limit_price, dry=False):
         result = super().submit_p2p_order(order_id, currency_pair, buy_sell, volume, volume_currency, limit_price, dry)
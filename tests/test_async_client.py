@@ -0,0 +1,112 @@
+import asyncio
+from unittest import TestCase, IsolatedAsyncioTestCase
+from unittest.mock import Mock, patch, AsyncMock
+
+import aiohttp
+import requests
+
+from walutomatpy import AsyncWrappedWalutomatClient
+from walutomatpy import WalutomatOrder
+from walutomatpy import OrderCurrencyPair, OrderCurrencyEnum, OrderTypeEnum
+from walutomatpy.async_client import encode_params
+from walutomatpy.client import WalutomatApiException
+from walutomatpy.models.order import ORDER_FIELDS
+from walutomatpy.retry import RetryPolicy
+from walutomatpy.signing import Signer
+from walutomatpy.simulator import SimulatorServer
+
+from . import read_fixture
+
+
+class TestEncodeParams(TestCase):
+    def test_matches_requests_encoding(self):
+        pair = OrderCurrencyPair('EURPLN')
+        params = dict(currencyPair=pair, buySell=str(OrderTypeEnum.BUY), volume=100, volumeCurrency=pair.base,
+                      dryRun=False, submitId=None)
+        prepped = requests.Request('POST', 'https://example.com/', data=params).prepare()
+        self.assertEqual(encode_params(params), prepped.body)
+
+
+class TestAsyncWrappedWalutomatClient(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.signer_mock = Mock(spec=Signer)
+        self.signer_mock.sign_request.return_value = b'U0lH'
+        self.client = AsyncWrappedWalutomatClient('API_KEY', 'PRIVATE_KEY', signer=self.signer_mock)
+        p = patch.object(self.client, '_send', new_callable=AsyncMock)
+        self.send_mock = p.start()
+        self.addCleanup(p.stop)
+
+    async def test_account_balances(self):
+        self.send_mock.return_value = (200, dict(success=True, result=read_fixture('account_balances.json')))
+        balances = await self.client.get_account_balances()
+        self.assertEqual(balances[OrderCurrencyEnum.PLN].available, 150)
+        method, url, headers, body = self.send_mock.call_args.args
+        self.assertEqual(url, 'https://api.walutomat.pl/api/v2.0.0/account/balances')
+        self.assertEqual(headers['X-API-Signature'], 'U0lH')
+        self.signer_mock.sign_request.assert_called_with(headers['X-API-Timestamp'], '/api/v2.0.0/account/balances',
+                                                         None)
+
+    async def test_active_orders_pagination(self):
+        raw_order = read_fixture('order_result.json')
+        self.send_mock.side_effect = [(200, dict(success=True, result=[raw_order, raw_order])),
+                                      (200, dict(success=True, result=[raw_order]))]
+        orders = [order async for order in self.client.get_p2p_active_orders(item_limit=2)]
+        self.assertEqual(len(orders), 3)
+        self.assertIsInstance(orders[0], WalutomatOrder)
+        _, url, _, _ = self.send_mock.call_args.args
+        self.assertIn('olderThan=2018-02-02T10%3A06%3A01.111Z', url)
+
+    async def test_api_error(self):
+        self.send_mock.return_value = (400, dict(success=False, errors=[dict(key='ERR', description='Failed')]))
+        with self.assertRaises(WalutomatApiException) as ctx:
+            await self.client.get_p2p_order_by_id('ID')
+        self.assertEqual(ctx.exception.status_code, 400)
+
+    async def test_output_modes(self):
+        raw_order = read_fixture('order_result.json')
+        self.send_mock.return_value = (200, dict(success=True, result=[raw_order]))
+        orders = [order async for order in self.client.get_p2p_active_orders(output='raw')]
+        self.assertEqual(orders, [raw_order])
+        orders = [order async for order in self.client.get_p2p_active_orders(output='tuple')]
+        self.assertEqual(orders[0][ORDER_FIELDS.index('orderId')], raw_order['orderId'])
+
+    async def test_get_retried_by_policy(self):
+        self.client = AsyncWrappedWalutomatClient('API_KEY', 'PRIVATE_KEY', signer=self.signer_mock,
+                                                  retry_policy=RetryPolicy(3, base_delay=0))
+        send_mock = AsyncMock(side_effect=[aiohttp.ClientConnectionError(),
+                                           (200, dict(success=True, result=read_fixture('account_balances.json')))])
+        with patch.object(self.client, '_send', send_mock):
+            balances = await self.client.get_account_balances()
+        self.assertEqual(balances[OrderCurrencyEnum.PLN].available, 150)
+        self.assertEqual(send_mock.call_count, 2)
+
+
+class TestAsyncSubmitRetry(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.server = SimulatorServer().start()
+        self.addCleanup(self.server.stop)
+        api_key, private_key = self.server.create_account({'PLN': 100})
+        self.client = AsyncWrappedWalutomatClient(api_key, private_key, base_url=self.server.base_url,
+                                                  retry_policy=RetryPolicy(3, base_delay=0))
+
+    async def asyncTearDown(self) -> None:
+        await self.client.close()
+
+    async def test_lost_response_is_not_resubmitted(self):
+        send = self.client._send
+        posts = []
+
+        async def send_and_lose_first_submit(method, url, headers, body):
+            result = await send(method, url, headers, body)
+            if method == 'POST':
+                posts.append(result)
+                if len(posts) == 1:
+                    raise asyncio.TimeoutError()
+            return result
+
+        with patch.object(self.client, '_send', send_and_lose_first_submit):
+            order_id = await self.client.submit_p2p_order('submit-1', 'EURPLN', OrderTypeEnum.BUY, 10, 'EUR', '4.0')
+        orders = [order async for order in self.client.get_p2p_active_orders()]
+        self.assertEqual([order.orderId for order in orders], [order_id])
+        self.assertEqual(len(posts), 1)
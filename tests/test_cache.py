@@ -0,0 +1,78 @@
+import threading
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from walutomatpy import WalutomatClient
+from walutomatpy.cache import OffersCache, CachedWalutomatClient
+
+
+class TestOffersCache(TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.cache = OffersCache(ttl=1.0, clock=lambda: self.now)
+        self.fetch = Mock(side_effect=lambda depth: list(range(depth)))
+
+    def get(self, depth, pair='EURPLN'):
+        return self.cache.get('best_offers/detailed', pair, depth, self.fetch)
+
+    def test_fresh_entry_served_from_cache(self):
+        self.get(10)
+        self.now = 0.5
+        self.get(10)
+        self.assertEqual(self.fetch.call_count, 1)
+
+    def test_expired_entry_refetched(self):
+        self.get(10)
+        self.now = 1.0
+        self.get(10)
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_deeper_snapshot_answers_shallower_request(self):
+        self.get(20)
+        self.assertEqual(len(self.get(5)), 20)
+        self.get(30)
+        self.fetch.assert_called_with(30)
+        self.get(10, pair='USDPLN')
+        self.assertEqual(self.fetch.call_count, 3)
+
+    def test_concurrent_misses_share_fetch(self):
+        started, release = threading.Event(), threading.Event()
+
+        def slow_fetch(depth):
+            started.set()
+            release.wait()
+            return list(range(depth))
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(self.cache.get('best_offers/detailed', 'EURPLN', 10, slow_fetch)))
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=lambda: results.append(self.get(5))) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+        self.assertEqual(len(results), 4)
+        self.fetch.assert_not_called()
+
+    def test_failed_fetch_not_cached(self):
+        self.fetch.side_effect = [ValueError(), [1]]
+        with self.assertRaises(ValueError):
+            self.get(1)
+        self.assertEqual(self.get(1), [1])
+
+
+class TestCachedWalutomatClient(TestCase):
+    def test_order_book_carries_fetch_time_of_cached_snapshot(self):
+        client = CachedWalutomatClient('API_KEY', 'PRIVATE_KEY', offers_ttl=60)
+        result = dict(bids=[dict(price='4.4', volume='1')], asks=[dict(price='4.6', volume='1')])
+        with patch.object(WalutomatClient, 'get_p2p_best_offers_detailed', return_value=result) as fetch_mock:
+            with patch('walutomatpy.cache.time.time', return_value=100.0):
+                first = client.get_order_book('EURPLN', 5)
+            with patch('walutomatpy.wrapped.time.time', return_value=200.0):
+                second = client.get_order_book('EURPLN', 5)
+        self.assertEqual(fetch_mock.call_count, 1)
+        self.assertEqual(first.timestamp, 100.0)
+        self.assertEqual(second.timestamp, 100.0)
@@ -0,0 +1,98 @@
+import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from walutomatpy import WalutomatClient
+from walutomatpy import WrappedWalutomatClient
+from walutomatpy import WalutomatOrder
+from walutomatpy.decoding import get_json_decoder
+from walutomatpy.models.order import ORDER_FIELDS
+
+from . import read_fixture
+
+
+class TestAccountHistory(TestCase):
+    def test_pagination_follows_history_item_id(self):
+        client = WalutomatClient('API_KEY', 'PRIVATE_KEY')
+        pages = [dict(success=True, result=[dict(historyItemId=1), dict(historyItemId=2)]),
+                 dict(success=True, result=[dict(historyItemId=3)])]
+        with patch.object(client, 'request', side_effect=pages) as request_mock:
+            items = list(client.get_account_history(item_limit=2, sort_order='ASC'))
+        self.assertEqual([item['historyItemId'] for item in items], [1, 2, 3])
+        params = request_mock.call_args.kwargs['params']
+        self.assertEqual(params['continueFrom'], 2)
+        self.assertEqual(params['sortOrder'], 'ASC')
+
+
+class TestThreadSafety(TestCase):
+    def test_signer_created_once(self):
+        created = []
+        barrier = threading.Barrier(8)
+
+        def create_signer(private_key):
+            created.append(private_key)
+            return object()
+
+        client = WalutomatClient('API_KEY', 'PRIVATE_KEY')
+        with patch('walutomatpy.client.CryptographySigner', side_effect=create_signer):
+            with ThreadPoolExecutor(8) as executor:
+                signers = set(executor.map(lambda _: (barrier.wait(), client.signer)[1], range(8)))
+        self.assertEqual(len(signers), 1)
+        self.assertEqual(created, ['PRIVATE_KEY'])
+
+    def test_session_per_thread(self):
+        client = WalutomatClient('API_KEY', 'PRIVATE_KEY', pool_maxsize=32, session_per_thread=True)
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(client.session))
+        thread.start()
+        thread.join()
+        self.assertIsNot(sessions[0], client.session)
+        self.assertIs(client.session, client.session)
+        self.assertEqual(client.session.get_adapter('https://api.walutomat.pl')._pool_maxsize, 32)
+        client.close()
+
+    def test_sessions_of_finished_threads_are_closed(self):
+        client = WalutomatClient('API_KEY', 'PRIVATE_KEY', session_per_thread=True)
+        with patch('requests.Session.close', autospec=True) as close_mock:
+            for _ in range(4):
+                thread = threading.Thread(target=lambda: client.session)
+                thread.start()
+                thread.join()
+            del thread
+            gc.collect()
+            self.assertEqual(close_mock.call_count, 4)
+            # recorded calls keep the closed sessions alive
+            close_mock.reset_mock()
+        self.assertEqual(len(client._sessions), 0)
+
+
+class TestJsonDecoder(TestCase):
+    def test_decoders_agree(self):
+        document = b'{"success": true, "result": [{"price": "4.5", "volume": 1.25}]}'
+        expected = get_json_decoder('stdlib')(document)
+        self.assertEqual(get_json_decoder('auto')(document), expected)
+        self.assertEqual(get_json_decoder('orjson')(document), expected)
+
+
+class TestOutputModes(TestCase):
+    def setUp(self) -> None:
+        self.client = WrappedWalutomatClient('API_KEY', 'PRIVATE_KEY')
+        self.raw_order = read_fixture('order_result.json')
+
+    def test_active_orders(self):
+        with patch.object(self.client, 'request', return_value=dict(success=True, result=[self.raw_order])):
+            self.assertIsInstance(next(self.client.get_p2p_active_orders()), WalutomatOrder)
+            self.assertEqual(next(self.client.get_p2p_active_orders(output='raw')), self.raw_order)
+            order_tuple = next(self.client.get_p2p_active_orders(output='tuple'))
+        self.assertEqual(order_tuple[ORDER_FIELDS.index('orderId')], self.raw_order['orderId'])
+
+    def test_best_offers_detailed(self):
+        result = dict(bids=[dict(price='4.4', volume='1'), dict(price='4.5', volume='2')],
+                      asks=[dict(price='4.7', volume='1'), dict(price='4.6', volume='2')])
+        with patch.object(self.client, 'request', return_value=dict(success=True, result=result)):
+            bids, asks = self.client.get_p2p_best_offers_detailed('EURPLN', output='tuple')
+            self.assertEqual(self.client.get_p2p_best_offers_detailed('EURPLN', output='raw'), result)
+        self.assertEqual(bids, [(4.5, 2.0), (4.4, 1.0)])
+        self.assertEqual(asks, [(4.6, 2.0), (4.7, 1.0)])
@@ -0,0 +1,51 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from walutomatpy import WalutomatClient
+from walutomatpy.export import HistoryExporter, read_history
+
+
+def make_history(start, end):
+    return [dict(historyItemId=item_id, currency='EUR', operationAmount='1.00') for item_id in range(start, end)]
+
+
+class TestHistoryExporter(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'history.ndjson')
+        self.client_mock = MagicMock(spec=WalutomatClient)
+
+    def test_export_and_incremental_resume(self):
+        self.client_mock.get_account_history.return_value = iter(make_history(1, 8))
+        self.assertEqual(HistoryExporter(self.client_mock, self.path, batch_size=3).export(), 7)
+        self.client_mock.get_account_history.return_value = iter(make_history(8, 10))
+        self.assertEqual(HistoryExporter(self.client_mock, self.path, batch_size=3).export(), 2)
+        self.assertEqual(self.client_mock.get_account_history.call_args.kwargs['continue_from'], 7)
+        self.assertEqual([item['historyItemId'] for item in read_history(self.path)], list(range(1, 10)))
+
+    def test_interrupted_export_resumes_from_checkpoint(self):
+        def interrupted():
+            yield from make_history(1, 6)
+            raise ConnectionError()
+
+        self.client_mock.get_account_history.return_value = interrupted()
+        exporter = HistoryExporter(self.client_mock, self.path, batch_size=2)
+        with self.assertRaises(ConnectionError):
+            exporter.export()
+        self.assertEqual(exporter.load_checkpoint()['continueFrom'], 4)
+        self.client_mock.get_account_history.return_value = iter(make_history(5, 7))
+        exporter.export()
+        self.assertEqual([item['historyItemId'] for item in read_history(self.path)], list(range(1, 7)))
+        self.assertEqual(exporter.load_checkpoint()['count'], 6)
+
+    def test_refuses_to_overwrite_file_without_checkpoint(self):
+        with open(self.path, 'w') as fp:
+            fp.write('unrelated\n')
+        with self.assertRaises(FileExistsError):
+            HistoryExporter(self.client_mock, self.path).export()
+        with open(self.path) as fp:
+            self.assertEqual(fp.read(), 'unrelated\n')
+        self.client_mock.get_account_history.assert_not_called()
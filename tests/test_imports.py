@@ -0,0 +1,31 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+import walutomatpy
+
+HEAVY_MODULES = ('requests', 'OpenSSL', 'dateutil', 'aiohttp', 'numpy')
+
+
+def loaded_modules(statement):
+    code = f'{statement}\nimport sys\nprint(" ".join(sys.modules))'
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    return set(output.split())
+
+
+class TestLazyImports(TestCase):
+    def test_package_import_is_light(self):
+        modules = loaded_modules('import walutomatpy')
+        self.assertFalse(modules.intersection(HEAVY_MODULES))
+        self.assertNotIn('walutomatpy.client', modules)
+
+    def test_models_and_pricing_skip_transport(self):
+        modules = loaded_modules('from walutomatpy import OrderTypeEnum, WalutomatOrder\n'
+                                 'from walutomatpy.trader import get_price_by_volume')
+        self.assertFalse(modules.intersection(HEAVY_MODULES))
+
+    def test_public_names_resolve(self):
+        for name in walutomatpy.__all__:
+            self.assertIsNotNone(getattr(walutomatpy, name))
+        with self.assertRaises(AttributeError):
+            walutomatpy.NoSuchName
@@ -0,0 +1,43 @@
+from unittest import TestCase
+
+from walutomatpy import WrappedWalutomatClient, OrderTypeEnum
+from walutomatpy.client import WalutomatApiException
+from walutomatpy.instrumentation import MetricsRecorder, Histogram
+from walutomatpy.simulator import SimulatorServer
+
+
+class TestHistogram(TestCase):
+    def test_percentile_is_bucket_bound(self):
+        histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+        for value in (0.005, 0.05, 0.05, 0.5):
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(50), 0.1)
+        self.assertEqual(histogram.percentile(100), 1.0)
+        self.assertEqual(histogram.max, 0.5)
+
+
+class TestMetricsRecorder(TestCase):
+    def setUp(self) -> None:
+        self.server = SimulatorServer().start()
+        self.addCleanup(self.server.stop)
+        api_key, private_key = self.server.create_account({'PLN': 100})
+        self.metrics = MetricsRecorder()
+        self.client = WrappedWalutomatClient(api_key, private_key, base_url=self.server.base_url,
+                                             instrumentation=self.metrics)
+
+    def test_phases_recorded_per_endpoint(self):
+        self.client.get_account_balances()
+        metrics = self.metrics.snapshot()['GET /api/v2.0.0/account/balances']
+        self.assertEqual(set(metrics['latency']), {'sign', 'ttfb', 'transfer', 'decode', 'parse', 'total'})
+        self.assertEqual(metrics['counters'], {'requests': 1})
+
+    def test_pages_and_error_keys_counted(self):
+        for i in range(5):
+            self.client.submit_p2p_order(f'submit-{i}', 'EURPLN', OrderTypeEnum.BUY, 1, 'EUR', '4.0')
+        with self.assertRaises(WalutomatApiException):
+            self.client.submit_p2p_order('submit-5', 'EURPLN', OrderTypeEnum.BUY, 100, 'EUR', '4.0')
+        list(self.client.get_p2p_active_orders(item_limit=2))
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot['GET /api/v2.0.0/market_fx/orders/active']['counters'],
+                         {'requests': 3, 'pages': 3, 'items': 5})
+        self.assertEqual(snapshot['POST /api/v2.0.0/market_fx/orders']['counters']['error:INSUFFICIENT_FUNDS'], 1)
@@ -0,0 +1,136 @@
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from walutomatpy import WrappedWalutomatClient
+from walutomatpy import WalutomatOrder
+from walutomatpy import WalutomatTrader
+from walutomatpy import AccountBalances
+from walutomatpy import OrderCurrencyPair, OrderCurrencyEnum
+from walutomatpy.ledger import BalanceLedger
+from walutomatpy.watcher import OrderWatcher
+
+from . import read_fixture
+
+EUR, PLN = OrderCurrencyEnum.EUR, OrderCurrencyEnum.PLN
+
+
+def make_order(status='ACTIVE', completion=0, sold='0', bought='0', commission='0'):
+    raw_order = read_fixture('order_result.json')
+    raw_order.update(orderId='ID', status=status, completion=completion, buySell='SELL', volumeCurrency='EUR',
+                     soldAmount=sold, soldCurrency='EUR', boughtAmount=bought, boughtCurrency='PLN',
+                     commissionAmount=commission, commissionCurrency='PLN')
+    return WalutomatOrder(**raw_order)
+
+
+class TestBalanceLedger(TestCase):
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.client_mock = MagicMock(spec=WrappedWalutomatClient)
+        self.client_mock.get_account_balances.side_effect = \
+            lambda: AccountBalances(read_fixture('account_balances.json'))
+        self.ledger = BalanceLedger(self.client_mock, resync_interval=60, clock=lambda: self.now)
+
+    def test_synced_once_until_stale(self):
+        self.ledger.get_balances()
+        self.ledger.get_balances()
+        self.assertEqual(self.client_mock.get_account_balances.call_count, 1)
+        self.now = 60
+        self.ledger.get_balances()
+        self.assertEqual(self.client_mock.get_account_balances.call_count, 2)
+
+    def test_reserve_fill_and_release(self):
+        self.ledger.get_balances()
+        self.ledger.reserve('ID', EUR, Decimal('100'))
+        self.assertEqual(self.ledger[EUR].available, Decimal('100'))
+        self.ledger.apply_order(make_order(completion=40, sold='40', bought='180', commission='1'))
+        self.assertEqual(self.ledger[EUR].total, Decimal('260.33'))
+        self.assertEqual(self.ledger[EUR].reserved, Decimal('60'))
+        self.assertEqual(self.ledger[PLN].available, Decimal('329'))
+        self.ledger.apply_order(make_order(status='CLOSED', completion=40, sold='40', bought='180', commission='1'))
+        self.assertEqual(self.ledger[EUR].available, Decimal('160'))
+        self.assertEqual(self.ledger[EUR].reserved, Decimal('0'))
+
+    def test_resync_between_fills(self):
+        self.ledger.get_balances()
+        self.ledger.reserve('ID', EUR, Decimal('100'))
+        partially_filled = make_order(completion=40, sold='40', bought='180', commission='1')
+        self.client_mock.get_account_balances.side_effect = None
+        self.client_mock.get_account_balances.return_value = AccountBalances([
+            dict(currency='EUR', balanceTotal='260.33', balanceAvailable='200', balanceReserved='60'),
+            dict(currency='PLN', balanceTotal='349.34', balanceAvailable='329', balanceReserved='0')])
+        self.client_mock.get_p2p_active_orders.return_value = [partially_filled]
+        self.ledger.invalidate()
+        self.ledger.get_balances()
+        self.ledger.apply_order(partially_filled)
+        self.assertEqual(self.ledger[EUR].total, Decimal('260.33'))
+        self.assertEqual(self.ledger[EUR].reserved, Decimal('60'))
+        self.assertEqual(self.ledger[PLN].available, Decimal('329'))
+        self.ledger.apply_order(make_order(completion=70, sold='70', bought='315', commission='2'))
+        self.assertEqual(self.ledger[EUR].total, Decimal('230.33'))
+        self.assertEqual(self.ledger[EUR].reserved, Decimal('30'))
+        self.assertEqual(self.ledger[PLN].available, Decimal('463'))
+
+    def test_resync_drops_reservations_of_closed_orders(self):
+        self.ledger.get_balances()
+        self.ledger.reserve('ID', EUR, Decimal('100'))
+        self.client_mock.get_p2p_active_orders.return_value = []
+        self.ledger.invalidate()
+        self.ledger.get_balances()
+        self.ledger.release('ID')
+        self.assertEqual(self.ledger[EUR].available, Decimal('200'))
+
+    def test_reservation_made_during_sync_applied_to_snapshot(self):
+        self.ledger.get_balances()
+
+        def get_account_balances():
+            # order submitted by another thread while the snapshot is fetched
+            self.ledger.reserve('ID', EUR, Decimal('100'))
+            return AccountBalances(read_fixture('account_balances.json'))
+
+        self.client_mock.get_account_balances.side_effect = get_account_balances
+        self.ledger.invalidate()
+        self.ledger.get_balances()
+        self.assertEqual(self.ledger[EUR].available, Decimal('100'))
+        self.ledger.release('ID')
+        self.assertEqual(self.ledger[EUR].available, Decimal('200'))
+
+    def test_reservation_before_first_sync_recorded(self):
+        self.ledger.reserve('ID', EUR, Decimal('100'))
+        # the first snapshot already holds the reservation of the submitted order
+        self.client_mock.get_account_balances.side_effect = None
+        self.client_mock.get_account_balances.return_value = AccountBalances([
+            dict(currency='EUR', balanceTotal='300.33', balanceAvailable='100', balanceReserved='100')])
+        self.client_mock.get_p2p_active_orders.return_value = [make_order()]
+        self.assertEqual(self.ledger[EUR].available, Decimal('100'))
+        self.ledger.apply_order(make_order(status='CLOSED', completion=40, sold='40', bought='180', commission='1'))
+        self.assertEqual(self.ledger[EUR].total, Decimal('260.33'))
+        self.assertEqual(self.ledger[EUR].reserved, Decimal('0'))
+        self.assertEqual(self.ledger[EUR].available, Decimal('160'))
+
+    def test_balances_returned_as_copy(self):
+        self.ledger.get_balances()[EUR].available = Decimal(0)
+        self.assertEqual(self.ledger[EUR].available, Decimal('200'))
+
+    def test_mismatch_triggers_resync(self):
+        self.ledger.get_balances()
+        self.ledger.reserve('ID', EUR, Decimal('500'))
+        self.assertTrue(self.ledger.is_stale)
+        self.assertEqual(self.ledger[EUR].available, Decimal('200'))
+
+
+class TestTraderWithLedger(TestCase):
+    def test_all_balance_orders_use_ledger(self):
+        client_mock = MagicMock(spec=WrappedWalutomatClient)
+        client_mock.get_account_balances.return_value = AccountBalances(read_fixture('account_balances.json'))
+        client_mock.submit_p2p_order.return_value = 'ID'
+        client_mock.get_p2p_order_by_id.return_value = [make_order()]
+        ledger = BalanceLedger(client_mock)
+        trader = WalutomatTrader(client_mock, ledger=ledger, order_watcher=MagicMock(spec=OrderWatcher))
+        pair = OrderCurrencyPair('EURPLN')
+        trader.sell_all_balance(pair, EUR, 4.5)
+        self.assertEqual(ledger[EUR].available, 0)
+        trader.cancel('ID')
+        trader.sell_all_balance(pair, EUR, 4.5)
+        self.assertEqual(client_mock.get_account_balances.call_count, 1)
+        self.assertEqual(client_mock.submit_p2p_order.call_args.args[3], Decimal('200'))
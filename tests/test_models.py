@@ -1,10 +1,14 @@
 import unittest
+from datetime import timezone
 from decimal import Decimal
 
+from dateutil.parser import isoparse
+
 from . import read_fixture
 
 from walutomatpy import WalutomatOrder
-from walutomatpy import OrderCurrencyPair, OrderCurrencyEnum
+from walutomatpy import OrderCurrencyPair, OrderCurrencyEnum, OrderStatusEnum
+from walutomatpy.models.order import parse_timestamp
 from walutomatpy import AccountBalances
 
 
@@ -22,7 +26,20 @@ class TestWalutomatOrder(unittest.TestCase):
         datetime_str = '2022-08-03T09:50:16.692380437Z'
         raw_order = read_fixture('order_result.json')
         raw_order['updateTs'] = datetime_str
-        WalutomatOrder(**raw_order)
+        order = WalutomatOrder(**raw_order)
+        self.assertEqual(order.updateTs, isoparse(datetime_str))
+
+    def test_fast_timestamp_parser_matches_isoparse(self):
+        for datetime_str in ('2022-08-03T09:50:16.692380437Z', '2018-02-02T10:06:01.111Z', '2018-02-02T10:06:01Z',
+                             '2018-02-02T10:06:01.1Z', '2018-02-02T10:06:01+01:00'):
+            self.assertEqual(parse_timestamp(datetime_str), isoparse(datetime_str))
+        # fast path, isoparse returns dateutil tzutc
+        self.assertIs(parse_timestamp('2018-02-02T10:06:01.111Z').tzinfo, timezone.utc)
+
+    def test_order_has_no_instance_dict(self):
+        order = WalutomatOrder(**read_fixture('order_result.json'))
+        self.assertFalse(hasattr(order, '__dict__'))
+        self.assertEqual(order.status, OrderStatusEnum.ACTIVE)
 
 
 class TestAccountBalances(unittest.TestCase):
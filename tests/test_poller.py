@@ -0,0 +1,39 @@
+from decimal import Decimal
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from walutomatpy import WrappedWalutomatClient
+from walutomatpy import Offer
+from walutomatpy import OrderBook
+from walutomatpy.poller import MarketDataPoller
+
+
+class TestMarketDataPoller(TestCase):
+    def setUp(self) -> None:
+        self.client_mock = MagicMock(spec=WrappedWalutomatClient)
+        self.poller = MarketDataPoller(self.client_mock, {'EURPLN': 1.0})
+        self.diffs = []
+        self.poller.subscribe(self.diffs.append)
+
+    def poll(self, bids, asks):
+        self.client_mock.get_order_book.return_value = OrderBook(bids, asks)
+        return self.poller.poll_once('EURPLN')
+
+    def test_first_snapshot_publishes_all_levels(self):
+        diff = self.poll([Offer(4.5, 10), Offer(4.4, 20)], [Offer(4.6, 10)])
+        self.assertEqual(diff.bids, [(Decimal('4.5'), 10), (Decimal('4.4'), 20)])
+        self.assertTrue(diff.best_bid_changed and diff.best_ask_changed)
+        self.assertEqual(self.diffs, [diff])
+
+    def test_only_changed_levels_published(self):
+        self.poll([Offer(4.5, 10), Offer(4.4, 20)], [Offer(4.6, 10)])
+        diff = self.poll([Offer(4.5, 10), Offer(4.3, 20)], [Offer(4.6, 15)])
+        self.assertEqual(diff.bids, [(Decimal('4.3'), 20), (Decimal('4.4'), 0)])
+        self.assertEqual(diff.asks, [(Decimal('4.6'), 15)])
+        self.assertFalse(diff.best_bid_changed)
+        self.assertFalse(diff.best_ask_changed)
+
+    def test_unchanged_book_not_published(self):
+        self.poll([Offer(4.5, 10)], [Offer(4.6, 10)])
+        self.poll([Offer(4.5, 10)], [Offer(4.6, 10)])
+        self.assertEqual(len(self.diffs), 1)
@@ -0,0 +1,36 @@
+from unittest import TestCase
+from decimal import Decimal
+
+from walutomatpy import WalutomatClientPool, OrderCurrencyEnum
+from walutomatpy.simulator import SimulatorServer
+
+
+class TestWalutomatClientPool(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = SimulatorServer().start()
+        cls.credentials = {f'account-{index}': cls.server.create_account({'EUR': index}) for index in range(3)}
+        cls.server.engine.add_account('unknown')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.server.stop()
+
+    def test_balances_gathered_per_account(self):
+        with WalutomatClientPool(self.credentials, max_workers=4, base_url=self.server.base_url) as pool:
+            balances = pool.get_account_balances()
+            self.assertTrue(all(client.session is pool.session for client in pool.clients.values()))
+        self.assertEqual({name: result[OrderCurrencyEnum.EUR].total for name, result in balances.items()},
+                         {'account-0': Decimal(0), 'account-1': Decimal(1), 'account-2': Decimal(2)})
+
+    def test_errors_returned_per_account(self):
+        credentials = dict(self.credentials, broken=('unknown', self.credentials['account-0'][1]))
+        with WalutomatClientPool(credentials, base_url=self.server.base_url) as pool:
+            orders = pool.get_p2p_active_orders()
+        self.assertIsInstance(orders['broken'], Exception)
+        self.assertEqual(orders['account-1'], [])
+
+    def test_process_pool_signing(self):
+        with WalutomatClientPool(self.credentials, signing_processes=1, base_url=self.server.base_url) as pool:
+            history = pool.get_account_history(accounts=['account-2'])
+        self.assertEqual(history, {'account-2': []})
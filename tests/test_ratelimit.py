@@ -0,0 +1,87 @@
+import threading
+import time
+from unittest import TestCase
+
+from walutomatpy.ratelimit import RateLimiter, TokenBucket, get_endpoint_group
+
+
+class TestEndpointGroups(TestCase):
+    def test_order_submission_and_reads_differ(self):
+        self.assertEqual(get_endpoint_group('POST', '/api/v2.0.0/market_fx/orders'), 'orders_write')
+        self.assertEqual(get_endpoint_group('GET', '/api/v2.0.0/market_fx/orders'), 'orders_read')
+        self.assertEqual(get_endpoint_group('GET', '/api/v2.0.0/account/history'), 'history')
+
+
+class TestTokenBucket(TestCase):
+    def test_refill(self):
+        now = [0.0]
+        bucket = TokenBucket(2, 2, clock=lambda: now[0])
+        self.assertEqual(bucket.try_take(), 0)
+        self.assertEqual(bucket.try_take(), 0)
+        self.assertAlmostEqual(bucket.try_take(), 0.5)
+        now[0] = 0.5
+        self.assertEqual(bucket.try_take(), 0)
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError('condition not met in time')
+        time.sleep(0.001)
+
+
+class TestRateLimiter(TestCase):
+    # a power of two keeps clock steps exact, the real waits of queued requests are 1 / rate seconds
+    RATE = 128
+
+    def setUp(self) -> None:
+        self.now = 0.0
+        self.served = []
+        self.lock = threading.Lock()
+
+    def clock(self):
+        return self.now
+
+    def start_request(self, limiter, method, uri):
+        def request():
+            waited = limiter.acquire(method, uri)
+            with self.lock:
+                self.served.append((uri, waited))
+
+        thread = threading.Thread(target=request)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        return thread
+
+    def test_orders_overtake_history(self):
+        limiter = RateLimiter(self.RATE, 1, clock=self.clock)
+        limiter.acquire('GET', '/api/v2.0.0/account/history')
+        for queued in range(1, 4):
+            self.start_request(limiter, 'GET', '/api/v2.0.0/account/history')
+            wait_until(lambda: limiter.queued() == queued)
+        self.start_request(limiter, 'POST', '/api/v2.0.0/market_fx/orders')
+        wait_until(lambda: limiter.queued() == 4)
+        for served in range(1, 5):
+            # exactly one token per step goes to the head of the queue
+            self.now += 1 / self.RATE
+            wait_until(lambda: len(self.served) == served)
+        self.assertEqual([uri for uri, _ in self.served],
+                         ['/api/v2.0.0/market_fx/orders'] + ['/api/v2.0.0/account/history'] * 3)
+        self.assertEqual(self.served[0][1], 1 / self.RATE)
+        stats = limiter.stats()
+        self.assertEqual(stats['history'].count, 4)
+        self.assertEqual(stats['orders_write'].count, 1)
+
+    def test_group_limit(self):
+        limiter = RateLimiter(self.RATE, 100, group_limits={'history': (self.RATE, 1)}, clock=self.clock)
+        self.assertEqual(limiter.acquire('GET', '/api/v2.0.0/account/history'), 0)
+        history = self.start_request(limiter, 'GET', '/api/v2.0.0/account/history')
+        wait_until(lambda: limiter.queued() == 1)
+        # other groups are not held by the throttled one
+        self.assertEqual(limiter.acquire('GET', '/api/v2.0.0/market_fx/best_offers'), 0)
+        self.assertEqual(limiter.queued(), 1)
+        self.assertEqual(self.served, [])
+        self.now += 1 / self.RATE
+        history.join(5)
+        self.assertEqual(self.served, [('/api/v2.0.0/account/history', 1 / self.RATE)])
@@ -0,0 +1,97 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import requests
+
+from walutomatpy import WrappedWalutomatClient, OrderTypeEnum
+from walutomatpy.client import WalutomatApiException
+from walutomatpy.retry import RetryPolicy
+from walutomatpy.simulator import SimulatorServer
+
+
+def api_error(status_code, key):
+    return WalutomatApiException(Mock(), dict(errors=[dict(key=key)]), status_code)
+
+
+class TestRetryPolicy(TestCase):
+    def setUp(self) -> None:
+        self.sleep = Mock()
+        self.policy = RetryPolicy(3, base_delay=1, sleep=self.sleep, random_uniform=lambda low, high: high)
+
+    def test_retries_transient_errors_with_backoff(self):
+        func = Mock(side_effect=[requests.ConnectionError(), api_error(503, 'SERVICE_UNAVAILABLE'), 'result'])
+        self.assertEqual(self.policy.call(func), 'result')
+        self.assertEqual([call.args[0] for call in func.call_args_list], [0, 1, 2])
+        self.assertEqual([call.args[0] for call in self.sleep.call_args_list], [1, 2])
+
+    def test_client_errors_not_retried(self):
+        func = Mock(side_effect=api_error(400, 'INSUFFICIENT_FUNDS'))
+        with self.assertRaises(WalutomatApiException):
+            self.policy.call(func)
+        func.assert_called_once()
+
+    def test_deadline(self):
+        clock = Mock(side_effect=[0, 0.5, 2.5])
+        policy = RetryPolicy(5, base_delay=1, deadline=2, sleep=self.sleep, clock=clock,
+                             random_uniform=lambda low, high: high)
+        func = Mock(side_effect=requests.Timeout())
+        with self.assertRaises(requests.Timeout):
+            policy.call(func)
+        self.assertEqual(func.call_count, 2)
+
+
+class TestSubmitRetry(TestCase):
+    def setUp(self) -> None:
+        self.server = SimulatorServer().start()
+        self.addCleanup(self.server.stop)
+        api_key, private_key = self.server.create_account({'PLN': 100})
+        self.client = WrappedWalutomatClient(api_key, private_key, base_url=self.server.base_url,
+                                             retry_policy=RetryPolicy(3, sleep=lambda _: None))
+
+    def lose_first_submit(self, before_raise=None):
+        send = self.client.session.send
+        posts = []
+
+        def send_and_lose_first_submit(request, **kwargs):
+            response = send(request, **kwargs)
+            if request.method == 'POST':
+                posts.append(response)
+                if len(posts) == 1:
+                    if before_raise is not None:
+                        before_raise(response.json()['result']['orderId'])
+                    raise requests.ReadTimeout()
+            return response
+
+        self.client.session.send = send_and_lose_first_submit
+        return posts
+
+    def test_lost_response_of_active_order_is_not_resubmitted(self):
+        posts = self.lose_first_submit()
+        order_id = self.client.submit_p2p_order('submit-1', 'EURPLN', OrderTypeEnum.BUY, 10, 'EUR', '4.0')
+        orders = list(self.client.get_p2p_active_orders())
+        self.assertEqual([order.orderId for order in orders], [order_id])
+        self.assertEqual(len(posts), 1)
+
+    def test_lost_response_of_filled_order_is_not_resubmitted(self):
+        maker_key, _ = self.server.create_account({'EUR': 100})
+        self.server.engine.submit_order(maker_key, 'maker-1', 'EURPLN', 'SELL', 10, 'EUR', '4.0')
+        posts = self.lose_first_submit()
+        order_id = self.client.submit_p2p_order('submit-1', 'EURPLN', OrderTypeEnum.BUY, 10, 'EUR', '4.0')
+        self.assertEqual(len(posts), 1)
+        self.assertEqual(list(self.client.get_p2p_active_orders()), [])
+        self.assertEqual(self.client.get_p2p_order_by_id(order_id)[0].completion, 100)
+
+    def test_rejected_submit_is_not_looked_up(self):
+        posts = []
+        send = self.client.session.send
+
+        def reject_first_submit(request, **kwargs):
+            if request.method == 'POST' and not posts:
+                posts.append(request)
+                raise api_error(429, 'TOO_MANY_REQUESTS')
+            return send(request, **kwargs)
+
+        self.client.session.send = reject_first_submit
+        with patch.object(self.client, '_find_submitted_order') as find_mock:
+            self.client.submit_p2p_order('submit-1', 'EURPLN', OrderTypeEnum.BUY, 10, 'EUR', '4.0')
+        find_mock.assert_not_called()
@@ -0,0 +1,52 @@
+import base64
+from unittest import TestCase
+
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+from walutomatpy import WalutomatClient
+from walutomatpy.signing import CryptographySigner, OpenSSLSigner, SignatureTimestamp
+
+
+def generate_private_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption())
+    return key, pem.decode()
+
+
+class TestSigners(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.key, cls.pem = generate_private_key()
+
+    def verify(self, signature_base64, data):
+        self.key.public_key().verify(base64.b64decode(signature_base64), data, padding.PKCS1v15(), hashes.SHA256())
+
+    def test_signers_are_interchangeable(self):
+        args = ('2022-08-03T09:50:16Z', '/api/v2.0.0/market_fx/orders?orderId=1', None)
+        self.assertEqual(CryptographySigner(self.pem).sign_request(*args), OpenSSLSigner(self.pem).sign_request(*args))
+
+    def test_query_signed_without_body(self):
+        signature = CryptographySigner(self.pem).sign_request('TS', '/path?a=1', None)
+        self.verify(signature, b'TS/path?a=1')
+
+    def test_query_skipped_with_body(self):
+        signature = CryptographySigner(self.pem).sign_request('TS', '/path?a=1', 'b=2')
+        self.verify(signature, b'TS/pathb=2')
+
+    def test_client_signature_compatible(self):
+        client = WalutomatClient('API_KEY', self.pem)
+        signature = client.get_signature('https://api.walutomat.pl/api/v2.0.0/account/history?itemLimit=10', 'TS')
+        self.verify(signature, b'TS/api/v2.0.0/account/history?itemLimit=10')
+
+
+class TestSignatureTimestamp(TestCase):
+    def test_cached_per_second(self):
+        now = [1659520216.1]
+        timestamp = SignatureTimestamp(clock=lambda: now[0])
+        self.assertEqual(timestamp(), '2022-08-03T09:50:16Z')
+        now[0] = 1659520216.9
+        self.assertEqual(timestamp(), '2022-08-03T09:50:16Z')
+        now[0] = 1659520217.0
+        self.assertEqual(timestamp(), '2022-08-03T09:50:17Z')
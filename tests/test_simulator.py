@@ -0,0 +1,82 @@
+from unittest import TestCase
+from decimal import Decimal
+
+from walutomatpy import WrappedWalutomatClient, OrderTypeEnum, OrderStatusEnum, OrderCurrencyEnum
+from walutomatpy.client import WalutomatApiException
+from walutomatpy.simulator import MatchingEngine, SimulatorServer, SimulatorError, generate_key_pair
+
+
+class TestMatchingEngine(TestCase):
+    def setUp(self) -> None:
+        self.engine = MatchingEngine(commission_rate=0)
+        self.engine.add_account('maker', {'EUR': 1000, 'PLN': 10000})
+        self.engine.add_account('taker', {'EUR': 1000, 'PLN': 10000})
+
+    def test_price_time_priority(self):
+        first = self.engine.submit_order('maker', 'a', 'EURPLN', 'SELL', 10, 'EUR', '4.5')['orderId']
+        second = self.engine.submit_order('maker', 'b', 'EURPLN', 'SELL', 10, 'EUR', '4.5')['orderId']
+        better = self.engine.submit_order('maker', 'c', 'EURPLN', 'SELL', 10, 'EUR', '4.49')['orderId']
+        self.engine.submit_order('taker', 'd', 'EURPLN', 'BUY', 15, 'EUR', '4.5')
+        completion = {order_id: self.engine.get_order('maker', order_id)[0]['completion']
+                      for order_id in (first, second, better)}
+        self.assertEqual(completion, {better: 100, first: 50, second: 0})
+
+    def test_trade_settles_balances(self):
+        self.engine.submit_order('maker', 'a', 'EURPLN', 'SELL', 10, 'EUR', '4.5')
+        self.engine.submit_order('taker', 'b', 'EURPLN', 'BUY', 10, 'EUR', '4.6')
+        balances = {item['currency']: Decimal(item['balanceTotal']) for item in self.engine.get_balances('taker')}
+        self.assertEqual(balances, {'EUR': Decimal(1010), 'PLN': Decimal(9955)})
+        self.assertEqual(self.engine.get_active_orders('taker'), [])
+
+    def test_submit_id_is_idempotent(self):
+        first = self.engine.submit_order('maker', 'a', 'EURPLN', 'SELL', 10, 'EUR', '4.5')
+        second = self.engine.submit_order('maker', 'a', 'EURPLN', 'SELL', 10, 'EUR', '4.5')
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.engine.get_active_orders('maker')), 1)
+
+    def test_insufficient_funds(self):
+        with self.assertRaises(SimulatorError) as context:
+            self.engine.submit_order('maker', 'a', 'EURPLN', 'SELL', 2000, 'EUR', '4.5')
+        self.assertEqual(context.exception.key, 'INSUFFICIENT_FUNDS')
+
+
+class TestSimulatorServer(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.private_key, cls.public_key = generate_key_pair()
+
+    def setUp(self) -> None:
+        self.server = SimulatorServer(rate_limit=(100, 100)).start()
+        self.addCleanup(self.server.stop)
+        self.server.engine.seed_book('EURPLN', Decimal('4.5'), levels=3, volume=100)
+        self.server.add_account('API_KEY', self.public_key, {'EUR': 1000, 'PLN': 5000})
+        self.client = WrappedWalutomatClient('API_KEY', self.private_key, base_url=self.server.base_url)
+
+    def test_order_round_trip(self):
+        order_id = self.client.submit_p2p_order('submit-1', 'EURPLN', OrderTypeEnum.BUY, 150, 'EUR', '4.5020')
+        order, = self.client.get_p2p_order_by_id(order_id)
+        self.assertEqual(order.status, OrderStatusEnum.CLOSED)
+        self.assertEqual(order.soldAmount, Decimal('675.20'))
+        self.assertEqual(self.client.get_account_balances()[OrderCurrencyEnum.PLN].total, Decimal('4324.80'))
+
+    def test_active_orders_pagination(self):
+        for i in range(7):
+            self.client.submit_p2p_order(f'submit-{i}', 'EURPLN', OrderTypeEnum.BUY, 1, 'EUR', '4.0')
+        orders = list(self.client.get_p2p_active_orders(item_limit=3))
+        self.assertEqual(len({order.orderId for order in orders}), 7)
+
+    def test_invalid_signature_rejected(self):
+        other_key, _ = generate_key_pair()
+        client = WrappedWalutomatClient('API_KEY', other_key, base_url=self.server.base_url)
+        with self.assertRaises(WalutomatApiException) as context:
+            client.get_account_balances()
+        self.assertIn('INVALID_SIGNATURE', context.exception.short_str)
+
+    def test_rate_limit(self):
+        with SimulatorServer(rate_limit=(1, 1)) as server:
+            server.add_account('API_KEY', self.public_key)
+            client = WrappedWalutomatClient('API_KEY', self.private_key, base_url=server.base_url)
+            client.get_account_balances()
+            with self.assertRaises(WalutomatApiException) as context:
+                client.get_account_balances()
+        self.assertIn('TOO_MANY_REQUESTS', context.exception.short_str)
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from walutomatpy import WrappedWalutomatClient
+from walutomatpy import WalutomatOrder
+from walutomatpy import OrderCurrencyPair, OrderStatusEnum
+from walutomatpy.store import LocalStore
+
+from . import read_fixture
+
+
+def make_order(order_id, submit_ts, status='ACTIVE', pair='EURPLN'):
+    raw_order = read_fixture('order_result.json')
+    raw_order.update(orderId=order_id, submitTs=submit_ts, status=status, currencyPair=pair)
+    return WalutomatOrder(**raw_order)
+
+
+class TestLocalStore(TestCase):
+    def setUp(self) -> None:
+        self.store = LocalStore()
+        self.addCleanup(self.store.close)
+        self.client_mock = MagicMock(spec=WrappedWalutomatClient)
+
+    def test_order_roundtrip(self):
+        order = make_order('ID', '2022-08-03T09:50:16.692380437Z')
+        self.store.save_order(order)
+        stored = self.store.get_order('ID')
+        self.assertEqual(stored.submitTs, order.submitTs)
+        self.assertEqual(stored.currencyPair, order.currencyPair)
+        self.assertEqual(stored.volume, order.volume)
+
+    def test_find_orders(self):
+        self.store.save_orders([make_order('A', '2022-01-01T00:00:00Z'),
+                                make_order('B', '2022-02-01T00:00:00Z', pair='USDPLN'),
+                                make_order('C', '2022-03-01T00:00:00Z', status='CLOSED')])
+        self.assertEqual([o.orderId for o in self.store.find_orders(currency_pair=OrderCurrencyPair('EURPLN'))],
+                         ['A', 'C'])
+        self.assertEqual([o.orderId for o in self.store.find_orders(status=OrderStatusEnum.ACTIVE)], ['A', 'B'])
+        submitted_from = datetime(2022, 1, 15, tzinfo=timezone.utc)
+        self.assertEqual([o.orderId for o in self.store.find_orders(submitted_from=submitted_from)], ['B', 'C'])
+
+    def test_sync_history_is_incremental(self):
+        items = [dict(historyItemId=i, ts='2022-01-01T00:00:00Z', currency='EUR', operationType='MARKET_FX')
+                 for i in range(1, 4)]
+        self.client_mock.get_account_history.return_value = iter(items)
+        self.assertEqual(self.store.sync_history(self.client_mock), 3)
+        self.client_mock.get_account_history.return_value = iter([])
+        self.store.sync_history(self.client_mock)
+        self.assertEqual(self.client_mock.get_account_history.call_args.kwargs['continue_from'], 3)
+        self.assertEqual(len(self.store.find_history(currency='EUR')), 3)
+
+    def test_sync_orders_refreshes_finished(self):
+        self.client_mock.get_p2p_active_orders.return_value = [make_order('A', '2022-01-01T00:00:00Z')]
+        self.store.sync_orders(self.client_mock)
+        self.client_mock.get_p2p_active_orders.return_value = [make_order('B', '2022-02-01T00:00:00Z')]
+        self.client_mock.get_p2p_order_by_id.return_value = [make_order('A', '2022-01-01T00:00:00Z', 'CLOSED')]
+        self.assertEqual(self.store.sync_orders(self.client_mock), 2)
+        self.client_mock.get_p2p_order_by_id.assert_called_once_with('A')
+        self.assertEqual(self.store.get_order('A').status, OrderStatusEnum.CLOSED)
+
+    def test_sync_orders_backfills_orders_seen_only_in_history(self):
+        self.store.save_history([dict(historyItemId=1, ts='2022-01-01T00:00:00Z', currency='EUR',
+                                      operationType='MARKET_FX', orderId='FILLED')])
+        self.client_mock.get_p2p_active_orders.return_value = []
+        self.client_mock.get_p2p_order_by_id.return_value = [make_order('FILLED', '2022-01-01T00:00:00Z', 'CLOSED')]
+        self.assertEqual(self.store.sync_orders(self.client_mock), 1)
+        self.client_mock.get_p2p_order_by_id.assert_called_once_with('FILLED')
+        self.assertEqual(self.store.get_order('FILLED').status, OrderStatusEnum.CLOSED)
+        self.store.sync_orders(self.client_mock)
+        self.client_mock.get_p2p_order_by_id.assert_called_once()
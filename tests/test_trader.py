@@ -1,16 +1,19 @@
 from unittest import TestCase
 from unittest.mock import Mock, MagicMock, patch
 from decimal import Decimal
+import math
 
 import requests
 
 from walutomatpy import WrappedWalutomatClient
 from walutomatpy import WalutomatOrder
 from walutomatpy import AccountBalances
-from walutomatpy import WalutomatTrader
+from walutomatpy import WalutomatTrader, OrderRequest
 from walutomatpy import OrderCurrencyPair, OrderCurrencyEnum, OrderTypeEnum
 from walutomatpy import Offer
-from walutomatpy.trader import get_price_by_volume, MissingVolume
+from walutomatpy import OrderBook
+from walutomatpy import BalanceLedger
+from walutomatpy.trader import get_price_by_volume, MissingVolume, RetryError
 
 from . import read_fixture
 
@@ -29,23 +32,7 @@ class TestCaseHTTPMocks(TestCase):
         self.addCleanup(p.stop)
 
 
-class TestCaseBase(TestCaseHTTPMocks):
-    private_key = 'LOADED_PRIVATE_KEY'
-    signature = b'SIG'
-
-    def setUp(self) -> None:
-        super().setUp()
-        p = patch('walutomatpy.client.crypto.load_privatekey')
-        self.load_privatekey_mock = p.start()
-        self.load_privatekey_mock.return_value = self.private_key
-        self.addCleanup(p.stop)
-        p = patch('walutomatpy.client.crypto.sign')
-        self.sign_mock = p.start()
-        self.sign_mock.return_value = self.signature
-        self.addCleanup(p.stop)
-
-
-class TestWalutomatTrader(TestCaseBase):
+class TestWalutomatTrader(TestCaseHTTPMocks):
     UUID4 = '3d4a2181-44c7-4b8a-a82d-f889dcba401f'
 
     def setUp(self) -> None:
@@ -69,6 +56,35 @@ class TestWalutomatTrader(TestCaseBase):
         result = self.trader.issue_order(OrderTypeEnum.SELL, pair, 1000, pair.base, 4.50)
         self.assertEqual(result, self.order)
 
+    def test_lazy_order_issuence(self):
+        pair = OrderCurrencyPair(base=OrderCurrencyEnum.EUR, counter=OrderCurrencyEnum.PLN)
+        result = self.trader.issue_order(OrderTypeEnum.SELL, pair, 1000, pair.base, 4.50, lazy=True)
+        self.assertEqual(result.orderId, "2035e361-e672-457a-9c3c-0e86e5ff54d6")
+        self.assertEqual(result.volume, 1000)
+        self.client_mock.get_p2p_order_by_id.assert_not_called()
+        self.assertEqual(result.status, self.order.status)
+        self.assertEqual(result.completion, self.order.completion)
+        self.client_mock.get_p2p_order_by_id.assert_called_once()
+
+    def test_lazy_order_submit_params_typed_as_order_fields(self):
+        result = self.trader.issue_order(OrderTypeEnum.SELL, 'EURPLN', 1000, 'EUR', 4.1, lazy=True)
+        self.assertEqual(result.currencyPair, OrderCurrencyPair('EURPLN'))
+        self.assertIs(result.volumeCurrency, OrderCurrencyEnum.EUR)
+        self.assertEqual(result.volume, Decimal('1000'))
+        self.assertEqual(result.limitPrice, Decimal('4.1'))
+        self.assertTrue(result.is_sell())
+        self.client_mock.get_p2p_order_by_id.assert_not_called()
+
+    def test_lazy_order_filled_by_watcher(self):
+        pair = OrderCurrencyPair(base=OrderCurrencyEnum.EUR, counter=OrderCurrencyEnum.PLN)
+        self.client_mock.submit_p2p_order.return_value = self.order.orderId
+        result = self.trader.issue_order(OrderTypeEnum.SELL, pair, 1000, pair.base, 4.50, lazy=True)
+        self.client_mock.get_p2p_active_orders.return_value = [self.order]
+        self.trader.order_watcher.watch(self.order.orderId)
+        self.trader.order_watcher.sweep()
+        self.assertTrue(result.is_loaded)
+        self.client_mock.get_p2p_order_by_id.assert_not_called()
+
     def test_order_canceling(self):
         self.trader.cancel(self.order.orderId)
         self.client_mock.cancel_p2p_order.assert_called_with(self.order.orderId)
@@ -91,6 +107,53 @@ class TestWalutomatTrader(TestCaseBase):
         self.client_mock.submit_p2p_order.assert_called_with(self.UUID4, pair, OrderTypeEnum.BUY, volume_to_buy, base,
                                                              limit)
 
+    def test_best_price_per_volume(self):
+        pair = OrderCurrencyPair('EURPLN')
+        bids = [Offer(4.5, 100), Offer(4.4, 100)]
+        asks = [Offer(4.6, 100), Offer(4.7, 100)]
+        self.client_mock.get_order_book.return_value = OrderBook(bids, asks)
+        best_bid, best_ask = self.trader.get_best_price_per_volume(pair, 200)
+        self.assertEqual(best_bid, Decimal('4.45'))
+        self.assertEqual(best_ask, Decimal('4.65'))
+
+    def test_best_price_per_volume_adaptive_depth(self):
+        pair = OrderCurrencyPair('EURPLN')
+        levels = [Offer(4.5 - i / 100, 100) for i in range(100)]
+
+        def get_order_book(currency_pair, item_limit):
+            return OrderBook(levels[:item_limit], levels[:item_limit])
+
+        self.client_mock.get_order_book.side_effect = get_order_book
+        # every call fetches, so the learned depth shows in the requests
+        trader = WalutomatTrader(self.client_mock, order_book_ttl=0)
+        trader.get_best_price_per_volume(pair, 3000)
+        depths = [call.args[1] for call in self.client_mock.get_order_book.call_args_list]
+        self.assertEqual(depths, [10, 36])
+        trader.get_best_price_per_volume(pair, 3000)
+        self.client_mock.get_order_book.assert_called_with(pair, 36)
+
+    def test_deepest_order_book_reused(self):
+        pair = OrderCurrencyPair('EURPLN')
+        now = [0.0]
+        trader = WalutomatTrader(self.client_mock, order_book_ttl=1.0, clock=lambda: now[0])
+        levels = [Offer(4.5 - i / 100, 100) for i in range(100)]
+        self.client_mock.get_order_book.side_effect = \
+            lambda currency_pair, item_limit: OrderBook(levels[:item_limit], levels[:item_limit])
+        trader.get_best_price_per_volume(pair, 3000, item_limit=40)
+        trader.get_best_price_per_volume(pair, 100, item_limit=10)
+        trader.get_best_prices_per_volumes(pair, [100], item_limit=20)
+        self.client_mock.get_order_book.assert_called_once_with(pair, 40)
+        now[0] = 1.0
+        trader.get_best_price_per_volume(pair, 100, item_limit=10)
+        self.client_mock.get_order_book.assert_called_with(pair, 10)
+
+    def test_best_price_per_volume_exhausted_book(self):
+        pair = OrderCurrencyPair('EURPLN')
+        self.client_mock.get_order_book.return_value = OrderBook([Offer(4.5, 100)], [Offer(4.6, 100)])
+        with self.assertRaises(RetryError):
+            self.trader.get_best_price_per_volume(pair, 200)
+        self.assertEqual(self.client_mock.get_order_book.call_count, 1)
+
 
 class TestPricePerVolume(TestCase):
     def test_happy_path(self):
@@ -104,3 +167,101 @@ class TestPricePerVolume(TestCase):
         with self.assertRaises(MissingVolume) as ex:
             get_price_by_volume(offers, 500)
             self.assertEqual(float(ex), 50.0)
+
+    def test_exact_average_price(self):
+        offers = [Offer('4.1234', '0.10'), Offer('4.1235', '0.20'), Offer('4.1236', '1000.00')]
+        result = get_price_by_volume(offers, '0.40')
+        self.assertEqual(result, (Decimal('4.1234') * 10 + Decimal('4.1235') * 20 + Decimal('4.1236') * 10) / 40)
+
+
+class TestOrderBook(TestCase):
+    def setUp(self) -> None:
+        self.offers = [Offer(10, 100), Offer(10, 200), Offer(20, 150)]
+        self.book = OrderBook(bids=[Offer(12, 50), Offer(11, 50)], asks=self.offers)
+
+    def test_average_price_matches_linear_scan(self):
+        for volume in (1, 100, 200, 250, 449, 450):
+            self.assertEqual(self.book.asks.average_price(volume), get_price_by_volume(self.offers, volume))
+
+    def test_not_enough_volume(self):
+        with self.assertRaises(MissingVolume) as ex:
+            self.book.asks.average_price(500)
+        self.assertEqual(float(ex.exception), 50.0)
+
+    def test_max_volume_under_price(self):
+        self.assertEqual(self.book.asks.max_volume(9), 0)
+        self.assertEqual(self.book.asks.max_volume(10), 300)
+        self.assertEqual(self.book.asks.max_volume(25), 450)
+        self.assertEqual(self.book.bids.max_volume(11.5), 50)
+        self.assertEqual(self.book.bids.max_volume(11), 100)
+
+    def test_vectorized_average_prices(self):
+        volumes = [1, 100, 200, 250, 449, 450, 451]
+        bid_prices, ask_prices = self.book.get_prices_by_volumes(volumes)
+        for volume, price in zip(volumes[:-1], ask_prices[:-1]):
+            self.assertAlmostEqual(price, float(self.book.asks.average_price(volume)))
+        self.assertTrue(math.isnan(ask_prices[-1]))
+        self.assertAlmostEqual(bid_prices[1], 11.5)
+        self.assertTrue(all(math.isnan(price) for price in bid_prices[2:]))
+
+
+class TestMarketSnapshot(TestCase):
+    def test_books_keyed_by_pair(self):
+        client = WrappedWalutomatClient('API_KEY', 'PRIVATE_KEY')
+        pairs = [OrderCurrencyPair('EURPLN'), OrderCurrencyPair('USDPLN')]
+        offers = {'EURPLN': ([Offer(4.5, 10)], [Offer(4.6, 10)]), 'USDPLN': ([Offer(3.9, 10)], [Offer(4.0, 10)])}
+        with patch.object(client, 'get_p2p_best_offers_detailed', side_effect=lambda pair, limit: offers[str(pair)]):
+            snapshot = client.get_market_snapshot(pairs, 5)
+        self.assertEqual(set(snapshot), {'EURPLN', 'USDPLN'})
+        self.assertEqual(snapshot['USDPLN'].asks.best_price, 4.0)
+        self.assertIsNotNone(snapshot['EURPLN'].timestamp)
+
+
+class TestBulkOrders(TestCase):
+    def setUp(self) -> None:
+        self.client = MagicMock(spec=WrappedWalutomatClient)
+        self.trader = WalutomatTrader(self.client)
+        pair = OrderCurrencyPair('EURPLN')
+        self.orders = [OrderRequest(OrderTypeEnum.BUY, pair, Decimal(100), OrderCurrencyEnum.EUR, Decimal('4.5')),
+                       OrderRequest(OrderTypeEnum.SELL, pair, Decimal(100), OrderCurrencyEnum.EUR, Decimal('4.7'))]
+
+    def test_network_errors_left_to_client_retry_policy(self):
+        self.client.submit_p2p_order.side_effect = requests.ConnectionError()
+        results = self.trader.submit_many(self.orders[:1], resolve=False)
+        self.assertIsInstance(results[0].error, requests.ConnectionError)
+        self.client.submit_p2p_order.assert_called_once()
+
+    def test_reserved_orders_watched(self):
+        ledger = Mock(spec=BalanceLedger)
+        trader = WalutomatTrader(self.client, ledger=ledger)
+        self.client.submit_p2p_order.side_effect = lambda submit_id, *args: f'order-{submit_id}'
+        with patch.object(trader, 'watch_order') as watch_mock:
+            trader.submit_many(self.orders, max_workers=1, resolve=False)
+        self.assertEqual(ledger.reserve.call_count, 2)
+        self.assertEqual([call.args[0] for call in watch_mock.call_args_list],
+                         [f'order-{order.submit_id}' for order in self.orders])
+
+    def test_status_resolved_in_batch(self):
+        self.client.submit_p2p_order.side_effect = lambda submit_id, *args: f'order-{submit_id}'
+        active = Mock(orderId=f'order-{self.orders[0].submit_id}')
+        closed = Mock(orderId=f'order-{self.orders[1].submit_id}')
+        self.client.get_p2p_active_orders.return_value = [active]
+        self.client.get_p2p_order_by_id.return_value = [closed]
+        results = self.trader.submit_many(self.orders)
+        self.assertEqual([result.order for result in results], [active, closed])
+        self.client.get_p2p_active_orders.assert_called_once()
+        self.client.get_p2p_order_by_id.assert_called_once_with(closed.orderId)
+
+    def test_results_kept_when_resolve_fails(self):
+        self.client.submit_p2p_order.side_effect = lambda submit_id, *args: f'order-{submit_id}'
+        self.client.get_p2p_active_orders.side_effect = requests.ConnectionError('boom')
+        self.client.get_p2p_order_by_id.side_effect = requests.ConnectionError('boom')
+        results = self.trader.submit_many(self.orders)
+        self.assertEqual([result.order_id for result in results],
+                         [f'order-{order.submit_id}' for order in self.orders])
+        self.assertTrue(all(result.ok and result.order is None for result in results))
+
+    def test_errors_returned_per_order(self):
+        self.client.cancel_p2p_order.side_effect = [None, requests.ConnectionError()]
+        results = self.trader.cancel_many(['a', 'b'], max_workers=1)
+        self.assertEqual([result.ok for result in results], [True, False])
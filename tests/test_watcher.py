@@ -0,0 +1,90 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import requests
+
+from walutomatpy import WrappedWalutomatClient
+from walutomatpy import WalutomatOrder
+from walutomatpy import WalutomatTrader
+from walutomatpy.watcher import OrderWatcher
+
+from . import read_fixture
+
+
+def make_order(order_id, completion=0, status='ACTIVE'):
+    raw_order = read_fixture('order_result.json')
+    raw_order.update(orderId=order_id, completion=completion, status=status)
+    return WalutomatOrder(**raw_order)
+
+
+class TestOrderWatcher(TestCase):
+    def setUp(self) -> None:
+        self.client_mock = MagicMock(spec=WrappedWalutomatClient)
+        self.client_mock.get_p2p_active_orders.return_value = []
+        self.watcher = OrderWatcher(self.client_mock)
+
+    def test_single_listing_for_many_orders(self):
+        futures = [self.watcher.watch(f'ID{i}') for i in range(10)]
+        self.client_mock.get_p2p_active_orders.return_value = [make_order(f'ID{i}') for i in range(10)]
+        self.assertTrue(self.watcher.sweep())
+        self.client_mock.get_p2p_active_orders.assert_called_once()
+        self.client_mock.get_p2p_order_by_id.assert_not_called()
+        self.assertFalse(any(future.done() for future in futures))
+        self.assertFalse(self.watcher.sweep())
+
+    def test_executed_order_resolved(self):
+        future = self.watcher.watch('ID')
+        executed = make_order('ID', completion=100, status='CLOSED')
+        self.client_mock.get_p2p_order_by_id.return_value = [executed]
+        self.watcher.sweep()
+        self.client_mock.get_p2p_order_by_id.assert_called_once_with('ID')
+        self.assertEqual(future.result(0), executed)
+        self.assertIsNone(self.watcher.get_order('ID'))
+
+    def test_closed_order_resolved(self):
+        future = self.watcher.watch('ID')
+        self.client_mock.get_p2p_order_by_id.return_value = [make_order('ID', completion=10, status='CLOSED')]
+        self.watcher.sweep()
+        self.assertFalse(future.result(0).is_executed())
+
+    def test_failed_lookup_skips_only_that_order(self):
+        failing, closed = self.watcher.watch('ID1'), self.watcher.watch('ID2')
+        closed_order = make_order('ID2', completion=10, status='CLOSED')
+
+        def get_p2p_order_by_id(order_id):
+            if order_id == 'ID1':
+                raise requests.ConnectionError()
+            return [closed_order]
+
+        self.client_mock.get_p2p_order_by_id.side_effect = get_p2p_order_by_id
+        with self.assertLogs('walutomatpy', 'ERROR'):
+            self.assertTrue(self.watcher.sweep())
+        self.assertEqual(closed.result(0), closed_order)
+        self.assertFalse(failing.done())
+        self.client_mock.get_p2p_order_by_id.side_effect = None
+        self.client_mock.get_p2p_order_by_id.return_value = [make_order('ID1', completion=100, status='CLOSED')]
+        self.watcher.sweep()
+        self.assertTrue(failing.result(0).is_executed())
+
+    def test_listener_notified_on_change(self):
+        updates = []
+        self.watcher.add_listener(updates.append)
+        self.watcher.watch('ID')
+        self.client_mock.get_p2p_active_orders.return_value = [make_order('ID', completion=10)]
+        self.watcher.sweep()
+        self.watcher.sweep()
+        self.client_mock.get_p2p_active_orders.return_value = [make_order('ID', completion=20)]
+        self.watcher.sweep()
+        self.assertEqual([order.completion for order in updates], [10, 20])
+
+
+class TestWaitToFillOrder(TestCase):
+    def test_wait_to_fill_order(self):
+        client_mock = MagicMock(spec=WrappedWalutomatClient)
+        client_mock.get_p2p_active_orders.return_value = []
+        client_mock.get_p2p_order_by_id.return_value = [make_order('ID', completion=100, status='CLOSED')]
+        trader = WalutomatTrader(client_mock)
+        try:
+            self.assertTrue(trader.wait_to_fill_order('ID', timeout=5))
+        finally:
+            trader.order_watcher.stop()